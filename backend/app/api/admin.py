@@ -2,12 +2,15 @@
 統括管理者専用APIエンドポイント
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
-from app.database import get_db
+from app.database import get_db, engine
 from app.models.user import UserAuth, Coach, Client
-from app.utils.auth import get_current_user, get_password_hash
+from app.utils.auth import get_current_user, get_password_hash_async, invalidate_principal
+from app.utils.pool_metrics import pool_metrics
+from app.utils.email_queue import email_dispatcher
 from pydantic import BaseModel, EmailStr
 
 
@@ -55,7 +58,7 @@ def require_super_admin(current_user: UserAuth = Depends(get_current_user)):
 
 
 @router.get("/users", response_model=List[UserListResponse])
-async def get_all_users(
+def get_all_users(
     user_type: Optional[str] = None,
     role: Optional[str] = None,
     status_filter: Optional[str] = None,
@@ -98,7 +101,7 @@ async def get_all_users(
 
 
 @router.patch("/users/{user_id}/status")
-async def update_user_status(
+def update_user_status(
     user_id: UUID,
     status_update: UserStatusUpdate,
     db: Session = Depends(get_db),
@@ -131,6 +134,7 @@ async def update_user_status(
     # ステータス更新
     user.status = status_update.status
     db.commit()
+    invalidate_principal(user.user_id)
 
     return {
         "message": "Status updated successfully",
@@ -141,7 +145,7 @@ async def update_user_status(
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: UUID,
     db: Session = Depends(get_db),
     admin: UserAuth = Depends(require_super_admin)
@@ -165,6 +169,7 @@ async def delete_user(
     # ユーザー削除（CASCADE設定により関連データも削除される）
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
 
     return {
         "message": "User deleted successfully",
@@ -181,7 +186,9 @@ async def create_user(
 ):
     """新規ユーザーを作成（統括管理者のみ）"""
     # メールアドレスの重複チェック
-    existing_user = db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    existing_user = await run_in_threadpool(
+        lambda: db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -198,21 +205,18 @@ async def create_user(
     # ユーザー認証情報の作成
     user_auth = UserAuth(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         user_type=request.user_type,
         role=request.user_type,  # デフォルトはuser_typeと同じ
         status='active'
     )
-    db.add(user_auth)
-    db.flush()
 
     # プロフィールの作成
     name = f"{request.last_name or ''} {request.first_name or ''}".strip()
     furigana = f"{request.last_name_kana or ''} {request.first_name_kana or ''}".strip() if request.last_name_kana or request.first_name_kana else None
 
     if request.user_type == 'coach':
-        profile = Coach(
-            user_id=user_auth.user_id,
+        user_auth.coach = Coach(
             last_name=request.last_name,
             first_name=request.first_name,
             last_name_kana=request.last_name_kana,
@@ -222,10 +226,8 @@ async def create_user(
             email=request.email,
             phone=request.phone
         )
-        db.add(profile)
     else:  # client
-        profile = Client(
-            user_id=user_auth.user_id,
+        user_auth.client = Client(
             last_name=request.last_name,
             first_name=request.first_name,
             last_name_kana=request.last_name_kana,
@@ -236,10 +238,14 @@ async def create_user(
             phone=request.phone,
             status='active'
         )
-        db.add(profile)
 
-    db.commit()
-    db.refresh(user_auth)
+    def save_user():
+        db.add(user_auth)
+        db.commit()
+        db.refresh(user_auth)
+
+    # パスワードハッシュ処理を待つためasyncのまま、DB処理のみスレッドプールで実行
+    await run_in_threadpool(save_user)
 
     return UserListResponse(
         user_id=str(user_auth.user_id),
@@ -250,3 +256,15 @@ async def create_user(
         name=name,
         created_at=user_auth.created_at.isoformat()
     )
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(admin: UserAuth = Depends(require_super_admin)):
+    """DB接続プールの状態を取得（統括管理者のみ）"""
+    return pool_metrics.snapshot(engine)
+
+
+@router.get("/email-queue")
+async def get_email_queue_stats(admin: UserAuth = Depends(require_super_admin)):
+    """メール送信キューの状態を取得（統括管理者のみ）"""
+    return email_dispatcher.stats()
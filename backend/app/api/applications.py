@@ -1,20 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, joinedload, contains_eager
 from typing import List, Optional
 from uuid import UUID
+from datetime import date
 from app.database import get_db
-from app.models.application import Application, ApplicationHistory, CompanyAnalysis
+from app.models.application import Application, ApplicationChange, ApplicationHistory, CompanyAnalysis
 from app.models.user import UserAuth, Client
 from app.schemas.application import (
     ApplicationResponse,
     ApplicationCreate,
     ApplicationUpdate,
+    ApplicationBulkUpdate,
+    ApplicationBulkUpdateResponse,
+    ApplicationBulkUpdateResult,
     ApplicationHistoryResponse,
+    ApplicationChangeResponse,
+    ApplicationChangesResponse,
     CompanyAnalysisResponse,
     CompanyAnalysisCreate,
     CompanyAnalysisUpdate
 )
-from app.utils.auth import get_current_user
+from app.utils.application_changes import (
+    OPERATION_CREATE, OPERATION_DELETE, OPERATION_UPDATE,
+    change_row, changes_since, diff_fields, expand_to_history, record_changes, snapshot
+)
+from app.utils.auth import get_current_user, get_current_principal
+from app.utils.etag import CACHE_CONTROL, ETAG_HEADER, collection_etag, not_modified, related_version
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, parse_cursor_value, set_next_cursor
+from app.utils.streaming import ndjson_response
 
 router = APIRouter(prefix="/api/applications", tags=["applications"])
 
@@ -24,27 +38,37 @@ router = APIRouter(prefix="/api/applications", tags=["applications"])
 # ============================================
 
 @router.get("", response_model=List[ApplicationResponse])
-async def get_applications(
+def get_applications(
+    request: Request,
+    response: Response,
     client_id: Optional[UUID] = Query(None),
     status_filter: Optional[str] = Query(None),
     preference_rating: Optional[int] = Query(None),
     selection_stage: Optional[str] = Query(None),
     client_status: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="未指定の場合 DEFAULT_PAGE_SIZE 件（format=ndjson では全件）"),
+    cursor: Optional[str] = Query(None, description="前ページのレスポンスヘッダー X-Next-Cursor の値"),
+    output_format: Optional[str] = Query(None, alias="format", pattern="^ndjson$", description="ndjson: 1行1JSONでストリーミング返却"),
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
-    """応募一覧取得"""
-    from app.models.user import Coach
-
+    """
+    応募一覧取得
+
+    次回面接日（未設定は最後）・応募ID順のキーセットページネーション（既定 DEFAULT_PAGE_SIZE 件、最大 MAX_PAGE_SIZE 件）。
+    続きがある場合は X-Next-Cursor ヘッダーに次ページのカーソルを返す。
+    format=ndjson の場合は limit 未指定なら全件を逐次ストリーミングする。
+    If-None-Match が ETag と一致する場合は304を返す。
+    """
     # 利用者の場合は自分の応募のみ
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         query = db.query(Application).filter(Application.client_id == client.client_id)
     elif current_user.user_type == "coach":
         # コーチの場合は全顧客の応募を表示（担当コーチの概念を削除）
-        coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+        coach = current_user.coach
         if not coach:
             raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -82,20 +106,62 @@ async def get_applications(
     else:
         query = query.options(joinedload(Application.client))
 
-    applications = query.order_by(Application.next_interview_date.asc()).all()
+    # キーセットページネーション（next_interview_date NULLS LAST, application_id）
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor, 2)
+        cursor_date = parse_cursor_value(cursor_date, date.fromisoformat)
+        cursor_id = parse_cursor_value(cursor_id, UUID)
+        if cursor_date is None:
+            query = query.filter(and_(
+                Application.next_interview_date.is_(None),
+                Application.application_id > cursor_id
+            ))
+        else:
+            query = query.filter(or_(
+                Application.next_interview_date > cursor_date,
+                and_(Application.next_interview_date == cursor_date, Application.application_id > cursor_id),
+                Application.next_interview_date.is_(None)
+            ))
+
+    # 変更がなければ一覧を取得せずに304を返す（利用者情報は利用者なら自分の分、コーチなら全員分の版を含める）
+    client_criteria = [Client.client_id == current_user.client.client_id] if current_user.user_type == "client" else []
+    etag = collection_etag(
+        request, current_user, query, Application.updated_at,
+        *related_version(Client, Client.updated_at, *client_criteria)
+    )
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    query = query.order_by(
+        Application.next_interview_date.asc().nulls_last(),
+        Application.application_id.asc()
+    )
+
+    if output_format == "ndjson":
+        stream = ndjson_response(query, ApplicationResponse, limit)
+        stream.headers.update({ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
+        return stream
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    applications = query.limit(limit + 1).all()
+    if len(applications) > limit:
+        applications = applications[:limit]
+        last = applications[-1]
+        set_next_cursor(response, encode_cursor(last.next_interview_date, last.application_id))
     return applications
 
 
 @router.post("", response_model=ApplicationResponse, status_code=status.HTTP_201_CREATED)
-async def create_application(
+def create_application(
     application_data: ApplicationCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """応募登録"""
     # 利用者の場合は自分のclient_idを使用
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         application_data.client_id = client.client_id
@@ -115,17 +181,90 @@ async def create_application(
 
     application = Application(**application_data.dict())
     db.add(application)
+    db.flush()
+    record_changes(db, [change_row(application, OPERATION_CREATE, snapshot(application), current_user.user_id)])
     db.commit()
     db.refresh(application)
     return application
 
 
+@router.patch("/bulk", response_model=ApplicationBulkUpdateResponse)
+def bulk_update_applications(
+    bulk_data: ApplicationBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_principal)
+):
+    """
+    応募の一括更新（同じ変更を複数の応募に1トランザクションで適用）
+
+    存在しない・権限のない応募は results で個別に返し、それ以外の応募は更新する。
+    """
+    application_ids = list(dict.fromkeys(bulk_data.application_ids))
+    if not application_ids:
+        raise HTTPException(status_code=400, detail="application_ids is required")
+    if len(application_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Up to {MAX_PAGE_SIZE} applications can be updated at once")
+    update_data = bulk_data.changes.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No changes specified")
+
+    own_client_id = None
+    if current_user.user_type == "client":
+        client = current_user.client
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        own_client_id = client.client_id
+
+    applications = {
+        application.application_id: application
+        for application in db.query(Application).filter(Application.application_id.in_(application_ids))
+    }
+    outcomes, rows = {}, []
+    for application_id in application_ids:
+        application = applications.get(application_id)
+        if not application:
+            outcomes[application_id] = ("not_found", [])
+            continue
+        if own_client_id is not None and application.client_id != own_client_id:
+            outcomes[application_id] = ("forbidden", [])
+            continue
+        changes = diff_fields(application, update_data)
+        if changes:
+            rows.append(change_row(application, OPERATION_UPDATE, changes, current_user.user_id))
+        outcomes[application_id] = ("updated" if changes else "unchanged", list(changes))
+
+    record_changes(db, rows)
+    db.commit()
+
+    # コミットで期限切れになった応募を1クエリで読み直してレスポンスに変換
+    updated_ids = [i for i, (result, _) in outcomes.items() if result in ("updated", "unchanged")]
+    refreshed = {
+        application.application_id: ApplicationResponse.model_validate(application)
+        for application in db.query(Application).options(joinedload(Application.client)).populate_existing().filter(
+            Application.application_id.in_(updated_ids)
+        )
+    } if updated_ids else {}
+    results = [
+        ApplicationBulkUpdateResult(
+            application_id=application_id,
+            result=result,
+            changed_fields=changed_fields,
+            application=refreshed.get(application_id),
+        )
+        for application_id, (result, changed_fields) in outcomes.items()
+    ]
+    return ApplicationBulkUpdateResponse(
+        updated_count=sum(1 for r in results if r.result == "updated"),
+        results=results,
+    )
+
+
 # ============================================
 # 企業分析API（固定パス、パスパラメータより前）
 # ============================================
 
 @router.get("/companies-analysis", response_model=List[CompanyAnalysisResponse])
-async def get_companies_analysis(
+def get_companies_analysis(
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
 ):
@@ -135,7 +274,7 @@ async def get_companies_analysis(
 
 
 @router.post("/companies-analysis", response_model=CompanyAnalysisResponse, status_code=status.HTTP_201_CREATED)
-async def create_company_analysis(
+def create_company_analysis(
     company_data: CompanyAnalysisCreate,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -159,7 +298,7 @@ async def create_company_analysis(
 
 
 @router.get("/companies-analysis/{company_id}", response_model=CompanyAnalysisResponse)
-async def get_company_analysis(
+def get_company_analysis(
     company_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -174,7 +313,7 @@ async def get_company_analysis(
 
 
 @router.put("/companies-analysis/{company_id}", response_model=CompanyAnalysisResponse)
-async def update_company_analysis(
+def update_company_analysis(
     company_id: UUID,
     company_data: CompanyAnalysisUpdate,
     db: Session = Depends(get_db),
@@ -202,10 +341,10 @@ async def update_company_analysis(
 # ============================================
 
 @router.get("/history/{application_id}", response_model=List[ApplicationHistoryResponse])
-async def get_application_history(
+def get_application_history(
     application_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """応募履歴取得"""
     application = db.query(Application).filter(Application.application_id == application_id).first()
@@ -214,26 +353,62 @@ async def get_application_history(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or application.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-    history = db.query(ApplicationHistory).filter(
-        ApplicationHistory.application_id == application_id
-    ).order_by(ApplicationHistory.changed_date.desc()).all()
-
+    # 旧形式の履歴と、変更ログを項目ごとに展開した履歴を新しい順に返す
+    history = [
+        ApplicationHistoryResponse.model_validate(row)
+        for row in db.query(ApplicationHistory).filter(
+            ApplicationHistory.application_id == application_id
+        ).order_by(ApplicationHistory.changed_date.desc())
+    ]
+    changes = db.query(ApplicationChange).filter(
+        ApplicationChange.application_id == application_id,
+        ApplicationChange.operation == OPERATION_UPDATE,
+    ).order_by(ApplicationChange.seq.desc()).all()
+    history.extend(ApplicationHistoryResponse(**row) for change in changes for row in expand_to_history(change))
+    history.sort(key=lambda h: h.changed_date, reverse=True)
     return history
 
 
+@router.get("/changes", response_model=ApplicationChangesResponse)
+def get_application_changes(
+    since: int = Query(0, ge=0, description="前回の next_since（初回は0）"),
+    client_id: Optional[UUID] = Query(None, description="コーチ用: 利用者で絞り込み"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_principal)
+):
+    """
+    応募の変更ログの差分取得（since より後の登録・更新・削除を連番順に返す）
+
+    利用者は自分の応募のみ、コーチは全利用者（client_id で絞り込み可）。
+    """
+    if current_user.user_type == "client":
+        client = current_user.client
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        client_id = client.client_id
+
+    changes, has_more = changes_since(db, since, limit, client_id)
+    return ApplicationChangesResponse(
+        changes=[ApplicationChangeResponse.model_validate(change) for change in changes],
+        next_since=changes[-1].seq if changes else since,
+        has_more=has_more,
+    )
+
+
 # ============================================
 # 個別応募API（パスパラメータのみ、最後に定義）
 # ============================================
 
 @router.get("/{application_id}", response_model=ApplicationResponse)
-async def get_application(
+def get_application(
     application_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """応募詳細取得"""
     application = db.query(Application).options(joinedload(Application.client)).filter(
@@ -244,7 +419,7 @@ async def get_application(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or application.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -252,11 +427,11 @@ async def get_application(
 
 
 @router.put("/{application_id}", response_model=ApplicationResponse)
-async def update_application(
+def update_application(
     application_id: UUID,
     application_data: ApplicationUpdate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """応募情報更新"""
     application = db.query(Application).filter(Application.application_id == application_id).first()
@@ -265,24 +440,15 @@ async def update_application(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or application.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-    # 変更履歴の記録
+    # 変更の反映と変更ログの記録
     update_data = application_data.dict(exclude_unset=True)
-    for field, new_value in update_data.items():
-        old_value = getattr(application, field)
-        if old_value != new_value:
-            history = ApplicationHistory(
-                application_id=application.application_id,
-                changed_field=field,
-                old_value=str(old_value) if old_value else None,
-                new_value=str(new_value) if new_value else None,
-                changed_by=current_user.user_id
-            )
-            db.add(history)
-            setattr(application, field, new_value)
+    changes = diff_fields(application, update_data)
+    if changes:
+        record_changes(db, [change_row(application, OPERATION_UPDATE, changes, current_user.user_id)])
 
     db.commit()
     db.refresh(application)
@@ -290,10 +456,10 @@ async def update_application(
 
 
 @router.delete("/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_application(
+def delete_application(
     application_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """応募情報削除"""
     # アプリケーションを取得
@@ -303,11 +469,12 @@ async def delete_application(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or application.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-    # 削除実行
+    # 削除実行（変更ログには削除の記録を残す）
+    record_changes(db, [change_row(application, OPERATION_DELETE, {}, current_user.user_id)])
     db.delete(application)
     db.commit()
     return None
@@ -1,48 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, join, joinedload
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from app.database import get_db
-from app.models.appointment import Appointment, CoachAvailability, appointment_coaches
-from app.models.user import UserAuth, Client, Coach
+from app.models.appointment import Appointment, CoachAvailability, CoachAvailabilityRule, appointment_coaches
+from app.models.user import Client, Coach, UserAuth
 from app.schemas.appointment import (
     AppointmentResponse,
     AppointmentCreate,
     AppointmentUpdate,
     CoachAvailabilityResponse,
     CoachAvailabilityCreate,
+    CoachAvailabilityBulkCreate,
+    AvailabilityRuleCreate,
+    AvailabilityRuleUpdate,
+    AvailabilityRuleResponse,
+    CoachFreeBusy,
+    FreeBusyResponse,
     CoachInfo
 )
-from app.utils.auth import get_current_user, get_current_coach
-from app.utils.email import (
-    send_appointment_approval_email,
-    send_appointment_approval_email_multi,
-    send_appointment_cancellation_email,
-    send_appointment_update_email
+from app.utils.auth import get_current_user, get_current_principal, get_current_coach_principal
+from app.utils.availability import MAX_RULE_DAYS, SKIPPED_SLOTS_HEADER, SLOT_MINUTES, create_slots, expand_weekly_rule
+from app.utils.availability_rules import (
+    RULE_EXPANSION_DEFAULT_DAYS,
+    expand_virtual_slots,
+    materialize_booked_slots,
+    validate_rule,
+    virtual_slot_response
+)
+from app.utils.email import send_appointment_notifications
+from app.utils.etag import collection_etag, not_modified, related_version
+from app.utils.email_templates import EVENT_APPROVED, EVENT_CANCELLED, EVENT_UPDATED
+from app.utils.freebusy import (
+    MAX_COACHES,
+    MAX_WINDOW_DAYS,
+    first_common_starts,
+    intersect_ranges,
+    load_free_ranges,
+    to_bitmap
+)
+from app.utils.scheduling import (
+    CANCELLED_STATUS,
+    DEFAULT_DURATION_MINUTES,
+    appointment_range,
+    normalize,
+    commit_schedule,
+    ensure_no_appointment_conflict,
+    set_slots_booked,
+    to_utc
 )
 
 router = APIRouter(prefix="/api/appointments", tags=["appointments"])
 
 
 @router.get("", response_model=List[AppointmentResponse])
-async def get_appointments(
+def get_appointments(
+    request: Request,
+    response: Response,
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
-    """予約一覧取得"""
+    """予約一覧取得（If-None-Match が ETag と一致する場合は304）"""
     query = db.query(Appointment).options(joinedload(Appointment.client), joinedload(Appointment.coaches))
 
     # ユーザータイプに応じたフィルター
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         query = query.filter(Appointment.client_id == client.client_id)
     elif current_user.user_type == "coach":
-        coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+        coach = current_user.coach
         if not coach:
             raise HTTPException(status_code=404, detail="Coach not found")
         # コーチは自分が担当している予約のみ表示（appointment_coachesを通じて）
@@ -50,52 +82,97 @@ async def get_appointments(
 
     # 日付範囲フィルター
     if start_date:
-        query = query.filter(Appointment.appointment_date >= start_date)
+        query = query.filter(Appointment.appointment_date >= to_utc(start_date))
     if end_date:
-        query = query.filter(Appointment.appointment_date <= end_date)
+        query = query.filter(Appointment.appointment_date <= to_utc(end_date))
+
+    # 変更がなければ一覧を取得せずに304を返す（一覧に含まれる利用者・コーチ情報の版を含める）
+    if current_user.user_type == "client":
+        criteria = [Appointment.client_id == current_user.client.client_id]
+    elif current_user.user_type == "coach":
+        criteria = [Appointment.appointment_id.in_(
+            select(appointment_coaches.c.appointment_id).where(
+                appointment_coaches.c.coach_id == current_user.coach.coach_id
+            ).correlate(None)
+        )]
+    else:
+        criteria = []
+    clients = join(Client, Appointment, Client.client_id == Appointment.client_id)
+    coaches = join(Coach, appointment_coaches, Coach.coach_id == appointment_coaches.c.coach_id).join(
+        Appointment, Appointment.appointment_id == appointment_coaches.c.appointment_id
+    )
+    etag = collection_etag(
+        request, current_user, query, Appointment.updated_at,
+        *related_version(clients, Client.updated_at, *criteria),
+        *related_version(coaches, Coach.updated_at, *criteria)
+    )
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
 
     appointments = query.order_by(Appointment.appointment_date.asc()).all()
     return appointments
 
 
+def _with_rule_slots(
+    db: Session,
+    availability: List[CoachAvailability],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    coach_ids: Optional[List[UUID]] = None
+) -> list:
+    """
+    登録済みの空き枠に、繰り返しルールから展開した枠を開始順に加える
+
+    期間の指定がない場合は現在（または start_date）から RULE_EXPANSION_DEFAULT_DAYS 日分を展開する。
+    """
+    window_start = normalize(start_date or datetime.now(timezone.utc))
+    window_end = normalize(end_date) if end_date else window_start + timedelta(days=RULE_EXPANSION_DEFAULT_DAYS)
+    window_end = min(window_end, window_start + timedelta(days=MAX_RULE_DAYS))
+    if window_start >= window_end:
+        return availability
+
+    virtual = [
+        virtual_slot_response(rule, slot_start, slot_end)
+        for rule, slot_start, slot_end in expand_virtual_slots(db, window_start, window_end, coach_ids)
+    ]
+    if not virtual:
+        return availability
+    merged = [*availability, *virtual]
+    merged.sort(key=lambda slot: normalize(slot["available_start"] if isinstance(slot, dict) else slot.available_start))
+    return merged
+
+
 # コーチ空き枠API（特定のパスなので、/{appointment_id}より前に定義）
 @router.get("/coach-availability", response_model=List[CoachAvailabilityResponse])
-async def get_all_coach_availability(
+def get_all_coach_availability(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
 ):
     """全コーチの空き枠取得（コーチ情報含む）"""
-    try:
-        print(f"[DEBUG] get_all_coach_availability called - start_date: {start_date}, end_date: {end_date}, user: {current_user.user_id}")
-        query = db.query(CoachAvailability).options(
-            joinedload(CoachAvailability.coach)
-        )
+    query = db.query(CoachAvailability).options(
+        joinedload(CoachAvailability.coach)
+    )
 
-        # 日付範囲フィルター
-        if start_date:
-            query = query.filter(CoachAvailability.available_start >= start_date)
-        if end_date:
-            query = query.filter(CoachAvailability.available_end <= end_date)
+    # 日付範囲フィルター
+    if start_date:
+        query = query.filter(CoachAvailability.available_start >= to_utc(start_date))
+    if end_date:
+        query = query.filter(CoachAvailability.available_end <= to_utc(end_date))
 
-        # 未予約のもののみ
-        query = query.filter(CoachAvailability.is_booked == False)
+    # 未予約のもののみ
+    query = query.filter(CoachAvailability.is_booked == False)
 
-        availability = query.order_by(CoachAvailability.available_start.asc()).all()
-        print(f"[DEBUG] Found {len(availability)} availability slots")
+    availability = query.order_by(CoachAvailability.available_start.asc()).all()
 
-        # ORM オブジェクトを直接返す（from_attributes=True で自動変換）
-        return availability
-    except Exception as e:
-        print(f"[ERROR] get_all_coach_availability failed: {e}")
-        import traceback
-        traceback.print_exc()
-        raise
+    # ORM オブジェクト（と繰り返しルールから展開した枠）を返す（from_attributes=True で自動変換）
+    return _with_rule_slots(db, availability, start_date, end_date)
 
 
 @router.get("/coach-availability/{coach_id}", response_model=List[CoachAvailabilityResponse])
-async def get_coach_availability(
+def get_coach_availability(
     coach_id: UUID,
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -109,25 +186,81 @@ async def get_coach_availability(
 
     # 日付範囲フィルター
     if start_date:
-        query = query.filter(CoachAvailability.available_start >= start_date)
+        query = query.filter(CoachAvailability.available_start >= to_utc(start_date))
     if end_date:
-        query = query.filter(CoachAvailability.available_end <= end_date)
+        query = query.filter(CoachAvailability.available_end <= to_utc(end_date))
 
     # 未予約のもののみ
     query = query.filter(CoachAvailability.is_booked == False)
 
     availability = query.order_by(CoachAvailability.available_start.asc()).all()
-    return availability
+    return _with_rule_slots(db, availability, start_date, end_date, [coach_id])
+
+
+@router.get("/free-busy", response_model=FreeBusyResponse, response_model_exclude_none=True)
+def get_free_busy(
+    coach_ids: List[UUID] = Query(..., description="対象コーチ（複数指定可）"),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    encoding: str = Query("ranges", pattern="^(ranges|bitmap)$", description="ranges: 空き区間 / bitmap: 30分ごとの空き"),
+    first: Optional[int] = Query(None, ge=1, le=100, description="全コーチが空いている開始時刻を先頭から何件返すか"),
+    duration_minutes: int = Query(DEFAULT_DURATION_MINUTES, ge=SLOT_MINUTES, le=480),
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_user)
+):
+    """
+    コーチの空き時間取得
+
+    未予約の空き枠を連続した区間に結合し、キャンセル以外の面談を差し引いて返す。
+    複数コーチを指定した場合は全員が空いている区間（common_free）も返し、
+    first を指定すると全員が duration_minutes 分続けて空いている開始時刻を30分刻みで先頭から返す。
+    タイムゾーン付きで指定した場合、結果はUTCで返す。
+    """
+    if start >= end:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window must be at most {MAX_WINDOW_DAYS} days")
+    coach_ids = list(dict.fromkeys(coach_ids))
+    if len(coach_ids) > MAX_COACHES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COACHES} coaches can be specified")
+
+    free = load_free_ranges(db, coach_ids, start, end)
+    window_start, window_end = normalize(start), normalize(end)
+    step = timedelta(minutes=SLOT_MINUTES)
+
+    def output(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if start.tzinfo else value
+
+    def output_ranges(ranges):
+        return [(output(s), output(e)) for s, e in ranges]
+
+    coaches = []
+    for coach_id in coach_ids:
+        if encoding == "bitmap":
+            coaches.append(CoachFreeBusy(coach_id=coach_id, bitmap=to_bitmap(free[coach_id], window_start, window_end, step)))
+        else:
+            coaches.append(CoachFreeBusy(coach_id=coach_id, free=output_ranges(free[coach_id])))
+
+    response = FreeBusyResponse(start=start, end=end, slot_minutes=SLOT_MINUTES, coaches=coaches)
+    if len(coach_ids) > 1 or first:
+        common = free[coach_ids[0]]
+        for coach_id in coach_ids[1:]:
+            common = intersect_ranges(common, free[coach_id])
+        response.common_free = output_ranges(common)
+        if first:
+            starts = first_common_starts(common, window_start, step, timedelta(minutes=duration_minutes), first)
+            response.first_common_starts = [output(s) for s in starts]
+    return response
 
 
 @router.post("/coach-availability", response_model=List[CoachAvailabilityResponse], status_code=status.HTTP_201_CREATED)
-async def create_coach_availability(
+def create_coach_availability(
     availability_data: CoachAvailabilityCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
     """コーチ空き枠登録（コーチのみ）- 30分単位に自動分割"""
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -135,41 +268,59 @@ async def create_coach_availability(
     if availability_data.coach_id != coach.coach_id:
         raise HTTPException(status_code=403, detail="Can only create your own availability")
 
-    # 30分単位に分割
-    start_time = availability_data.available_start
-    end_time = availability_data.available_end
+    if availability_data.available_start >= availability_data.available_end:
+        raise HTTPException(status_code=400, detail="Availability end must be after start")
 
-    created_slots = []
-    current_time = start_time
+    # 30分単位に分割して一括登録（既存の枠と重なる場合は409）
+    created_slots, _ = create_slots(
+        db, coach.coach_id, [(availability_data.available_start, availability_data.available_end)]
+    )
+    # コミットで属性が期限切れになり枠ごとに再読込されないよう、コミット前にレスポンスへ変換
+    response = [CoachAvailabilityResponse.model_validate(slot) for slot in created_slots]
+    commit_schedule(db, "Availability overlaps existing slots")
+    return response
 
-    while current_time < end_time:
-        slot_end = current_time + timedelta(minutes=30)
-        if slot_end > end_time:
-            slot_end = end_time
 
-        availability = CoachAvailability(
-            coach_id=availability_data.coach_id,
-            available_start=current_time,
-            available_end=slot_end,
-            is_booked=False
-        )
-        db.add(availability)
-        created_slots.append(availability)
+@router.post("/coach-availability/bulk", response_model=List[CoachAvailabilityResponse], status_code=status.HTTP_201_CREATED)
+def create_coach_availability_bulk(
+    availability_data: CoachAvailabilityBulkCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """
+    コーチ空き枠一括登録（コーチのみ）- 複数期間・毎週の繰り返しを30分単位で登録
 
-        current_time = slot_end
+    既存の枠と重なる場合は409。skip_conflicts=true なら重なる枠を除いて登録し、除いた枠数をヘッダーで返す。
+    """
+    coach = current_user.coach
+    if not coach:
+        raise HTTPException(status_code=404, detail="Coach not found")
 
-    db.commit()
-    for slot in created_slots:
-        db.refresh(slot)
+    if availability_data.coach_id != coach.coach_id:
+        raise HTTPException(status_code=403, detail="Can only create your own availability")
+
+    ranges = [(r.available_start, r.available_end) for r in availability_data.ranges]
+    for rule in availability_data.weekly_rules:
+        ranges.extend(expand_weekly_rule(
+            rule.weekdays, rule.start_time, rule.end_time, rule.start_date, rule.end_date, rule.timezone
+        ))
+    if not ranges:
+        raise HTTPException(status_code=400, detail="No availability ranges specified")
 
-    return created_slots
+    created_slots, skipped = create_slots(db, coach.coach_id, ranges, skip_conflicts=availability_data.skip_conflicts)
+    response.headers[SKIPPED_SLOTS_HEADER] = str(skipped)
+    # コミットで属性が期限切れになり枠ごとに再読込されないよう、コミット前にレスポンスへ変換
+    result = [CoachAvailabilityResponse.model_validate(slot) for slot in created_slots]
+    commit_schedule(db, "Availability overlaps existing slots")
+    return result
 
 
 @router.delete("/coach-availability/{availability_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_coach_availability(
+def delete_coach_availability(
     availability_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
     """コーチ空き枠削除（コーチのみ）"""
     availability = db.query(CoachAvailability).filter(
@@ -179,7 +330,7 @@ async def delete_coach_availability(
     if not availability:
         raise HTTPException(status_code=404, detail="Availability not found")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach or availability.coach_id != coach.coach_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -192,11 +343,96 @@ async def delete_coach_availability(
     return None
 
 
+def _get_own_rule(db: Session, rule_id: UUID, current_user: UserAuth) -> CoachAvailabilityRule:
+    rule = db.query(CoachAvailabilityRule).filter(CoachAvailabilityRule.rule_id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Availability rule not found")
+    coach = current_user.coach
+    if not coach or rule.coach_id != coach.coach_id:
+        raise HTTPException(status_code=403, detail="Access forbidden")
+    return rule
+
+
+def _apply_rule_data(rule: CoachAvailabilityRule, data: dict) -> None:
+    if "weekdays" in data:
+        data["weekdays"] = sorted(set(data["weekdays"]))
+    if "excluded_dates" in data:
+        data["excluded_dates"] = sorted({d.isoformat() for d in data["excluded_dates"] or []})
+    for field, value in data.items():
+        setattr(rule, field, value)
+    validate_rule(rule.weekdays, rule.start_time, rule.end_time, rule.valid_from, rule.valid_until, rule.timezone)
+
+
+@router.get("/availability-rules", response_model=List[AvailabilityRuleResponse])
+def get_availability_rules(
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """自分の繰り返し空き枠ルール一覧（コーチのみ）"""
+    coach = current_user.coach
+    if not coach:
+        raise HTTPException(status_code=404, detail="Coach not found")
+    return db.query(CoachAvailabilityRule).filter(
+        CoachAvailabilityRule.coach_id == coach.coach_id
+    ).order_by(CoachAvailabilityRule.valid_from.asc(), CoachAvailabilityRule.start_time.asc()).all()
+
+
+@router.post("/availability-rules", response_model=AvailabilityRuleResponse, status_code=status.HTTP_201_CREATED)
+def create_availability_rule(
+    rule_data: AvailabilityRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """
+    繰り返し空き枠ルール登録（コーチのみ）
+
+    枠は登録せず、空き枠の取得時に要求された期間分だけ展開する。予約された枠のみ空き枠として登録される。
+    """
+    coach = current_user.coach
+    if not coach:
+        raise HTTPException(status_code=404, detail="Coach not found")
+
+    rule = CoachAvailabilityRule(coach_id=coach.coach_id)
+    _apply_rule_data(rule, rule_data.dict())
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+
+@router.put("/availability-rules/{rule_id}", response_model=AvailabilityRuleResponse)
+def update_availability_rule(
+    rule_id: UUID,
+    rule_data: AvailabilityRuleUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """繰り返し空き枠ルール更新（コーチのみ）- 予約済みで登録された枠には影響しない"""
+    rule = _get_own_rule(db, rule_id, current_user)
+    _apply_rule_data(rule, rule_data.dict(exclude_unset=True))
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+
+@router.delete("/availability-rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_availability_rule(
+    rule_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """繰り返し空き枠ルール削除（コーチのみ）- 予約済みで登録された枠は残る"""
+    rule = _get_own_rule(db, rule_id, current_user)
+    db.delete(rule)
+    db.commit()
+    return None
+
+
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
-async def get_appointment(
+def get_appointment(
     appointment_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """予約詳細取得"""
     appointment = db.query(Appointment).filter(Appointment.appointment_id == appointment_id).first()
@@ -205,11 +441,11 @@ async def get_appointment(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or appointment.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
     elif current_user.user_type == "coach":
-        coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+        coach = current_user.coach
         if not coach or appointment.coach_id != coach.coach_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -217,15 +453,15 @@ async def get_appointment(
 
 
 @router.post("", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
-async def create_appointment(
+def create_appointment(
     appointment_data: AppointmentCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """予約作成（複数コーチ対応）"""
     # 利用者の場合は自分のclient_idを自動設定
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
 
@@ -244,6 +480,14 @@ async def create_appointment(
     # 最初のコーチをcoach_idとして設定（後方互換性）
     appointment_data.coach_id = coach_ids[0]
 
+    # 日時はUTCに揃えて保存する（SQLiteはオフセットを保存しないため）
+    appointment_data.appointment_date = to_utc(appointment_data.appointment_date)
+
+    # 同じコーチ・利用者の面談と時間帯が重ならないことを確認
+    start = appointment_data.appointment_date
+    end = start + timedelta(minutes=DEFAULT_DURATION_MINUTES)
+    ensure_no_appointment_conflict(db, start, end, coach_ids, appointment_data.client_id)
+
     # 予約作成
     appointment_dict = appointment_data.dict()
     appointment_dict.pop('coach_ids', None)  # coach_idsは保存しない
@@ -260,7 +504,10 @@ async def create_appointment(
             )
         )
 
-    db.commit()
+    # 該当する空き枠を同じトランザクションで予約済みにし、繰り返しルールの枠は予約済みとして登録する
+    set_slots_booked(db, coach_ids, start, end, booked=True)
+    materialize_booked_slots(db, coach_ids, start, end)
+    commit_schedule(db, "Appointment overlaps existing appointments")
     db.refresh(appointment)
 
     # コーチ情報を読み込む
@@ -273,11 +520,11 @@ async def create_appointment(
 
 
 @router.put("/{appointment_id}", response_model=AppointmentResponse)
-async def update_appointment(
+def update_appointment(
     appointment_id: UUID,
     appointment_data: AppointmentUpdate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """予約更新"""
     # 予約情報を取得（クライアントとコーチ情報を含む）
@@ -291,74 +538,63 @@ async def update_appointment(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or appointment.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
     elif current_user.user_type == "coach":
-        coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+        coach = current_user.coach
         if not coach or appointment.coach_id != coach.coach_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-    # 変更前の日時を保存（メール送信用）
+    # 変更前の日時を保存（メール送信・空き枠の解放用）
     old_appointment_date = appointment.appointment_date
-    old_appointment_date_str = old_appointment_date.strftime('%Y年%m月%d日 %H:%M')
+    old_start, old_end = appointment_range(appointment)
+    was_cancelled = appointment.status == CANCELLED_STATUS
 
     # 更新
     update_data = appointment_data.dict(exclude_unset=True)
     date_changed = False
 
     for field, value in update_data.items():
-        if field == 'appointment_date' and value != old_appointment_date:
-            date_changed = True
+        if field == 'appointment_date' and value is not None:
+            # 日時はUTCに揃えて保存する（SQLiteはオフセットを保存しないため）
+            value = to_utc(value)
+            date_changed = normalize(value) != normalize(old_appointment_date)
         setattr(appointment, field, value)
 
-    db.commit()
+    # 日時の変更・キャンセルに合わせて空き枠の予約状態を更新
+    coach_ids = {appointment.coach_id, *(c.coach_id for c in appointment.coaches)}
+    is_cancelled = appointment.status == CANCELLED_STATUS
+    if not is_cancelled and (date_changed or was_cancelled):
+        new_start, new_end = appointment_range(appointment)
+        ensure_no_appointment_conflict(
+            db, new_start, new_end, coach_ids, appointment.client_id,
+            exclude_appointment_id=appointment.appointment_id
+        )
+    if not was_cancelled and (date_changed or is_cancelled):
+        set_slots_booked(db, coach_ids, old_start, old_end, booked=False)
+    if not is_cancelled and (date_changed or was_cancelled):
+        set_slots_booked(db, coach_ids, new_start, new_end, booked=True)
+        materialize_booked_slots(db, coach_ids, new_start, new_end)
+
+    commit_schedule(db, "Appointment overlaps existing appointments")
     db.refresh(appointment)
 
-    # 日時が変更された場合、変更通知メールを送信
+    # 日時が変更された場合、利用者と各コーチに変更通知メールを送信
     if date_changed:
-        client = appointment.client
-        all_coaches = appointment.coaches
-        new_appointment_date_str = appointment.appointment_date.strftime('%Y年%m月%d日 %H:%M')
-        coach_names = [c.name if c.name else f"{c.last_name or ''} {c.first_name or ''}".strip() for c in all_coaches]
-        meeting_url = appointment.mtg_url or "未設定"
-
-        # 利用者にメール送信
-        if client:
-            client_display_name = client.name if client.name else f"{client.last_name or ''} {client.first_name or ''}".strip()
-            send_appointment_update_email(
-                to_email=client.email,
-                client_name=client_display_name,
-                coach_names=coach_names,
-                old_appointment_date=old_appointment_date_str,
-                new_appointment_date=new_appointment_date_str,
-                meeting_url=meeting_url,
-                notes=appointment.notes,
-                is_for_coach=False
-            )
-
-        # 各コーチにメール送信
-        for coach_item in all_coaches:
-            client_display_name = client.name if client.name else f"{client.last_name or ''} {client.first_name or ''}".strip()
-            send_appointment_update_email(
-                to_email=coach_item.email,
-                client_name=client_display_name,
-                coach_names=coach_names,
-                old_appointment_date=old_appointment_date_str,
-                new_appointment_date=new_appointment_date_str,
-                meeting_url=meeting_url,
-                notes=appointment.notes,
-                is_for_coach=True
-            )
+        send_appointment_notifications(
+            EVENT_UPDATED, appointment, appointment.client, appointment.coaches,
+            old_appointment_date=old_appointment_date
+        )
 
     return appointment
 
 
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def cancel_appointment(
+def cancel_appointment(
     appointment_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """予約キャンセル"""
     # 予約情報を取得（クライアントとコーチ情報を含む）
@@ -372,55 +608,32 @@ async def cancel_appointment(
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or appointment.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
     elif current_user.user_type == "coach":
-        coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+        coach = current_user.coach
         if not coach or appointment.coach_id != coach.coach_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-    # メール送信用のデータを準備
-    client = appointment.client
-    all_coaches = appointment.coaches
-    appointment_date_str = appointment.appointment_date.strftime('%Y年%m月%d日 %H:%M')
-    coach_names = [c.name if c.name else f"{c.last_name or ''} {c.first_name or ''}".strip() for c in all_coaches]
-
-    # ステータスをキャンセルに更新
-    appointment.status = 'キャンセル'
+    # ステータスをキャンセルに更新し、予約済みにしていた空き枠を解放
+    if appointment.status != CANCELLED_STATUS:
+        start, end = appointment_range(appointment)
+        set_slots_booked(db, {appointment.coach_id, *(c.coach_id for c in appointment.coaches)}, start, end, booked=False)
+    appointment.status = CANCELLED_STATUS
     db.commit()
 
-    # キャンセル通知メールを送信
-    # 利用者にメール送信
-    if client:
-        client_display_name = client.name if client.name else f"{client.last_name or ''} {client.first_name or ''}".strip()
-        send_appointment_cancellation_email(
-            to_email=client.email,
-            client_name=client_display_name,
-            coach_names=coach_names,
-            appointment_date=appointment_date_str,
-            is_for_coach=False
-        )
-
-    # 各コーチにメール送信
-    for coach_item in all_coaches:
-        client_display_name = client.name if client.name else f"{client.last_name or ''} {client.first_name or ''}".strip()
-        send_appointment_cancellation_email(
-            to_email=coach_item.email,
-            client_name=client_display_name,
-            coach_names=coach_names,
-            appointment_date=appointment_date_str,
-            is_for_coach=True
-        )
+    # 利用者と各コーチにキャンセル通知メールを送信
+    send_appointment_notifications(EVENT_CANCELLED, appointment, appointment.client, appointment.coaches)
 
     return None
 
 
 @router.post("/{appointment_id}/approve", response_model=AppointmentResponse)
-async def approve_appointment(
+def approve_appointment(
     appointment_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
     """予約承認（コーチのみ）- 複数コーチ対応"""
     # 予約とコーチ情報を取得
@@ -432,7 +645,7 @@ async def approve_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -456,45 +669,20 @@ async def approve_appointment(
     db.commit()
     db.refresh(appointment)
 
-    # メール送信の準備
-    appointment_date_str = appointment.appointment_date.strftime('%Y年%m月%d日 %H:%M')
-    meeting_url = appointment.mtg_url or coach.mtg_url or "未設定"
-
-    # 全コーチの名前とメールアドレスを取得
-    all_coaches = appointment.coaches
-    coach_names = [c.name for c in all_coaches]
-
-    # 利用者にメール送信
-    send_appointment_approval_email_multi(
-        to_email=client.email,
-        client_name=client.name,
-        coach_names=coach_names,
-        appointment_date=appointment_date_str,
-        meeting_url=meeting_url,
-        notes=appointment.notes,
-        is_for_coach=False
+    # 利用者と各コーチに承認通知メールを送信
+    send_appointment_notifications(
+        EVENT_APPROVED, appointment, client, appointment.coaches,
+        meeting_url=appointment.mtg_url or coach.mtg_url
     )
 
-    # 各コーチにメール送信
-    for coach_item in all_coaches:
-        send_appointment_approval_email_multi(
-            to_email=coach_item.email,
-            client_name=client.name,
-            coach_names=coach_names,
-            appointment_date=appointment_date_str,
-            meeting_url=meeting_url,
-            notes=appointment.notes,
-            is_for_coach=True
-        )
-
     return appointment
 
 
 @router.post("/{appointment_id}/reject", response_model=AppointmentResponse)
-async def reject_appointment(
+def reject_appointment(
     appointment_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
     """予約拒否（コーチのみ）- 複数コーチ対応"""
     # 予約とコーチ情報を取得
@@ -505,7 +693,7 @@ async def reject_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -514,7 +702,10 @@ async def reject_appointment(
     if coach.coach_id not in coach_ids:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
-    appointment.status = 'キャンセル'
+    if appointment.status != CANCELLED_STATUS:
+        start, end = appointment_range(appointment)
+        set_slots_booked(db, {appointment.coach_id, *coach_ids}, start, end, booked=False)
+    appointment.status = CANCELLED_STATUS
     db.commit()
     db.refresh(appointment)
     return appointment
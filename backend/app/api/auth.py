@@ -1,22 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 from app.database import get_db
 from app.models.user import UserAuth, Coach, Client
 from app.schemas.auth import LoginRequest, RegisterRequest, Token, ClientRegisterRequest, CoachRegisterRequest
-from app.utils.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from app.utils.auth import verify_password_async, get_password_hash_async, create_access_token, get_current_user
 from app.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+# パスワードハッシュ処理を待つエンドポイントはasyncのまま、DB処理のみスレッドプールで実行する
+def _find_user_by_email(db: Session, email: str) -> Optional[UserAuth]:
+    return db.query(UserAuth).filter(UserAuth.email == email).first()
+
+
+def _save_user(db: Session, user_auth: UserAuth) -> UserAuth:
+    """ユーザー（プロフィールを含む）を保存"""
+    db.add(user_auth)
+    db.commit()
+    db.refresh(user_auth)
+    return user_auth
+
+
 @router.post("/login", response_model=Token)
 async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """ログイン"""
     # ユーザーの検索
-    user = db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    user = await run_in_threadpool(_find_user_by_email, db, request.email)
 
-    if not user or not verify_password(request.password, user.password_hash):
+    if not user or not await verify_password_async(request.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -50,7 +65,7 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
 async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     """ユーザー登録（旧エンドポイント - 互換性のため残す）"""
     # メールアドレスの重複チェック
-    existing_user = db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    existing_user = await run_in_threadpool(_find_user_by_email, db, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -67,36 +82,29 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     # ユーザー認証情報の作成
     user_auth = UserAuth(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         user_type=request.user_type,
         role=request.user_type,  # デフォルトはuser_typeと同じ
         status='active'
     )
-    db.add(user_auth)
-    db.flush()
 
     # コーチまたは利用者情報の作成
     if request.user_type == 'coach':
-        coach = Coach(
-            user_id=user_auth.user_id,
+        user_auth.coach = Coach(
             name=request.name,
             furigana=request.furigana,
             email=request.email,
             phone=request.phone
         )
-        db.add(coach)
     else:  # client
-        client = Client(
-            user_id=user_auth.user_id,
+        user_auth.client = Client(
             name=request.name,
             furigana=request.furigana,
             email=request.email,
             phone=request.phone
         )
-        db.add(client)
 
-    db.commit()
-    db.refresh(user_auth)
+    user_auth = await run_in_threadpool(_save_user, db, user_auth)
 
     # JWTトークンの生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -118,7 +126,7 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
 async def register_client(request: ClientRegisterRequest, db: Session = Depends(get_db)):
     """利用者登録"""
     # メールアドレスの重複チェック
-    existing_user = db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    existing_user = await run_in_threadpool(_find_user_by_email, db, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,26 +136,21 @@ async def register_client(request: ClientRegisterRequest, db: Session = Depends(
     # ユーザー認証情報の作成
     user_auth = UserAuth(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         user_type='client',
         role='client',
         status='active'
     )
-    db.add(user_auth)
-    db.flush()
 
     # 利用者情報の作成
-    client = Client(
-        user_id=user_auth.user_id,
+    user_auth.client = Client(
         name=request.name,
         furigana=request.furigana,
         email=request.email,
         phone=request.phone,
         status='active'
     )
-    db.add(client)
-    db.commit()
-    db.refresh(user_auth)
+    user_auth = await run_in_threadpool(_save_user, db, user_auth)
 
     # JWTトークンの生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -176,7 +179,7 @@ async def register_coach(request: CoachRegisterRequest, db: Session = Depends(ge
         )
 
     # メールアドレスの重複チェック
-    existing_user = db.query(UserAuth).filter(UserAuth.email == request.email).first()
+    existing_user = await run_in_threadpool(_find_user_by_email, db, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -186,25 +189,20 @@ async def register_coach(request: CoachRegisterRequest, db: Session = Depends(ge
     # ユーザー認証情報の作成
     user_auth = UserAuth(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         user_type='coach',
         role='coach',
         status='active'
     )
-    db.add(user_auth)
-    db.flush()
 
     # コーチ情報の作成
-    coach = Coach(
-        user_id=user_auth.user_id,
+    user_auth.coach = Coach(
         name=request.name,
         furigana=request.furigana,
         email=request.email,
         phone=request.phone
     )
-    db.add(coach)
-    db.commit()
-    db.refresh(user_auth)
+    user_auth = await run_in_threadpool(_save_user, db, user_auth)
 
     # JWTトークンの生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
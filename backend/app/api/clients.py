@@ -1,47 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import or_, func, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
+from datetime import date, datetime
 from app.database import get_db
 from app.models.user import Client, UserAuth
 from app.schemas.user import ClientResponse, ClientCreate, ClientUpdate
-from app.utils.auth import get_current_coach, get_current_user
+from app.utils.auth import get_current_user, get_current_coach, get_current_principal, get_current_coach_principal
+from app.utils.etag import collection_etag, not_modified
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, parse_cursor_value, datetime_cursor_param,
+    set_next_cursor, escape_like
+)
 
 router = APIRouter(prefix="/api/clients", tags=["clients"])
 
+# fields=summary の場合に除外する大きなテキスト項目
+LARGE_TEXT_FIELDS = ("will_can_must", "strengths_finder")
+
+# 前方一致検索の対象カラム（インデックスは models/user.py を参照）
+PREFIX_SEARCH_COLUMNS = (
+    Client.name, Client.last_name, Client.first_name,
+    Client.furigana, Client.last_name_kana, Client.first_name_kana,
+)
+
 
 @router.get("/me", response_model=ClientResponse)
-async def get_my_profile(
+def get_my_profile(
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """自分の利用者情報取得（利用者のみ）"""
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     return client
 
 
-@router.get("", response_model=List[ClientResponse])
-async def get_clients(
+@router.get("", response_model=List[ClientResponse], response_model_exclude_unset=True)
+def get_clients(
+    request: Request,
+    response: Response,
+    status_filter: Optional[str] = Query(None),
+    contract_end_from: Optional[date] = Query(None),
+    contract_end_to: Optional[date] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="氏名・フリガナ・メールアドレスの前方一致検索"),
+    fields: Optional[str] = Query(None, pattern="^summary$", description="summary: 大きなテキスト項目を除外"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="前ページのレスポンスヘッダー X-Next-Cursor の値"),
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
-    """顧客一覧取得（コーチのみ・全顧客表示）"""
-    from app.models.user import Coach
+    """
+    顧客一覧取得（コーチのみ・全顧客表示）
 
+    登録日時順のキーセットページネーション（既定 DEFAULT_PAGE_SIZE 件、最大 MAX_PAGE_SIZE 件）。
+    続きがある場合は X-Next-Cursor ヘッダーに次ページのカーソルを返す。
+    If-None-Match が ETag と一致する場合は304を返す。
+    """
     # 現在のコーチ情報を取得（認証確認のため）
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
-    # すべての顧客を返す（担当コーチの概念を削除）
-    clients = db.query(Client).all()
-    return clients
+    # fields=summary の場合は大きなテキスト項目を読み込まない
+    if fields == "summary":
+        columns = [c for c in Client.__table__.columns if c.name not in LARGE_TEXT_FIELDS]
+        query = db.query(*columns)
+    else:
+        query = db.query(Client)
+
+    # すべての顧客を対象にフィルター（担当コーチの概念を削除）
+    if status_filter:
+        query = query.filter(Client.status == status_filter)
+    if contract_end_from:
+        query = query.filter(Client.contract_end_date >= contract_end_from)
+    if contract_end_to:
+        query = query.filter(Client.contract_end_date <= contract_end_to)
+
+    # 前方一致検索（text_pattern_opsインデックスを利用するためLIKE 'xxx%'の形にする）
+    if q:
+        pattern = escape_like(q.strip()) + "%"
+        conditions = [column.like(pattern, escape="\\") for column in PREFIX_SEARCH_COLUMNS]
+        conditions.append(func.lower(Client.email).like(pattern.lower(), escape="\\"))
+        query = query.filter(or_(*conditions))
+
+    # キーセットページネーション（created_at, client_id）
+    if cursor:
+        created_at, client_id = decode_cursor(cursor, 2)
+        query = query.filter(tuple_(Client.created_at, Client.client_id) > tuple_(
+            datetime_cursor_param(db, parse_cursor_value(created_at, datetime.fromisoformat)),
+            parse_cursor_value(client_id, UUID)
+        ))
+
+    # 変更がなければ一覧を取得せずに304を返す
+    cached = not_modified(request, response, collection_etag(request, current_user, query, Client.updated_at))
+    if cached:
+        return cached
+
+    query = query.order_by(Client.created_at.asc(), Client.client_id.asc())
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor(rows[-1].created_at, rows[-1].client_id))
+
+    if fields == "summary":
+        return [dict(row._mapping) for row in rows]
+    return rows
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
-async def get_client(
+def get_client(
     client_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -59,7 +130,7 @@ async def get_client(
 
 
 @router.post("", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
-async def create_client(
+def create_client(
     client_data: ClientCreate,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_coach)
@@ -80,7 +151,7 @@ async def create_client(
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
-async def update_client(
+def update_client(
     client_id: UUID,
     client_data: ClientUpdate,
     db: Session = Depends(get_db),
@@ -106,7 +177,7 @@ async def update_client(
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_client(
+def delete_client(
     client_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_coach)
@@ -123,7 +194,7 @@ async def delete_client(
 
 
 @router.post("/{client_id}/coaches/{coach_id}", response_model=ClientResponse)
-async def add_coach_to_client(
+def add_coach_to_client(
     client_id: UUID,
     coach_id: UUID,
     db: Session = Depends(get_db),
@@ -157,7 +228,7 @@ async def add_coach_to_client(
 
 
 @router.delete("/{client_id}/coaches/{coach_id}", response_model=ClientResponse)
-async def remove_coach_from_client(
+def remove_coach_from_client(
     client_id: UUID,
     coach_id: UUID,
     db: Session = Depends(get_db),
@@ -1,42 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 from app.database import get_db
 from app.models.user import Coach, UserAuth
 from app.schemas.user import CoachResponse, CoachUpdate
-from app.utils.auth import get_current_user, get_current_coach
+from app.utils.auth import get_current_user, get_current_principal
+from app.utils.etag import collection_etag, not_modified
 
 router = APIRouter(prefix="/api/coaches", tags=["coaches"])
 
 
 @router.get("/me", response_model=CoachResponse)
-async def get_my_profile(
+def get_my_profile(
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """自分のコーチ情報取得（コーチのみ）"""
     if current_user.user_type != "coach":
         raise HTTPException(status_code=403, detail="Only coaches can access this endpoint")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
     return coach
 
 
 @router.get("", response_model=List[CoachResponse])
-async def get_coaches(
+def get_coaches(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
 ):
-    """コーチ一覧取得"""
-    coaches = db.query(Coach).all()
+    """コーチ一覧取得（If-None-Match が ETag と一致する場合は304）"""
+    query = db.query(Coach)
+    cached = not_modified(request, response, collection_etag(request, current_user, query, Coach.updated_at))
+    if cached:
+        return cached
+    coaches = query.all()
     return coaches
 
 
 @router.get("/{coach_id}", response_model=CoachResponse)
-async def get_coach(
+def get_coach(
     coach_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -49,7 +56,7 @@ async def get_coach(
 
 
 @router.put("/{coach_id}", response_model=CoachResponse)
-async def update_coach(
+def update_coach(
     coach_id: UUID,
     coach_data: CoachUpdate,
     db: Session = Depends(get_db),
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.user import UserAuth
+from app.schemas.dashboard import CoachDashboardResponse
+from app.utils.auth import get_current_coach_principal
+from app.utils.dashboard import get_coach_dashboard
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+
+@router.get("/coach", response_model=CoachDashboardResponse)
+def get_coach_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_coach_principal)
+):
+    """
+    コーチダッシュボードの統計情報取得
+
+    顧客・応募・職務経歴書の状態別件数と、自分が担当する今週の面談件数を返す。
+    集計結果は短時間キャッシュされ、関連データの更新時に破棄される。
+    """
+    coach = current_user.coach
+    if not coach:
+        raise HTTPException(status_code=404, detail="Coach not found")
+    return get_coach_dashboard(db, coach.coach_id)
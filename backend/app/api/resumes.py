@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, join, joinedload, selectinload
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from app.database import get_db
@@ -10,7 +10,7 @@ from app.models.resume import (
 )
 from app.models.user import UserAuth, Client, Coach
 from app.schemas.resume import (
-    ResumeResponse, ResumeCreate, ResumeUpdate,
+    ResumeResponse, ResumeSummaryResponse, ResumeCreate, ResumeUpdate, ResumeDiffResponse,
     WorkExperienceResponse, WorkExperienceCreate, WorkExperienceUpdate,
     EducationHistoryResponse, EducationHistoryCreate, EducationHistoryUpdate,
     CertificationResponse, CertificationCreate, CertificationUpdate,
@@ -19,41 +19,101 @@ from app.schemas.resume import (
     ReviewCommentResponse, ReviewCommentCreate, ReviewCommentUpdate,
     ReviewTemplateResponse, ReviewTemplateCreate, ReviewTemplateUpdate
 )
-from app.utils.auth import get_current_user, get_current_coach, get_current_client
+from app.utils.auth import get_current_user, get_current_coach, get_current_principal, get_current_coach_principal, get_current_client_principal
+from app.utils.etag import collection_etag, not_modified, related_version
+from app.utils.resume_versions import (
+    allocate_version_number, append_version, latest_version, remove_version, resolve_contents, set_content, unified_diff
+)
 
 router = APIRouter(prefix="/api/resumes", tags=["resumes"])
 
 
+def with_reviews(query, include_comments: bool = True):
+    """
+    添削（コーチ情報付き）と添削コメントを一括読み込み
+
+    selectinloadにより、ページ内の全職務経歴書の添削を1クエリ、そのコメントを1クエリで取得し、
+    シリアライズ時の遅延読み込み（N+1）を防ぐ。
+    """
+    reviews = selectinload(Resume.reviews)
+    options = [reviews.joinedload(ResumeReview.coach)]
+    if include_comments:
+        options.append(reviews.selectinload(ResumeReview.comments))
+    return query.options(*options)
+
+
+def serialize_resumes(db: Session, resumes: List[Resume], view: Optional[str]):
+    """
+    差分で保存されている版の本文を復元し、view=summary の場合は添削コメントを含まない形式に変換
+    """
+    resolve_contents(db, resumes)
+    if view == "summary":
+        return [ResumeSummaryResponse.model_validate(resume) for resume in resumes]
+    return resumes
+
+
+def resume_list_etag(request: Request, user: UserAuth, query, *criteria) -> str:
+    """
+    職務経歴書一覧のETag（添削・添削コメント・コーチ情報の版を含める）
+
+    criteria は一覧と同じ職務経歴書の絞り込み条件。
+    """
+    reviews = join(ResumeReview, Resume, ResumeReview.resume_id == Resume.resume_id)
+    comments = join(ReviewComment, ResumeReview, ReviewComment.review_id == ResumeReview.review_id).join(
+        Resume, ResumeReview.resume_id == Resume.resume_id
+    )
+    # 添削したコーチのみ（他のコーチのプロフィール変更では一致しなくならない）
+    coaches = join(Coach, ResumeReview, Coach.coach_id == ResumeReview.coach_id).join(
+        Resume, ResumeReview.resume_id == Resume.resume_id
+    )
+    return collection_etag(
+        request, user, query, Resume.updated_at,
+        *related_version(reviews, ResumeReview.updated_at, *criteria),
+        *related_version(comments, ReviewComment.updated_at, *criteria),
+        *related_version(coaches, Coach.updated_at, *criteria)
+    )
+
+
 # 職務経歴書CRUD
-@router.get("/me", response_model=List[ResumeResponse])
-async def get_my_resumes(
+@router.get("/me", response_model=List[ResumeResponse], response_model_exclude_unset=True)
+def get_my_resumes(
+    request: Request,
+    response: Response,
+    view: Optional[str] = Query(None, pattern="^summary$", description="summary: 添削コメントを含めない"),
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
-    """自分の職務経歴書一覧取得（利用者のみ）"""
+    """自分の職務経歴書一覧取得（利用者のみ、If-None-Match が ETag と一致する場合は304）"""
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Only clients can access this endpoint")
 
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    resumes = db.query(Resume).filter(Resume.client_id == client.client_id).order_by(Resume.version_number.desc()).all()
-    return resumes
+    query = db.query(Resume).filter(Resume.client_id == client.client_id).order_by(Resume.version_number.desc())
+    cached = not_modified(request, response, resume_list_etag(request, current_user, query, Resume.client_id == client.client_id))
+    if cached:
+        return cached
+    resumes = with_reviews(query, include_comments=view != "summary").all()
+    return serialize_resumes(db, resumes, view)
 
 
-@router.get("/client/{client_id}", response_model=List[ResumeResponse])
-async def get_client_resumes(
+@router.get("/client/{client_id}", response_model=List[ResumeResponse], response_model_exclude_unset=True)
+def get_client_resumes(
     client_id: UUID,
+    request: Request,
+    response: Response,
+    view: Optional[str] = Query(None, pattern="^summary$", description="summary: 添削コメントを含めない"),
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
-    """顧客の職務経歴書一覧取得（コーチ用）"""
+    """顧客の職務経歴書一覧取得（コーチ用、If-None-Match が ETag と一致する場合は304）"""
     # コーチのみアクセス可能
     if current_user.user_type != "coach":
         raise HTTPException(status_code=403, detail="Only coaches can access this endpoint")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -62,59 +122,94 @@ async def get_client_resumes(
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    resumes = db.query(Resume).filter(Resume.client_id == client_id).order_by(Resume.version_number.desc()).all()
-    return resumes
+    query = db.query(Resume).filter(Resume.client_id == client_id).order_by(Resume.version_number.desc())
+    cached = not_modified(request, response, resume_list_etag(request, current_user, query, Resume.client_id == client_id))
+    if cached:
+        return cached
+    resumes = with_reviews(query, include_comments=view != "summary").all()
+    return serialize_resumes(db, resumes, view)
 
 
 @router.get("/{resume_id}", response_model=ResumeResponse)
-async def get_resume(
+def get_resume(
     resume_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_user)
+    current_user: UserAuth = Depends(get_current_principal)
 ):
     """職務経歴書詳細取得"""
-    from sqlalchemy.orm import joinedload
-
-    resume = db.query(Resume).options(
-        joinedload(Resume.reviews).joinedload(ResumeReview.coach)
-    ).filter(Resume.resume_id == resume_id).first()
+    resume = with_reviews(db.query(Resume)).filter(Resume.resume_id == resume_id).first()
 
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
     if current_user.user_type == "client":
-        client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+        client = current_user.client
         if not client or resume.client_id != client.client_id:
             raise HTTPException(status_code=403, detail="Access forbidden")
 
+    resolve_contents(db, [resume])
     return resume
 
 
+@router.get("/{resume_id}/diff/{other_resume_id}", response_model=ResumeDiffResponse)
+def get_resume_diff(
+    resume_id: UUID,
+    other_resume_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_principal)
+):
+    """同じ利用者の2つの版の差分取得（resume_id の版から other_resume_id の版への変更）"""
+    resumes = db.query(Resume).filter(Resume.resume_id.in_([resume_id, other_resume_id])).all()
+    by_id = {resume.resume_id: resume for resume in resumes}
+    if resume_id not in by_id or other_resume_id not in by_id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    old, new = by_id[resume_id], by_id[other_resume_id]
+    if old.client_id != new.client_id:
+        raise HTTPException(status_code=400, detail="Resumes belong to different clients")
+
+    # 権限チェック
+    if current_user.user_type == "client":
+        client = current_user.client
+        if not client or old.client_id != client.client_id:
+            raise HTTPException(status_code=403, detail="Access forbidden")
+
+    resolve_contents(db, resumes)
+    diff = unified_diff(old.content, new.content, f"v{old.version_number}", f"v{new.version_number}")
+    lines = diff.splitlines()[2:]
+    return ResumeDiffResponse(
+        from_resume_id=old.resume_id,
+        from_version=old.version_number,
+        to_resume_id=new.resume_id,
+        to_version=new.version_number,
+        diff=diff,
+        added_lines=sum(1 for line in lines if line.startswith("+")),
+        removed_lines=sum(1 for line in lines if line.startswith("-")),
+    )
+
+
 @router.post("", response_model=ResumeResponse, status_code=status.HTTP_201_CREATED)
-async def create_resume(
+def create_resume(
     resume_data: ResumeCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴書作成（利用者のみ）"""
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    # バージョン番号の決定
-    last_resume = db.query(Resume).filter(
-        Resume.client_id == client.client_id
-    ).order_by(Resume.version_number.desc()).first()
-
-    version_number = 1 if not last_resume else last_resume.version_number + 1
+    # バージョン番号の採番（同じ利用者の同時作成はコミットまで待たせる）
+    version_number = allocate_version_number(db, client.client_id)
+    last_resume = latest_version(db, client.client_id)
 
-    # 職務経歴書作成
+    # 職務経歴書作成（それまでの最新版は差分での保存に切り替える）
     resume = Resume(
         client_id=client.client_id,
         version_number=version_number,
         **resume_data.dict(exclude={'client_id'})
     )
+    append_version(db, last_resume, resume)
     db.add(resume)
     db.commit()
     db.refresh(resume)
@@ -122,11 +217,11 @@ async def create_resume(
 
 
 @router.put("/{resume_id}", response_model=ResumeResponse)
-async def update_resume(
+def update_resume(
     resume_id: UUID,
     resume_data: ResumeUpdate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴書更新（利用者のみ）"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
@@ -134,25 +229,28 @@ async def update_resume(
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
-    # 更新
+    # 更新（本文は前後の版の差分とあわせて保存し直す）
     update_data = resume_data.dict(exclude_unset=True)
+    if 'content' in update_data:
+        set_content(db, resume, update_data.pop('content'))
     for field, value in update_data.items():
         setattr(resume, field, value)
 
     db.commit()
     db.refresh(resume)
+    resolve_contents(db, [resume])
     return resume
 
 
 @router.post("/{resume_id}/submit", response_model=ResumeResponse)
-async def submit_resume(
+def submit_resume(
     resume_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴書提出（利用者のみ）"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
@@ -160,7 +258,7 @@ async def submit_resume(
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -170,14 +268,15 @@ async def submit_resume(
 
     db.commit()
     db.refresh(resume)
+    resolve_contents(db, [resume])
     return resume
 
 
 @router.delete("/{resume_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_resume(
+def delete_resume(
     resume_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴書削除（利用者のみ）"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
@@ -185,10 +284,11 @@ async def delete_resume(
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
+    remove_version(db, resume)
     db.delete(resume)
     db.commit()
     return None
@@ -196,7 +296,7 @@ async def delete_resume(
 
 # 職務経歴セクションCRUD
 @router.get("/{resume_id}/work-experiences", response_model=List[WorkExperienceResponse])
-async def get_work_experiences(
+def get_work_experiences(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -209,11 +309,11 @@ async def get_work_experiences(
 
 
 @router.post("/{resume_id}/work-experiences", response_model=WorkExperienceResponse, status_code=status.HTTP_201_CREATED)
-async def create_work_experience(
+def create_work_experience(
     resume_id: UUID,
     experience_data: WorkExperienceCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴追加"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
@@ -221,7 +321,7 @@ async def create_work_experience(
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -233,11 +333,11 @@ async def create_work_experience(
 
 
 @router.put("/work-experiences/{experience_id}", response_model=WorkExperienceResponse)
-async def update_work_experience(
+def update_work_experience(
     experience_id: UUID,
     experience_data: WorkExperienceUpdate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴更新"""
     experience = db.query(WorkExperience).filter(WorkExperience.experience_id == experience_id).first()
@@ -246,7 +346,7 @@ async def update_work_experience(
 
     # 権限チェック
     resume = db.query(Resume).filter(Resume.resume_id == experience.resume_id).first()
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -261,10 +361,10 @@ async def update_work_experience(
 
 
 @router.delete("/work-experiences/{experience_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_work_experience(
+def delete_work_experience(
     experience_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """職務経歴削除"""
     experience = db.query(WorkExperience).filter(WorkExperience.experience_id == experience_id).first()
@@ -273,7 +373,7 @@ async def delete_work_experience(
 
     # 権限チェック
     resume = db.query(Resume).filter(Resume.resume_id == experience.resume_id).first()
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -284,7 +384,7 @@ async def delete_work_experience(
 
 # 学歴セクションCRUD (同様のパターン)
 @router.get("/{resume_id}/education", response_model=List[EducationHistoryResponse])
-async def get_education_history(
+def get_education_history(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -297,18 +397,18 @@ async def get_education_history(
 
 
 @router.post("/{resume_id}/education", response_model=EducationHistoryResponse, status_code=status.HTTP_201_CREATED)
-async def create_education(
+def create_education(
     resume_id: UUID,
     education_data: EducationHistoryCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """学歴追加"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -321,7 +421,7 @@ async def create_education(
 
 # 資格セクションCRUD
 @router.get("/{resume_id}/certifications", response_model=List[CertificationResponse])
-async def get_certifications(
+def get_certifications(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -334,18 +434,18 @@ async def get_certifications(
 
 
 @router.post("/{resume_id}/certifications", response_model=CertificationResponse, status_code=status.HTTP_201_CREATED)
-async def create_certification(
+def create_certification(
     resume_id: UUID,
     cert_data: CertificationCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """資格追加"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -358,7 +458,7 @@ async def create_certification(
 
 # スキルセクションCRUD
 @router.get("/{resume_id}/skills", response_model=List[SkillResponse])
-async def get_skills(
+def get_skills(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
@@ -369,18 +469,18 @@ async def get_skills(
 
 
 @router.post("/{resume_id}/skills", response_model=SkillResponse, status_code=status.HTTP_201_CREATED)
-async def create_skill(
+def create_skill(
     resume_id: UUID,
     skill_data: SkillCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """スキル追加"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -392,33 +492,37 @@ async def create_skill(
 
 
 # 添削機能（コーチ側）
-@router.get("/coach/pending", response_model=List[ResumeResponse])
-async def get_pending_resumes(
+@router.get("/coach/pending", response_model=List[ResumeResponse], response_model_exclude_unset=True)
+def get_pending_resumes(
+    request: Request,
+    response: Response,
+    view: Optional[str] = Query(None, pattern="^summary$", description="summary: 添削コメントを含めない"),
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_coach)
 ):
-    """全ての職務経歴書一覧取得（コーチのみ）- ステータス問わず全て表示"""
+    """全ての職務経歴書一覧取得（コーチのみ）- ステータス問わず全て表示（If-None-Match が ETag と一致する場合は304）"""
     # 全ての職務経歴書を取得（draft, submitted, reviewed全て）
-    resumes = db.query(Resume).options(
-        joinedload(Resume.client)
-    ).order_by(Resume.created_at.desc()).all()
-    print(f"[DEBUG] Coach requesting resumes - found {len(resumes)} total resumes")
-    return resumes
+    query = db.query(Resume).order_by(Resume.created_at.desc())
+    cached = not_modified(request, response, resume_list_etag(request, current_user, query))
+    if cached:
+        return cached
+    resumes = with_reviews(query, include_comments=view != "summary").all()
+    return serialize_resumes(db, resumes, view)
 
 
 @router.post("/{resume_id}/reviews", response_model=ResumeReviewResponse, status_code=status.HTTP_201_CREATED)
-async def create_review(
+def create_review(
     resume_id: UUID,
     review_data: ResumeReviewCreate,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_coach)
+    current_user: UserAuth = Depends(get_current_coach_principal)
 ):
     """添削開始（コーチのみ）"""
     resume = db.query(Resume).filter(Resume.resume_id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    coach = db.query(Coach).filter(Coach.user_id == current_user.user_id).first()
+    coach = current_user.coach
     if not coach:
         raise HTTPException(status_code=404, detail="Coach not found")
 
@@ -439,7 +543,7 @@ async def create_review(
 
 
 @router.post("/reviews/{review_id}/comments", response_model=ReviewCommentResponse, status_code=status.HTTP_201_CREATED)
-async def create_review_comment(
+def create_review_comment(
     review_id: UUID,
     comment_data: ReviewCommentCreate,
     db: Session = Depends(get_db),
@@ -458,7 +562,7 @@ async def create_review_comment(
 
 
 @router.post("/reviews/{review_id}/complete", response_model=ResumeReviewResponse)
-async def complete_review(
+def complete_review(
     review_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_coach)
@@ -483,30 +587,27 @@ async def complete_review(
 
 
 @router.get("/{resume_id}/reviews", response_model=List[ResumeReviewResponse])
-async def get_resume_reviews(
+def get_resume_reviews(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_user)
 ):
     """添削履歴取得（複数コーチ対応）"""
     reviews = db.query(ResumeReview).options(
-        joinedload(ResumeReview.coach)
+        joinedload(ResumeReview.coach),
+        selectinload(ResumeReview.comments)
     ).filter(
         ResumeReview.resume_id == resume_id
     ).order_by(ResumeReview.created_at.desc()).all()
-    print(f"[DEBUG] Retrieved {len(reviews)} reviews for resume {resume_id}")
-    for review in reviews:
-        coach_name = review.coach.name if review.coach else "Unknown"
-        print(f"  - Review {review.review_id}: by coach {coach_name} (status: {review.review_status})")
     return reviews
 
 
 @router.post("/{resume_id}/apply-review/{review_id}", response_model=ResumeResponse, status_code=status.HTTP_201_CREATED)
-async def apply_review_to_resume(
+def apply_review_to_resume(
     resume_id: UUID,
     review_id: UUID,
     db: Session = Depends(get_db),
-    current_user: UserAuth = Depends(get_current_client)
+    current_user: UserAuth = Depends(get_current_client_principal)
 ):
     """添削を反映して新しいバージョンの職務経歴書を作成（利用者のみ）"""
     # 元の職務経歴書を取得
@@ -515,7 +616,7 @@ async def apply_review_to_resume(
         raise HTTPException(status_code=404, detail="Resume not found")
 
     # 権限チェック
-    client = db.query(Client).filter(Client.user_id == current_user.user_id).first()
+    client = current_user.client
     if not client or original_resume.client_id != client.client_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
@@ -524,12 +625,11 @@ async def apply_review_to_resume(
     if not review or review.resume_id != resume_id:
         raise HTTPException(status_code=404, detail="Review not found or does not belong to this resume")
 
-    # 新しいバージョン番号を決定
-    last_resume = db.query(Resume).filter(
-        Resume.client_id == client.client_id
-    ).order_by(Resume.version_number.desc()).first()
-
-    version_number = 1 if not last_resume else last_resume.version_number + 1
+    # 新しいバージョン番号の採番（採番後に元の版を読み直し、同時に行われた変更を反映する）
+    version_number = allocate_version_number(db, client.client_id)
+    last_resume = latest_version(db, client.client_id)
+    db.refresh(original_resume)
+    resolve_contents(db, [original_resume])
 
     # 添削のoverall_commentを新しいcontentとして使用
     new_content = review.overall_comment or original_resume.content
@@ -542,6 +642,7 @@ async def apply_review_to_resume(
         template_type=original_resume.template_type,
         status='draft'
     )
+    append_version(db, last_resume, new_resume)
     db.add(new_resume)
     db.commit()
     db.refresh(new_resume)
@@ -549,7 +650,7 @@ async def apply_review_to_resume(
 
 
 @router.delete("/{resume_id}/coach", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_resume_by_coach(
+def delete_resume_by_coach(
     resume_id: UUID,
     db: Session = Depends(get_db),
     current_user: UserAuth = Depends(get_current_coach)
@@ -559,6 +660,7 @@ async def delete_resume_by_coach(
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
+    remove_version(db, resume)
     db.delete(resume)
     db.commit()
     return None
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.user import UserAuth
+from app.schemas.search import SearchResult
+from app.utils.auth import get_current_principal
+from app.utils.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_cursor_value, set_next_cursor
+from app.utils.search import ENTITY_TYPES, search_documents
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=List[SearchResult])
+def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="検索語（空白区切りの語をすべて含むものを検索）"),
+    types: Optional[List[str]] = Query(None, description="client / application / resume（複数指定可、省略時はすべて）"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="前ページのレスポンスヘッダー X-Next-Cursor の値"),
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_principal)
+):
+    """
+    顧客・応募・職務経歴書の横断検索
+
+    氏名・フリガナ・メールアドレス、応募先企業名・メモ、職務経歴書の本文を対象に、一致度の高い順に返す。
+    コーチは全利用者、利用者は自分のデータのみが対象。続きがある場合は X-Next-Cursor ヘッダーに次ページのカーソルを返す。
+    """
+    entity_types = types or list(ENTITY_TYPES)
+    invalid = set(entity_types) - set(ENTITY_TYPES)
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid search types: {', '.join(sorted(invalid))}")
+
+    if current_user.user_type == "coach":
+        if not current_user.coach:
+            raise HTTPException(status_code=404, detail="Coach not found")
+        client_id = None
+    else:
+        if not current_user.client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        client_id = current_user.client.client_id
+
+    offset = 0
+    if cursor:
+        offset = parse_cursor_value(decode_cursor(cursor, 1)[0], int)
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    results, has_more = search_documents(db, q, entity_types, client_id, limit, offset)
+    if has_more:
+        set_next_cursor(response, encode_cursor(offset + limit))
+    return results
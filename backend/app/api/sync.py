@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.config import settings
+from app.database import get_db
+from app.models.user import UserAuth
+from app.schemas.sync import SyncResponse
+from app.utils.auth import get_current_principal
+from app.utils.pagination import MAX_PAGE_SIZE
+from app.utils.resume_versions import resolve_contents
+from app.utils.sync import ENTITY_RESUMES, decode_sync_cursor, encode_sync_cursor, sync_changes
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncResponse)
+def sync(
+    since: Optional[str] = Query(None, description="前回のレスポンスの cursor（省略時は全件）"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="対象ごとの最大件数"),
+    db: Session = Depends(get_db),
+    current_user: UserAuth = Depends(get_current_principal)
+):
+    """
+    差分同期（顧客・応募・面談・職務経歴書・空き枠）
+
+    since 以降に登録・更新された行と、削除された行（deleted）を返す。直近の変更は次回も再送されるため、
+    クライアント側は主キーで上書きする。has_more が true の間は cursor で続けて取得する。
+    利用者は自分のデータと全コーチの空き枠、コーチは担当の面談と全利用者のデータが対象。
+    """
+    if current_user.user_type == "client" and not current_user.client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    if current_user.user_type == "coach" and not current_user.coach:
+        raise HTTPException(status_code=404, detail="Coach not found")
+
+    positions = decode_sync_cursor(since) if since else None
+    results, next_positions, has_more, reset = sync_changes(
+        db,
+        current_user,
+        positions,
+        limit,
+        overlap_seconds=settings.SYNC_OVERLAP_SECONDS,
+        retention_days=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+    )
+    resolve_contents(db, results[ENTITY_RESUMES])
+    return SyncResponse(
+        cursor=encode_sync_cursor(next_positions),
+        has_more=has_more,
+        reset=reset,
+        **{name: rows for name, rows in results.items()},
+    )
@@ -8,15 +8,47 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     DATABASE_URL: str
 
+    # Database Pool Configuration（PostgreSQLのみ）
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # 接続取得の待ち時間上限（秒）
+    DB_POOL_RECYCLE: int = 3600  # 接続をリサイクルする間隔（秒）
+    DB_POOL_PRE_PING: bool = True
+
     # JWT Configuration
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # 認証済みユーザーキャッシュ（0で無効化）
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # パスワードハッシュ設定
+    BCRYPT_ROUNDS: int = 12  # bcryptのコストファクター（4〜31）
+    PASSWORD_HASH_MAX_WORKERS: int = 2  # ハッシュ計算用スレッド数の上限
+
     # Application Configuration
     DEBUG: bool = True
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
     COACH_INVITATION_CODE: str = "COACH2025SECURE"
+    # 同期ハンドラー（DBアクセス）を実行するスレッドプールの上限
+    THREADPOOL_MAX_WORKERS: int = 40
+    # コーチダッシュボード統計のキャッシュ有効期間（秒、0で無効化）
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    # 定期メンテナンス（run_maintenance.py）
+    SLOT_RETENTION_DAYS: int = 1  # 終了から指定日数を過ぎた未予約の空き枠を削除
+    APPOINTMENT_ARCHIVE_DAYS: int = 365  # 指定日数より前の面談をアーカイブへ移動
+    MAINTENANCE_BATCH_SIZE: int = 1000  # 1トランザクションで削除・移動する最大行数
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30  # 差分同期用の削除の記録を保持する日数
+    # 差分同期（GET /api/sync）で、コミットが遅れた変更を取りこぼさないよう直近この秒数分を毎回再送する
+    SYNC_OVERLAP_SECONDS: int = 60
+    # レスポンス圧縮（Accept-Encoding に応じて brotli（brotli パッケージがある場合）または gzip）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # これより小さい本文は圧縮しない（バイト）
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1〜9
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0〜11（大きいほど高圧縮・高負荷）
+    COMPRESSION_USE_BROTLI: bool = True
 
     # File Upload Configuration
     MAX_FILE_SIZE: int = 10485760  # 10MB
@@ -28,6 +60,14 @@ class Settings(BaseSettings):
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = ""
+    SMTP_USE_TLS: bool = True  # 接続後にSTARTTLSを実行
+    SMTP_TIMEOUT: int = 30  # SMTP通信のタイムアウト（秒）
+    # smtp: SMTPで送信 / console: ログ出力のみ / auto: SMTP_HOST(localhost以外)と認証情報があればsmtp
+    EMAIL_BACKEND: str = "auto"
+    EMAIL_BATCH_SIZE: int = 50  # 1回の送信処理でまとめて送る最大件数
+    EMAIL_MAX_ATTEMPTS: int = 4  # 一時的なエラー時の最大試行回数
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 2.0  # 再試行までの待ち時間（試行ごとに倍増）
+    EMAIL_SMTP_IDLE_TIMEOUT: int = 60  # 再利用中のSMTP接続をアイドル時に閉じるまでの秒数
 
     class Config:
         env_file = ".env"
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.pool_metrics import InstrumentedQueuePool, pool_metrics
 import urllib.parse
 import os
 
@@ -19,13 +20,16 @@ if "sqlite" in database_url:
     )
 else:
     # PostgreSQL接続時にクライアントエンコーディングをUTF-8に設定
-    # pool_recycle: 接続を1時間ごとにリサイクル（エンコーディング問題の回避）
+    # pool_recycle: 接続を定期的にリサイクル（エンコーディング問題の回避）
+    # プールの待ち時間・タイムアウトは InstrumentedQueuePool で計測する
     engine = create_engine(
         database_url,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_recycle=3600,  # 1時間ごとに接続をリサイクル
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         connect_args={
             "client_encoding": "utf8",
             "options": "-c client_encoding=utf8",
@@ -35,6 +39,9 @@ else:
         pool_reset_on_return='rollback'  # 接続返却時にロールバック
     )
 
+# 接続プールの統計を収集（/api/admin/db-pool で参照）
+pool_metrics.attach(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,12 +1,21 @@
+import anyio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
-from app.api import auth, clients, applications, appointments, resumes, coaches, admin
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.availability import SKIPPED_SLOTS_HEADER
+from app.utils.compression import CompressionMiddleware
+from app.utils.email_queue import email_dispatcher
+from app.api import auth, clients, applications, appointments, resumes, coaches, admin, dashboard, search, sync
 
 app = FastAPI(
     title="転職支援顧客管理システム API",
     description="転職支援会社向けの顧客管理WEBアプリケーション",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson でJSONを生成（標準の json より高速で、UUID・日時もそのまま出力できる）
+    default_response_class=ORJSONResponse
 )
 
 # CORS設定
@@ -16,8 +25,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SKIPPED_SLOTS_HEADER],  # ページネーションの次カーソル、一括登録の除外枠数
 )
 
+# レスポンス圧縮（一覧等の大きなJSONを brotli / gzip で圧縮）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        use_brotli=settings.COMPRESSION_USE_BROTLI,
+    )
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """DBアクセスを行う同期ハンドラー用スレッドプールのサイズを設定"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_MAX_WORKERS
+
+
+@app.on_event("startup")
+async def start_email_dispatcher():
+    """メールのバックグラウンド送信ワーカーを起動"""
+    email_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_email_dispatcher():
+    """送信待ちのメールを送り切ってからワーカーを停止"""
+    # 送信とスレッドの終了を待つ間（最大20秒程度）イベントループを止めないよう、スレッドプールで実行する
+    # （同期関数のハンドラーはイベントループ上で直接呼ばれるため、def にするだけでは防げない）
+    await run_in_threadpool(email_dispatcher.stop)
+
+
 # ルーターの登録
 app.include_router(auth.router)
 app.include_router(admin.router)  # 統括管理者用API
@@ -26,6 +68,9 @@ app.include_router(clients.router)
 app.include_router(applications.router)
 app.include_router(appointments.router)
 app.include_router(resumes.router)
+app.include_router(dashboard.router)
+app.include_router(search.router)
+app.include_router(sync.router)
 
 
 @app.get("/")
@@ -1,9 +1,13 @@
 from app.models.user import UserAuth, Coach, Client
-from app.models.application import Application, ApplicationHistory, CompanyAnalysis
-from app.models.appointment import Appointment, CoachAvailability
+from app.models.application import Application, ApplicationChange, ApplicationHistory, CompanyAnalysis
+from app.models.appointment import Appointment, AppointmentArchive, CoachAvailability, CoachAvailabilityRule
 from app.models.file import File
+from app.models.notification import EmailDeliveryFailure
+from app.models.search import SearchDocument
+from app.models.sync import SyncTombstone
 from app.models.resume import (
     Resume,
+    ResumeVersionCounter,
     WorkExperience,
     EducationHistory,
     Certification,
@@ -19,11 +23,18 @@ __all__ = [
     "Client",
     "Application",
     "ApplicationHistory",
+    "ApplicationChange",
     "CompanyAnalysis",
     "Appointment",
+    "AppointmentArchive",
     "CoachAvailability",
+    "CoachAvailabilityRule",
     "File",
+    "EmailDeliveryFailure",
+    "SearchDocument",
+    "SyncTombstone",
     "Resume",
+    "ResumeVersionCounter",
     "WorkExperience",
     "EducationHistory",
     "Certification",
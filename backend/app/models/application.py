@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Date, Numeric
-from sqlalchemy import Uuid as UUID, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, BigInteger, Date, Numeric, Index
+from sqlalchemy import Uuid as UUID, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -8,6 +8,14 @@ from app.database import Base
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # 一覧のキーセットページネーション用（next_interview_date NULLS LAST, application_id）
+        Index('idx_applications_next_interview_date_id', 'next_interview_date', 'application_id'),
+        # ステータスで絞り込んだ一覧を同じ順序で走査するため
+        Index('idx_applications_status_next_interview_date_id', 'status', 'next_interview_date', 'application_id'),
+        # 差分同期（updated_at, 主キーのキーセット）用
+        Index('idx_applications_updated_at_id', 'updated_at', 'application_id'),
+    )
 
     application_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.client_id", ondelete="CASCADE"), nullable=False, index=True)
@@ -31,6 +39,10 @@ class Application(Base):
 
 class ApplicationHistory(Base):
     __tablename__ = "application_history"
+    __table_args__ = (
+        # 応募ごとの変更履歴（新しい順）用
+        Index('idx_application_history_application_changed', 'application_id', text('changed_date DESC')),
+    )
 
     history_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     application_id = Column(UUID(as_uuid=True), ForeignKey("applications.application_id", ondelete="CASCADE"), nullable=False, index=True)
@@ -44,6 +56,31 @@ class ApplicationHistory(Base):
     application = relationship("Application", back_populates="history")
 
 
+class ApplicationChange(Base):
+    """
+    応募の変更ログ（追記のみ。1回の登録・更新・削除ごとに1行）
+
+    changes は変更された項目の {"項目名": [変更前, 変更後]}（値は型を保ったJSON、日付はISO形式の文字列）。
+    seq はコミット順に増える連番で、GET /api/applications/changes?since= の差分取得に使う。
+    応募の削除後も記録を残すため外部キーは持たない。
+    """
+    __tablename__ = "application_changes"
+    __table_args__ = (
+        # 利用者ごとの差分取得用
+        Index('idx_application_changes_client_seq', 'client_id', 'seq'),
+        Index('idx_application_changes_application_seq', 'application_id', 'seq'),
+    )
+
+    # SQLiteでは INTEGER PRIMARY KEY のみ自動採番されるため型を切り替える
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    application_id = Column(UUID(as_uuid=True), nullable=False)
+    client_id = Column(UUID(as_uuid=True), nullable=False)
+    operation = Column(String(10), nullable=False)  # 'create' / 'update' / 'delete'
+    changes = Column(JSON, nullable=False)
+    changed_by = Column(UUID(as_uuid=True))
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
 class CompanyAnalysis(Base):
     __tablename__ = "company_analysis"
 
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Table, Integer
-from sqlalchemy import Uuid as UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Table, Integer, Date, Time, Index
+from sqlalchemy import Uuid as UUID, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -13,11 +13,19 @@ appointment_coaches = Table(
     Column('appointment_id', UUID(as_uuid=True), ForeignKey('appointments.appointment_id', ondelete='CASCADE'), primary_key=True),
     Column('coach_id', UUID(as_uuid=True), ForeignKey('coaches.coach_id', ondelete='CASCADE'), primary_key=True),
     Column('created_at', DateTime(timezone=True), server_default=func.now()),
+    # コーチ担当の面談一覧用（主キーは appointment_id が先頭のため coach_id からは引けない）
+    Index('idx_appointment_coaches_coach_id', 'coach_id', 'appointment_id'),
 )
 
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # 利用者の面談一覧（日時順）用
+        Index('idx_appointments_client_date', 'client_id', 'appointment_date'),
+        # 差分同期（updated_at, 主キーのキーセット）用
+        Index('idx_appointments_updated_at_id', 'updated_at', 'appointment_id'),
+    )
 
     appointment_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.client_id", ondelete="CASCADE"), nullable=False, index=True)
@@ -37,8 +45,43 @@ class Appointment(Base):
     coaches = relationship("Coach", secondary=appointment_coaches, backref="appointments_multi")  # 全担当コーチ（多対多）
 
 
+class AppointmentArchive(Base):
+    """
+    過去の面談のアーカイブ（run_maintenance.py で appointments から移動）
+
+    PostgreSQLでは面談日時の年ごとにパーティション分割する（migration_add_appointment_archive.sql）。
+    利用者・コーチの削除後も記録を残すため外部キーは持たない。
+    """
+    __tablename__ = "appointments_archive"
+
+    appointment_id = Column(UUID(as_uuid=True), primary_key=True)
+    client_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    coach_id = Column(UUID(as_uuid=True), nullable=False)  # 主担当コーチ
+    coach_ids = Column(JSON)  # 全担当コーチ（appointment_coaches の内容）
+    appointment_date = Column(DateTime(timezone=True), nullable=False, index=True)
+    duration_minutes = Column(Integer)
+    appointment_type = Column(String(20))
+    status = Column(String(20), nullable=False)
+    mtg_url = Column(Text)
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class CoachAvailability(Base):
     __tablename__ = "coach_availability"
+    __table_args__ = (
+        # 未予約の空き枠一覧（全コーチ・コーチ別）用の部分インデックス
+        Index('idx_coach_availability_open_start', 'available_start',
+              postgresql_where=text('is_booked = false'), sqlite_where=text('is_booked = 0')),
+        Index('idx_coach_availability_open_coach_start', 'coach_id', 'available_start',
+              postgresql_where=text('is_booked = false'), sqlite_where=text('is_booked = 0')),
+        # 重複検出・予約状態の更新（予約済みを含むコーチ別の範囲検索）用
+        Index('idx_coach_availability_coach_start_end', 'coach_id', 'available_start', 'available_end'),
+        # 差分同期（updated_at, 主キーのキーセット）用
+        Index('idx_coach_availability_updated_at_id', 'updated_at', 'availability_id'),
+    )
 
     availability_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     coach_id = Column(UUID(as_uuid=True), ForeignKey("coaches.coach_id", ondelete="CASCADE"), nullable=False, index=True)
@@ -46,6 +89,31 @@ class CoachAvailability(Base):
     available_end = Column(DateTime(timezone=True), nullable=False, index=True)
     is_booked = Column(Boolean, default=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     coach = relationship("Coach", back_populates="availability")
+
+
+class CoachAvailabilityRule(Base):
+    """
+    毎週の繰り返し空き枠ルール
+
+    読み取り時に要求された期間分だけ30分枠へ展開し、予約された枠だけを coach_availability に登録する。
+    """
+    __tablename__ = "coach_availability_rules"
+
+    rule_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    coach_id = Column(UUID(as_uuid=True), ForeignKey("coaches.coach_id", ondelete="CASCADE"), nullable=False, index=True)
+    weekdays = Column(JSON, nullable=False)  # 0=月曜 〜 6=日曜 のリスト
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    timezone = Column(String(50), nullable=False, default='Asia/Tokyo')  # start_time / end_time のタイムゾーン
+    valid_from = Column(Date, nullable=False)
+    valid_until = Column(Date)  # NULL = 無期限
+    excluded_dates = Column(JSON)  # 適用しない日付（ISO形式）のリスト
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    coach = relationship("Coach")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy import Uuid as UUID
+from sqlalchemy.sql import func
+import uuid
+from app.database import Base
+
+
+class EmailDeliveryFailure(Base):
+    """再試行しても送信できなかったメール（再送・調査用に保存）"""
+    __tablename__ = "email_delivery_failures"
+
+    failure_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_email = Column(String(255), nullable=False, index=True)
+    subject = Column(Text, nullable=False)
+    body = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=1)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
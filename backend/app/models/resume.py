@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Date, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Date, UniqueConstraint, Index
 from sqlalchemy import Uuid as UUID, JSON, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,6 +10,8 @@ class Resume(Base):
     __tablename__ = "resumes"
     __table_args__ = (
         UniqueConstraint('client_id', 'version_number', name='uq_client_version'),
+        # 差分同期（updated_at, 主キーのキーセット）用
+        Index('idx_resumes_updated_at_id', 'updated_at', 'resume_id'),
     )
 
     resume_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -17,8 +19,10 @@ class Resume(Base):
     version_number = Column(Integer, nullable=False, default=1)
     status = Column(String(20), nullable=False, default='draft', index=True)
 
-    # フリーテキスト形式の職務経歴書内容
+    # フリーテキスト形式の職務経歴書内容（差分で保存している版ではNULL）
     content = Column(Text)
+    # 1つ新しい版から本文を復元する差分（app.utils.resume_versions）。全文で保存している版ではNULL
+    content_delta = Column(Text)
 
     # メタ情報
     submitted_at = Column(DateTime(timezone=True), index=True)
@@ -29,6 +33,9 @@ class Resume(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # 差分から復元した本文（DBの列ではない。検索文書の作成に使用）
+    full_content = None
+
     # Relationships
     client = relationship("Client", back_populates="resumes")
     reviews = relationship("ResumeReview", back_populates="resume", cascade="all, delete-orphan")
@@ -38,6 +45,15 @@ class Resume(Base):
     skills = relationship("Skill", back_populates="resume", cascade="all, delete-orphan")
 
 
+class ResumeVersionCounter(Base):
+    """利用者ごとの職務経歴書の版番号の採番（app.utils.resume_versions.allocate_version_number）"""
+    __tablename__ = "resume_version_counters"
+
+    client_id = Column(UUID(as_uuid=True), ForeignKey("clients.client_id", ondelete="CASCADE"), primary_key=True)
+    # 最後に採番した版番号
+    last_version = Column(Integer, nullable=False, default=0)
+
+
 class WorkExperience(Base):
     __tablename__ = "work_experiences"
 
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, Text, UniqueConstraint
+from sqlalchemy import Uuid as UUID
+from sqlalchemy.sql import func
+import uuid
+from app.database import Base
+
+
+class SearchDocument(Base):
+    """
+    横断検索用の文書（顧客・応募・職務経歴書ごとに1行、app.utils.search が更新）
+
+    tokens は正規化した本文をバイグラム（英数字は単語）に分割した空白区切りの文字列。
+    PostgreSQLでは tokens から生成した tsvector 列と title_norm の pg_trgm インデックスで検索し、
+    SQLiteでは FTS5 の仮想テーブル search_fts で検索する。
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+    )
+
+    doc_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    entity_type = Column(String(20), nullable=False)  # 'client' / 'application' / 'resume'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    client_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # 権限チェック用
+    title = Column(Text, nullable=False)
+    title_norm = Column(Text, nullable=False)  # 正規化したタイトル（類似度検索用）
+    body = Column(Text)  # 抜粋の表示用
+    tokens = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy import Uuid as UUID
+from sqlalchemy.sql import func
+import uuid
+from app.database import Base
+
+
+class SyncTombstone(Base):
+    """
+    差分同期（GET /api/sync）用の削除の記録（app.utils.sync が削除時に追加）
+
+    SYNC_TOMBSTONE_RETENTION_DAYS を過ぎた記録は run_maintenance.py で削除する。
+    それより古いカーソルで同期した場合は全件の取り直し（reset）を返す。
+    """
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        # 差分取得（deleted_at, tombstone_id のキーセット）用
+        Index('idx_sync_tombstones_deleted_at_id', 'deleted_at', 'tombstone_id'),
+    )
+
+    tombstone_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    entity_type = Column(String(30), nullable=False)  # 'clients' / 'applications' / 'appointments' / 'resumes' / 'coach_availability'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    client_id = Column(UUID(as_uuid=True), index=True)  # 利用者に属するデータの場合のみ（権限チェック用）
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
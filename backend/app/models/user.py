@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Date, Table
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Date, Table, Index
 from sqlalchemy import Uuid as UUID
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 from app.database import Base
 
@@ -61,6 +61,21 @@ class Coach(Base):
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # 一覧のキーセットページネーション用
+        Index('idx_clients_created_at_client_id', 'created_at', 'client_id'),
+        # 差分同期（updated_at, 主キーのキーセット）用
+        Index('idx_clients_updated_at_client_id', 'updated_at', 'client_id'),
+        # 氏名・フリガナ・メールアドレスの前方一致検索用（PostgreSQLではtext_pattern_opsでLIKE 'xxx%'に対応）
+        Index('idx_clients_name_prefix', 'name', postgresql_ops={'name': 'text_pattern_ops'}),
+        Index('idx_clients_last_name_prefix', 'last_name', postgresql_ops={'last_name': 'text_pattern_ops'}),
+        Index('idx_clients_first_name_prefix', 'first_name', postgresql_ops={'first_name': 'text_pattern_ops'}),
+        Index('idx_clients_furigana_prefix', 'furigana', postgresql_ops={'furigana': 'text_pattern_ops'}),
+        Index('idx_clients_last_name_kana_prefix', 'last_name_kana', postgresql_ops={'last_name_kana': 'text_pattern_ops'}),
+        Index('idx_clients_first_name_kana_prefix', 'first_name_kana', postgresql_ops={'first_name_kana': 'text_pattern_ops'}),
+        Index('idx_clients_email_lower_prefix', func.lower(text('email')).label('email_lower'),
+              postgresql_ops={'email_lower': 'text_pattern_ops'}),
+    )
 
     client_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users_auth.user_id", ondelete="CASCADE"), nullable=False)
@@ -75,7 +90,7 @@ class Client(Base):
     company_name = Column(String(200))
     occupation = Column(String(100))
     registration_date = Column(Date)
-    contract_end_date = Column(Date)
+    contract_end_date = Column(Date, index=True)
     status = Column(String(20), nullable=False, default='active', index=True)
     will_can_must = Column(Text)
     strengths_finder = Column(Text)
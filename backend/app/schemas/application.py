@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime, date
 
@@ -57,6 +57,24 @@ class ApplicationResponse(ApplicationBase):
         from_attributes = True
 
 
+class ApplicationBulkUpdate(BaseModel):
+    """複数の応募に同じ変更を適用"""
+    application_ids: List[UUID]
+    changes: ApplicationUpdate
+
+
+class ApplicationBulkUpdateResult(BaseModel):
+    application_id: UUID
+    result: str  # 'updated' / 'unchanged' / 'not_found' / 'forbidden'
+    changed_fields: List[str] = []
+    application: Optional[ApplicationResponse] = None
+
+
+class ApplicationBulkUpdateResponse(BaseModel):
+    updated_count: int
+    results: List[ApplicationBulkUpdateResult]
+
+
 class ApplicationHistoryResponse(BaseModel):
     history_id: UUID
     application_id: UUID
@@ -70,6 +88,25 @@ class ApplicationHistoryResponse(BaseModel):
         from_attributes = True
 
 
+class ApplicationChangeResponse(BaseModel):
+    seq: int
+    application_id: UUID
+    client_id: UUID
+    operation: str  # 'create' / 'update' / 'delete'
+    changes: Dict[str, List[Any]]  # {"項目名": [変更前, 変更後]}
+    changed_by: Optional[UUID]
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ApplicationChangesResponse(BaseModel):
+    changes: List[ApplicationChangeResponse]
+    next_since: int  # 次回の since に指定する値
+    has_more: bool
+
+
 class CompanyAnalysisBase(BaseModel):
     company_name: str
     industry: Optional[str] = None
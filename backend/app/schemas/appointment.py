@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, date, time
 
 
 class AppointmentBase(BaseModel):
@@ -76,7 +76,83 @@ class CoachAvailabilityResponse(CoachAvailabilityBase):
     availability_id: UUID
     coach_id: UUID
     created_at: datetime
+    updated_at: Optional[datetime] = None
     coach: Optional[CoachInfo] = None
+    rule_id: Optional[UUID] = None  # 繰り返しルールから展開した未登録の枠の場合のみ
 
     class Config:
         from_attributes = True
+
+
+class AvailabilityRuleBase(BaseModel):
+    """毎週の繰り返し空き枠ルール（読み取り時に展開される）"""
+    weekdays: List[int]  # 0=月曜 〜 6=日曜
+    start_time: time
+    end_time: time
+    timezone: str = 'Asia/Tokyo'  # start_time / end_time のタイムゾーン
+    valid_from: date
+    valid_until: Optional[date] = None  # Noneなら無期限
+    excluded_dates: List[date] = []  # 適用しない日付
+
+
+class AvailabilityRuleCreate(AvailabilityRuleBase):
+    pass
+
+
+class AvailabilityRuleUpdate(BaseModel):
+    weekdays: Optional[List[int]] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    timezone: Optional[str] = None
+    valid_from: Optional[date] = None
+    valid_until: Optional[date] = None
+    excluded_dates: Optional[List[date]] = None
+
+
+class AvailabilityRuleResponse(AvailabilityRuleBase):
+    rule_id: UUID
+    coach_id: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AvailabilityRange(BaseModel):
+    available_start: datetime
+    available_end: datetime
+
+
+class WeeklyAvailabilityRule(BaseModel):
+    """毎週の繰り返し空き枠"""
+    weekdays: List[int]  # 0=月曜 〜 6=日曜
+    start_time: time
+    end_time: time
+    timezone: str = 'Asia/Tokyo'  # start_time / end_time のタイムゾーン
+    start_date: date  # 適用開始日
+    end_date: date  # 適用終了日（この日を含む）
+
+
+class CoachAvailabilityBulkCreate(BaseModel):
+    """空き枠の一括登録（複数の期間・毎週の繰り返しを指定可能）"""
+    coach_id: UUID
+    ranges: List[AvailabilityRange] = []
+    weekly_rules: List[WeeklyAvailabilityRule] = []
+    skip_conflicts: bool = False  # Trueなら既存の枠と重なる枠を除いて登録（Falseなら409）
+
+
+class CoachFreeBusy(BaseModel):
+    coach_id: UUID
+    free: Optional[List[Tuple[datetime, datetime]]] = None  # encoding=ranges: 空き区間 [開始, 終了)
+    bitmap: Optional[str] = None  # encoding=bitmap: slot_minutes 刻みで空きなら'1'
+
+
+class FreeBusyResponse(BaseModel):
+    """コーチの空き時間（free/busy）"""
+    start: datetime
+    end: datetime
+    slot_minutes: int
+    coaches: List[CoachFreeBusy]
+    common_free: Optional[List[Tuple[datetime, datetime]]] = None  # 全コーチが空いている区間
+    first_common_starts: Optional[List[datetime]] = None  # 全コーチが duration 分空いている開始時刻
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Dict
+from datetime import datetime, date
+
+
+class CoachDashboardResponse(BaseModel):
+    """コーチダッシュボード統計"""
+    week_start: date
+    week_end: date
+    clients_by_status: Dict[str, int]
+    applications_by_status: Dict[str, int]
+    resumes_by_status: Dict[str, int]
+    appointments_this_week_by_status: Dict[str, int]  # 自分が担当する今週の面談
+    interviews_this_week: int  # 次回面接日が今週の応募
+    pending_review_count: int  # 提出済みで添削待ちの職務経歴書
+    generated_at: datetime
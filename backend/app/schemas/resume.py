@@ -167,6 +167,34 @@ class ResumeResponse(ResumeBase):
         from_attributes = True
 
 
+class ResumeSummaryResponse(ResumeBase):
+    """一覧表示用（添削コメントを含まない）"""
+    resume_id: UUID
+    client_id: UUID
+    version_number: int
+    status: str
+    submitted_at: Optional[datetime]
+    reviewed_at: Optional[datetime]
+    approved_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    reviews: List[ResumeReviewSummaryResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
+class ResumeDiffResponse(BaseModel):
+    """2つの版の差分"""
+    from_resume_id: UUID
+    from_version: int
+    to_resume_id: UUID
+    to_version: int
+    diff: str  # unified diff 形式
+    added_lines: int
+    removed_lines: int
+
+
 # Review Comment Schemas
 class ReviewCommentBase(BaseModel):
     section_type: str
@@ -244,6 +272,20 @@ class ResumeReviewResponse(ResumeReviewBase):
         from_attributes = True
 
 
+class ResumeReviewSummaryResponse(ResumeReviewBase):
+    """一覧表示用（添削コメントを含まない）"""
+    review_id: UUID
+    resume_id: UUID
+    coach_id: UUID
+    reviewed_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    coach: Optional[CoachInfo] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Review Template Schemas
 class ReviewTemplateBase(BaseModel):
     template_name: str
@@ -276,4 +318,5 @@ class ReviewTemplateResponse(ReviewTemplateBase):
 
 # Rebuild models to resolve forward references
 ResumeResponse.model_rebuild()
+ResumeSummaryResponse.model_rebuild()
 ResumeReviewResponse.model_rebuild()
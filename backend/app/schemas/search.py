@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+
+
+class SearchResult(BaseModel):
+    """横断検索の結果"""
+    entity_type: str  # 'client' / 'application' / 'resume'
+    entity_id: UUID
+    client_id: UUID
+    client_name: Optional[str] = None
+    title: str  # 顧客名・応募先企業名・職務経歴書の版
+    snippet: Optional[str] = None  # 本文中の一致箇所の抜粋
+    score: float
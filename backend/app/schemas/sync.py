@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import List
+from uuid import UUID
+from datetime import datetime
+from app.schemas.application import ApplicationResponse
+from app.schemas.appointment import AppointmentResponse, CoachAvailabilityResponse
+from app.schemas.resume import ResumeSummaryResponse
+from app.schemas.user import ClientResponse
+
+
+class SyncTombstoneResponse(BaseModel):
+    """削除された行"""
+    entity_type: str  # 'clients' / 'applications' / 'appointments' / 'resumes' / 'coach_availability'
+    entity_id: UUID
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncResponse(BaseModel):
+    """差分同期の結果（前回のカーソル以降に登録・更新・削除された行）"""
+    cursor: str  # 次回の since に指定する値
+    has_more: bool  # Trueなら続きがあるため、すぐに cursor で再取得する
+    reset: bool  # Trueならカーソルが古すぎたため全件を返している（ローカルのデータを置き換える）
+    clients: List[ClientResponse] = []
+    applications: List[ApplicationResponse] = []
+    appointments: List[AppointmentResponse] = []
+    resumes: List[ResumeSummaryResponse] = []
+    coach_availability: List[CoachAvailabilityResponse] = []
+    deleted: List[SyncTombstoneResponse] = []
@@ -0,0 +1,136 @@
+"""
+応募の変更ログ（application_changes）
+
+1回の登録・更新・削除を1行として、変更された項目を {"項目名": [変更前, 変更後]} のJSONで記録する。
+連番（seq）の順とコミットの順が一致するよう、PostgreSQLでは記録時にトランザクション単位の
+アドバイザリロックを取得する（seq の小さい変更が後からコミットされ、差分取得で読み飛ばされることを防ぐ）。
+SQLiteは書き込みがデータベース単位で直列化されるためロックは不要。
+"""
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from app.models.application import Application, ApplicationChange
+
+OPERATION_CREATE = "create"
+OPERATION_UPDATE = "update"
+OPERATION_DELETE = "delete"
+
+# 変更ログに記録する項目（ApplicationUpdate で変更できる項目）
+TRACKED_FIELDS = (
+    "company_name",
+    "application_date",
+    "selection_stage",
+    "next_interview_date",
+    "next_action_date",
+    "priority",
+    "preference_rating",
+    "status",
+    "notes",
+    "interview_questions",
+)
+
+# pg_advisory_xact_lock のキー（変更ログの記録を直列化）
+_ADVISORY_LOCK_KEY = 0x61707063  # 'appc'
+
+# 旧形式の履歴（ApplicationHistory）に展開する際の history_id の名前空間
+_HISTORY_NAMESPACE = uuid.UUID("5b0c9f3e-8f41-4f0a-9a43-3c1d2b7e6a10")
+
+
+def to_json_value(value: Any) -> Any:
+    """JSONに保存できる値に変換（日付・日時はISO形式、UUIDは文字列）"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def diff_fields(application: Application, update_data: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """変更のあった項目を反映し、{項目名: (変更前, 変更後)} を返す"""
+    changes = {}
+    for field, new_value in update_data.items():
+        old_value = getattr(application, field)
+        if old_value != new_value:
+            changes[field] = (old_value, new_value)
+            setattr(application, field, new_value)
+    return changes
+
+
+def change_row(
+    application: Application,
+    operation: str,
+    changes: Dict[str, Tuple[Any, Any]],
+    changed_by: Optional[UUID]
+) -> dict:
+    """変更ログの1行（record_changes に渡す）"""
+    return {
+        "application_id": application.application_id,
+        "client_id": application.client_id,
+        "operation": operation,
+        "changes": {field: [to_json_value(old), to_json_value(new)] for field, (old, new) in changes.items()},
+        "changed_by": changed_by,
+    }
+
+
+def snapshot(application: Application) -> Dict[str, Tuple[Any, Any]]:
+    """登録時の変更内容（値のある項目を変更前None・変更後の値として記録）"""
+    return {
+        field: (None, getattr(application, field))
+        for field in TRACKED_FIELDS
+        if getattr(application, field) is not None
+    }
+
+
+def record_changes(db: Session, rows: Sequence[dict]) -> None:
+    """変更ログを1回のINSERT（複数行）で記録（コミットまで他の記録を待たせる）"""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(_ADVISORY_LOCK_KEY)))
+    db.execute(insert(ApplicationChange), list(rows))
+
+
+def changes_since(
+    db: Session,
+    since: int,
+    limit: int,
+    client_id: Optional[UUID] = None
+) -> Tuple[List[ApplicationChange], bool]:
+    """
+    since より後の変更を連番順に返す
+
+    Returns:
+        (変更のリスト, 続きがあるかどうか)
+    """
+    query = db.query(ApplicationChange).filter(ApplicationChange.seq > since)
+    if client_id is not None:
+        query = query.filter(ApplicationChange.client_id == client_id)
+    rows = query.order_by(ApplicationChange.seq.asc()).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def _history_text(value: Any) -> Optional[str]:
+    # 旧形式と同じく str() で文字列化（空の値はNone）
+    return str(value) if value else None
+
+
+def expand_to_history(change: ApplicationChange) -> List[dict]:
+    """変更ログの1行を旧形式の履歴（項目ごとの行、ApplicationHistoryResponse）に展開"""
+    return [
+        {
+            "history_id": uuid.uuid5(_HISTORY_NAMESPACE, f"{change.seq}:{field}"),
+            "application_id": change.application_id,
+            "changed_date": change.changed_at,
+            "changed_field": field,
+            "old_value": _history_text(old),
+            "new_value": _history_text(new),
+            "changed_by": change.changed_by,
+        }
+        for field, (old, new) in change.changes.items()
+    ]
@@ -1,17 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.config import settings
 from app.database import get_db
-from app.models.user import UserAuth
+from app.models.user import Client, Coach, UserAuth
+from app.utils.cache import TTLCache
 
 # OAuth2スキーム
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# 認証済みユーザーのキャッシュ（user_id -> UserAuthのカラム値とコーチ/利用者プロフィールのID）
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# bcrypt専用のスレッドプール（CPUを占有するハッシュ計算の同時実行数を制限）
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+_PRINCIPAL_COLUMNS = ("user_id", "email", "user_type", "role", "status", "created_at", "updated_at")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """パスワードの検証"""
@@ -20,11 +39,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """パスワードのハッシュ化"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """パスワードの検証（専用スレッドプールで実行し、イベントループをブロックしない）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """パスワードのハッシュ化（専用スレッドプールで実行し、イベントループをブロックしない）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """JWTトークンの生成"""
     to_encode = data.copy()
@@ -47,32 +78,108 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> UserAuth:
-    """現在のユーザーを取得"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _get_token_subject(token: str) -> str:
+    """トークンからユーザーID（sub）を取得"""
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    return user_id
+
 
-    user = db.query(UserAuth).filter(UserAuth.user_id == user_id).first()
+def _parse_user_id(user_id: str) -> UUID:
+    try:
+        return UUID(user_id)
+    except ValueError:
+        raise _credentials_exception()
+
+
+def _load_principal(db: Session, user_id: UUID) -> UserAuth:
+    """UserAuthとCoach/Clientを1回のJOINクエリで読み込み、キャッシュに保存"""
+    user = db.query(UserAuth).options(
+        joinedload(UserAuth.coach),
+        joinedload(UserAuth.client)
+    ).filter(UserAuth.user_id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
+    cache_principal(user)
     return user
 
 
+def _cached_user(cached: dict) -> UserAuth:
+    # セッションに紐付かないUserAuth（カラム値のみ）
+    return UserAuth(**{column: cached[column] for column in _PRINCIPAL_COLUMNS})
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserAuth:
+    """現在のユーザーを取得"""
+    user_id = _get_token_subject(token)
+
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        # セッションに紐付かないUserAuthを返す（リレーションは参照しないこと）
+        return _cached_user(cached)
+
+    return _load_principal(db, _parse_user_id(user_id))
+
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserAuth:
+    """
+    現在のユーザーをコーチ/利用者プロフィール付きで取得
+
+    キャッシュにある場合は users_auth を読まず、プロフィール（Coach/Client）だけを主キーで取得する。
+    キャッシュにない場合は UserAuth と Coach/Client を1回のJOINクエリで読み込む。
+    current_user.coach / current_user.client はリクエストのセッションに紐付いており、そのまま参照・更新できる
+    （キャッシュから作成した UserAuth 自体はセッションに紐付かないため、カラムを更新しないこと）。
+    FastAPIの依存性キャッシュにより1リクエスト内では1回だけ実行される。
+    """
+    user_id = _get_token_subject(token)
+
+    cached = principal_cache.get(user_id)
+    if cached is None:
+        return _load_principal(db, _parse_user_id(user_id))
+
+    user = _cached_user(cached)
+    coach = db.get(Coach, cached["coach_id"]) if cached["coach_id"] else None
+    client = db.get(Client, cached["client_id"]) if cached["client_id"] else None
+    # 遅延読み込みを行わないよう、読み込み済みの値として設定する
+    set_committed_value(user, "coach", coach)
+    set_committed_value(user, "client", client)
+    return user
+
+
+def cache_principal(user: UserAuth) -> None:
+    """認証済みユーザー（coach / client を読み込み済みのもの）をキャッシュに保存"""
+    entry = {column: getattr(user, column) for column in _PRINCIPAL_COLUMNS}
+    entry["coach_id"] = user.coach.coach_id if user.coach else None
+    entry["client_id"] = user.client.client_id if user.client else None
+    principal_cache.set(str(user.user_id), entry)
+
+
+def invalidate_principal(user_id) -> None:
+    """ユーザーのキャッシュを無効化（ステータス変更・削除時に呼び出す）"""
+    principal_cache.invalidate(str(user_id))
+
+
 async def get_current_coach(current_user: UserAuth = Depends(get_current_user)) -> UserAuth:
     """現在のコーチユーザーを取得"""
     if current_user.user_type != "coach":
@@ -91,3 +198,23 @@ async def get_current_client(current_user: UserAuth = Depends(get_current_user))
             detail="Access forbidden: Client privileges required"
         )
     return current_user
+
+
+async def get_current_coach_principal(current_user: UserAuth = Depends(get_current_principal)) -> UserAuth:
+    """現在のコーチユーザーをプロフィール付きで取得"""
+    if current_user.user_type != "coach":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access forbidden: Coach privileges required"
+        )
+    return current_user
+
+
+async def get_current_client_principal(current_user: UserAuth = Depends(get_current_principal)) -> UserAuth:
+    """現在の利用者ユーザーをプロフィール付きで取得"""
+    if current_user.user_type != "client":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access forbidden: Client privileges required"
+        )
+    return current_user
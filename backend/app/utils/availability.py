@@ -0,0 +1,135 @@
+"""
+コーチ空き枠の展開・一括登録ユーティリティ
+"""
+from datetime import datetime, date, timedelta
+from typing import Iterable, Iterator, List, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.appointment import CoachAvailability
+from app.utils.scheduling import (
+    find_availability_conflicts, is_exclusion_violation, normalize, raise_availability_conflict, to_utc
+)
+
+SLOT_MINUTES = 30
+
+# 一括登録で既存の枠と重なり登録しなかった枠数を返すレスポンスヘッダー
+SKIPPED_SLOTS_HEADER = "X-Skipped-Slots"
+
+# 繰り返しの時刻のタイムゾーン（指定がない場合）
+DEFAULT_TIMEZONE = 'Asia/Tokyo'
+
+# 1リクエストで登録できる枠数・繰り返し期間の上限
+MAX_BULK_SLOTS = 5000
+MAX_RULE_DAYS = 366
+
+Range = Tuple[datetime, datetime]
+
+
+def split_into_slots(start: datetime, end: datetime, minutes: int = SLOT_MINUTES) -> Iterator[Range]:
+    """期間をminutes分単位の枠に分割（端数は最後の枠を短くする）"""
+    step = timedelta(minutes=minutes)
+    current = start
+    while current < end:
+        slot_end = min(current + step, end)
+        yield current, slot_end
+        current = slot_end
+
+
+def get_zone(tz_name: str) -> ZoneInfo:
+    """タイムゾーン名から ZoneInfo を取得（不明な場合は400）"""
+    try:
+        return ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz_name}")
+
+
+def expand_weekly_rule(weekdays: Iterable[int], start_time, end_time, start_date: date, end_date: date,
+                       tz_name: str = DEFAULT_TIMEZONE) -> Iterator[Range]:
+    """毎週の繰り返しを具体的な期間に展開（時刻は tz_name の時刻として扱い、UTCのnaiveな日時で返す）"""
+    weekdays = set(weekdays)
+    if not weekdays or not weekdays <= set(range(7)):
+        raise HTTPException(status_code=400, detail="Weekdays must be between 0 (Monday) and 6 (Sunday)")
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="Rule end time must be after start time")
+    if end_date < start_date or (end_date - start_date).days >= MAX_RULE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Rule period must be between 1 and {MAX_RULE_DAYS} days")
+    zone = get_zone(tz_name)
+
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            yield (
+                normalize(datetime.combine(day, start_time, tzinfo=zone)),
+                normalize(datetime.combine(day, end_time, tzinfo=zone)),
+            )
+        day += timedelta(days=1)
+
+
+def merge_ranges(ranges: Iterable[Range]) -> List[Range]:
+    """重複・隣接する期間を結合"""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_slots(ranges: Iterable[Range]) -> List[Range]:
+    """
+    期間を30分枠に分割
+
+    タイムゾーン付き・なしの期間が混在してもよいよう、UTCのnaiveな日時に揃えてから
+    重なる期間を結合して分割する（同じ枠が二重に作られることはない）。
+    """
+    slots: List[Range] = []
+    for start, end in merge_ranges((normalize(start), normalize(end)) for start, end in ranges):
+        if start >= end:
+            raise HTTPException(status_code=400, detail="Availability end must be after start")
+        slots.extend(split_into_slots(start, end))
+        if len(slots) > MAX_BULK_SLOTS:
+            raise HTTPException(status_code=400, detail=f"Too many slots (max {MAX_BULK_SLOTS})")
+    return slots
+
+
+def insert_slots(db: Session, coach_id: UUID, slots: Iterable[Range], booked: bool = False) -> List[CoachAvailability]:
+    """枠を1回の INSERT ... RETURNING でまとめて登録（日時はUTCに揃えて保存）"""
+    rows = [
+        {"coach_id": coach_id, "available_start": to_utc(start), "available_end": to_utc(end), "is_booked": booked}
+        for start, end in slots
+    ]
+    if not rows:
+        return []
+    try:
+        return list(db.scalars(insert(CoachAvailability).returning(CoachAvailability), rows))
+    except IntegrityError as e:
+        db.rollback()
+        if is_exclusion_violation(e):
+            raise HTTPException(status_code=409, detail="Availability overlaps existing slots")
+        raise
+
+
+def create_slots(db: Session, coach_id: UUID, ranges: Iterable[Range], skip_conflicts: bool = False) -> Tuple[List[CoachAvailability], int]:
+    """
+    既存の枠との重複を確認して空き枠を登録
+
+    Args:
+        skip_conflicts: Trueなら重なる枠を除いて登録、Falseなら409
+
+    Returns:
+        (登録した枠, 重複のため登録しなかった枠数)
+    """
+    slots = build_slots(ranges)
+    conflicts = find_availability_conflicts(db, coach_id, slots)
+    if conflicts and not skip_conflicts:
+        raise_availability_conflict(conflicts)
+    if conflicts:
+        conflicting = set(conflicts)
+        slots = [slot for slot in slots if slot not in conflicting]
+    return insert_slots(db, coach_id, slots), len(conflicts)
@@ -0,0 +1,159 @@
+"""
+繰り返し空き枠ルールの展開
+
+ルールは coach_availability に行を作らず、読み取り時に要求された期間分だけ30分枠に展開する。
+予約された枠だけを coach_availability に予約済みとして登録（実体化）し、以降はその行が優先される。
+"""
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
+from app.models.appointment import CoachAvailability, CoachAvailabilityRule
+from app.utils.availability import get_zone, insert_slots, split_into_slots
+from app.utils.interval_tree import IntervalTree
+from app.utils.scheduling import normalize, to_utc
+
+# 期間の指定がない場合にルールを展開する日数
+RULE_EXPANSION_DEFAULT_DAYS = 28
+
+Range = Tuple[datetime, datetime]
+
+
+def validate_rule(weekdays: Iterable[int], start_time: time, end_time: time,
+                  valid_from: date, valid_until: Optional[date], tz_name: str) -> None:
+    """ルールの内容を検証（不正な場合は400）"""
+    weekdays = set(weekdays)
+    if not weekdays or not weekdays <= set(range(7)):
+        raise HTTPException(status_code=400, detail="Weekdays must be between 0 (Monday) and 6 (Sunday)")
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="Rule end time must be after start time")
+    if valid_until and valid_until < valid_from:
+        raise HTTPException(status_code=400, detail="valid_until must not be before valid_from")
+    get_zone(tz_name)
+
+
+def virtual_slot_id(rule_id: UUID, start: datetime) -> UUID:
+    """展開した枠のID（同じルール・同じ開始時刻なら常に同じ値）"""
+    return uuid.uuid5(rule_id, start.isoformat())
+
+
+def expand_rule(rule: CoachAvailabilityRule, window_start: datetime, window_end: datetime,
+                contained: bool = True) -> Iterator[Range]:
+    """
+    ルールを [window_start, window_end) の30分枠に展開（UTCのnaiveな日時）
+
+    Args:
+        contained: Trueなら期間内に収まる枠のみ、Falseなら期間と重なる枠をすべて返す
+    """
+    zone = ZoneInfo(rule.timezone or 'Asia/Tokyo')
+    window_start, window_end = normalize(window_start), normalize(window_end)
+    weekdays = set(rule.weekdays or [])
+    excluded = set(rule.excluded_dates or [])
+
+    # タイムゾーンの差で日付がずれる分、前後1日を含めて走査する
+    day = max(window_start.date() - timedelta(days=1), rule.valid_from)
+    last_day = window_end.date() + timedelta(days=1)
+    if rule.valid_until:
+        last_day = min(last_day, rule.valid_until)
+    while day <= last_day:
+        if day.weekday() in weekdays and day.isoformat() not in excluded:
+            start = normalize(datetime.combine(day, rule.start_time, tzinfo=zone))
+            end = normalize(datetime.combine(day, rule.end_time, tzinfo=zone))
+            for slot_start, slot_end in split_into_slots(start, end):
+                if contained:
+                    if slot_start >= window_start and slot_end <= window_end:
+                        yield slot_start, slot_end
+                elif slot_start < window_end and slot_end > window_start:
+                    yield slot_start, slot_end
+        day += timedelta(days=1)
+
+
+def load_rules(db: Session, window_start: datetime, window_end: datetime,
+               coach_ids: Optional[Sequence[UUID]] = None) -> List[CoachAvailabilityRule]:
+    """期間中に有効なルール（コーチ情報付き）"""
+    query = db.query(CoachAvailabilityRule).options(joinedload(CoachAvailabilityRule.coach)).filter(
+        CoachAvailabilityRule.valid_from <= normalize(window_end).date(),
+        or_(
+            CoachAvailabilityRule.valid_until.is_(None),
+            CoachAvailabilityRule.valid_until >= normalize(window_start).date() - timedelta(days=1),
+        ),
+    )
+    if coach_ids is not None:
+        query = query.filter(CoachAvailabilityRule.coach_id.in_(coach_ids))
+    return query.all()
+
+
+def _materialized_index(db: Session, coach_ids: Iterable[UUID], start: datetime, end: datetime) -> Dict[UUID, IntervalTree]:
+    """コーチごとの登録済みの枠（予約済みを含む）の区間木"""
+    index: Dict[UUID, IntervalTree] = defaultdict(IntervalTree)
+    rows = db.query(
+        CoachAvailability.coach_id, CoachAvailability.available_start, CoachAvailability.available_end
+    ).filter(
+        CoachAvailability.coach_id.in_(list(coach_ids)),
+        CoachAvailability.available_start < to_utc(end),
+        CoachAvailability.available_end > to_utc(start),
+    )
+    for coach_id, slot_start, slot_end in rows:
+        index[coach_id].insert(normalize(slot_start), normalize(slot_end))
+    return index
+
+
+def expand_virtual_slots(db: Session, window_start: datetime, window_end: datetime,
+                         coach_ids: Optional[Sequence[UUID]] = None,
+                         contained: bool = True) -> List[Tuple[CoachAvailabilityRule, datetime, datetime]]:
+    """
+    ルールから展開した枠のうち、登録済みの枠と重ならないもの
+
+    Returns:
+        (ルール, 開始, 終了) のリスト（日時はUTCのnaiveな日時）
+    """
+    rules = load_rules(db, window_start, window_end, coach_ids)
+    if not rules:
+        return []
+    start, end = normalize(window_start), normalize(window_end)
+    materialized = _materialized_index(db, {rule.coach_id for rule in rules}, start - timedelta(days=1), end + timedelta(days=1))
+
+    slots = []
+    seen = set()
+    for rule in rules:
+        index = materialized.get(rule.coach_id)
+        for slot_start, slot_end in expand_rule(rule, start, end, contained):
+            key = (rule.coach_id, slot_start)
+            if key in seen or (index is not None and index.overlaps(slot_start, slot_end)):
+                continue  # 複数ルールの重複・実体化済みの枠は除く
+            seen.add(key)
+            slots.append((rule, slot_start, slot_end))
+    slots.sort(key=lambda item: item[1])
+    return slots
+
+
+def virtual_slot_response(rule: CoachAvailabilityRule, start: datetime, end: datetime) -> dict:
+    """展開した枠を CoachAvailabilityResponse の形式に変換"""
+    start, end = start.replace(tzinfo=timezone.utc), end.replace(tzinfo=timezone.utc)
+    return {
+        "availability_id": virtual_slot_id(rule.rule_id, start),
+        "coach_id": rule.coach_id,
+        "available_start": start,
+        "available_end": end,
+        "is_booked": False,
+        "created_at": rule.created_at,
+        "coach": rule.coach,
+        "rule_id": rule.rule_id,
+    }
+
+
+def materialize_booked_slots(db: Session, coach_ids: Iterable[UUID], start: datetime, end: datetime) -> int:
+    """[start, end) にかかるルールの枠を予約済みとして coach_availability に登録（同じトランザクション内）"""
+    slots_by_coach: Dict[UUID, List[Range]] = defaultdict(list)
+    for rule, slot_start, slot_end in expand_virtual_slots(db, start, end, list(coach_ids), contained=False):
+        slots_by_coach[rule.coach_id].append(
+            (slot_start.replace(tzinfo=timezone.utc), slot_end.replace(tzinfo=timezone.utc))
+        )
+    for coach_id, slots in slots_by_coach.items():
+        insert_slots(db, coach_id, slots, booked=True)
+    return sum(len(slots) for slots in slots_by_coach.values())
@@ -0,0 +1,175 @@
+"""
+レスポンス圧縮ミドルウェア
+
+Accept-Encoding に応じて brotli（brotli パッケージがインストールされている場合）または gzip で本文を圧縮する。
+minimum_size 未満の本文・テキスト以外の形式（画像・PDF等）・本文のないレスポンス（304等）は圧縮しない。
+ストリーミング（format=ndjson 等）は受け取った単位ごとにフラッシュし、行の到着を遅らせない。
+"""
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（未インストールの場合は gzip のみ）
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+
+# 圧縮する Content-Type（前方一致）
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+)
+
+
+def brotli_available() -> bool:
+    return brotli is not None
+
+
+def choose_encoding(accept_encoding: str, use_brotli: bool = True) -> Optional[str]:
+    """Accept-Encoding から使う圧縮形式を選ぶ（brotli を優先、q=0 の形式は除く）"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if use_brotli and brotli is not None and (ENCODING_BROTLI in accepted or "*" in accepted):
+        return ENCODING_BROTLI
+    if ENCODING_GZIP in accepted or "*" in accepted:
+        return ENCODING_GZIP
+    return None
+
+
+class _Compressor:
+    """gzip（zlib）と brotli の増分圧縮の共通インターフェース"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == ENCODING_BROTLI:
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: gzip ヘッダー付き
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == ENCODING_BROTLI:
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        if self.encoding == ENCODING_BROTLI:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    brotli / gzip のレスポンス圧縮（ASGIミドルウェア）
+
+    Args:
+        minimum_size: これより小さい本文は圧縮しない（バイト）
+        gzip_level: gzip の圧縮レベル（1〜9）
+        brotli_quality: brotli の品質（0〜11。大きいほど高圧縮・高負荷）
+        use_brotli: False の場合は brotli がインストールされていても gzip のみ
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        use_brotli: bool = True
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.use_brotli = use_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.use_brotli)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self.app, self, encoding)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    """1件のレスポンスの圧縮（最初の本文で圧縮するかどうかを決める）"""
+
+    def __init__(self, app: ASGIApp, options: CompressionMiddleware, encoding: str):
+        self.app = app
+        self.options = options
+        self.encoding = encoding
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _compressible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        if message["status"] < 200 or message["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").lower().startswith(COMPRESSIBLE_TYPES)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 最初の本文を見るまでヘッダーの送信を保留する
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not self._compressible(start) or (not more_body and len(body) < self.options.minimum_size):
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.options.gzip_level, self.options.brotli_quality)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # 全体の長さは分からないため chunked で送る
+                del headers["Content-Length"]
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": self.compressor.compress(body, flush=True), "more_body": True})
+            else:
+                data = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(data))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": data})
+            return
+
+        if self.compressor is None:
+            await self.send(message)
+        elif more_body:
+            await self.send({"type": "http.response.body", "body": self.compressor.compress(body, flush=True), "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.compress(body) + self.compressor.finish()})
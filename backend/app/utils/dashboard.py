@@ -0,0 +1,107 @@
+"""
+ダッシュボード統計の集計とキャッシュ
+"""
+from datetime import date, datetime, time, timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.application import Application
+from app.models.appointment import Appointment, appointment_coaches
+from app.models.resume import Resume
+from app.models.user import Client
+from app.utils.cache import TTLCache
+from app.utils.scheduling import to_utc
+
+# 集計結果のキャッシュ（キー: ("coach", coach_id, week_start)）
+dashboard_cache = TTLCache(maxsize=256, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+# 週の区切り（月曜0時）を判定するタイムゾーン
+WEEK_TIMEZONE = ZoneInfo("Asia/Tokyo")
+
+# これらのモデルが変更されたらキャッシュを破棄する
+_DASHBOARD_MODELS = (Client, Application, Appointment, Resume)
+
+
+def _count_by(db: Session, column, *filters) -> dict:
+    """カラムの値ごとの件数（GROUP BY）"""
+    query = db.query(column, func.count()).filter(*filters).group_by(column)
+    return {value: count for value, count in query.all()}
+
+
+def current_week(today: date = None) -> tuple:
+    """今週（日本時間の月曜始まり）の開始日と終了日"""
+    today = today or datetime.now(WEEK_TIMEZONE).date()
+    week_start = today - timedelta(days=today.weekday())
+    return week_start, week_start + timedelta(days=6)
+
+
+def compute_coach_dashboard(db: Session, coach_id: UUID, week_start: date, week_end: date) -> dict:
+    """
+    コーチダッシュボードの統計をSQLの集計で算出
+
+    面談日時は日本時間の週の境界をUTCに変換して絞り込み、応募の次回面接日（日付）は週の日付で絞り込む。
+    """
+    week_from = to_utc(datetime.combine(week_start, time.min, tzinfo=WEEK_TIMEZONE))
+    week_to = to_utc(datetime.combine(week_end + timedelta(days=1), time.min, tzinfo=WEEK_TIMEZONE))
+
+    resumes_by_status = _count_by(db, Resume.status)
+    appointments_by_status = _count_by(
+        db, Appointment.status,
+        Appointment.appointment_id.in_(
+            db.query(appointment_coaches.c.appointment_id).filter(appointment_coaches.c.coach_id == coach_id)
+        ),
+        Appointment.appointment_date >= week_from,
+        Appointment.appointment_date < week_to,
+    )
+    interviews_this_week = db.query(func.count(Application.application_id)).filter(
+        Application.next_interview_date >= week_start,
+        Application.next_interview_date <= week_end,
+    ).scalar()
+
+    return {
+        "week_start": week_start,
+        "week_end": week_end,
+        "clients_by_status": _count_by(db, Client.status),
+        "applications_by_status": _count_by(db, Application.status),
+        "resumes_by_status": resumes_by_status,
+        "appointments_this_week_by_status": appointments_by_status,
+        "interviews_this_week": interviews_this_week or 0,
+        "pending_review_count": resumes_by_status.get("submitted", 0),
+        "generated_at": datetime.now(),
+    }
+
+
+def get_coach_dashboard(db: Session, coach_id: UUID) -> dict:
+    """キャッシュ済みの統計を返す（なければ集計してキャッシュ）"""
+    week_start, week_end = current_week()
+    return dashboard_cache.get_or_set(
+        ("coach", coach_id, week_start),
+        lambda: compute_coach_dashboard(db, coach_id, week_start, week_end),
+    )
+
+
+def invalidate_dashboard() -> None:
+    """ダッシュボード統計のキャッシュをすべて破棄"""
+    dashboard_cache.clear()
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _mark_dashboard_changes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _DASHBOARD_MODELS):
+            session.info["dashboard_dirty"] = True
+            return
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("dashboard_dirty", False):
+        invalidate_dashboard()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("dashboard_dirty", None)
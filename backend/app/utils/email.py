@@ -1,11 +1,102 @@
 """
 メール送信ユーティリティ
+
+件名・本文は app.utils.email_templates の登録済みテンプレートから生成し、送信キューに追加する。
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import datetime
 from typing import Optional, List
-import os
+from app.utils.email_queue import email_dispatcher
+from app.utils.email_templates import (
+    AUDIENCE_CLIENT,
+    AUDIENCE_COACH,
+    EVENT_APPROVED,
+    EVENT_CANCELLED,
+    EVENT_UPDATED,
+    UNSET_MEETING_URL,
+    display_name,
+    format_appointment_datetime,
+    format_coach_names,
+    get_template,
+    optional_line,
+)
+
+
+def _build_context(
+    client_name: str,
+    coach_names: List[str],
+    appointment_date: str,
+    meeting_url: Optional[str] = None,
+    old_appointment_date: Optional[str] = None,
+    notes: Optional[str] = None,
+    reason_label: Optional[str] = None,
+    reason: Optional[str] = None
+) -> dict:
+    return {
+        "client_name": client_name or "",
+        "coach_names": format_coach_names(tuple(coach_names)),
+        "appointment_date": appointment_date,
+        "old_appointment_date": old_appointment_date or "",
+        "meeting_url": meeting_url or UNSET_MEETING_URL,
+        "notes_section": optional_line("備考", notes),
+        "reason_section": optional_line(reason_label, reason) if reason_label else "",
+    }
+
+
+def _enqueue(event: str, to_email: str, context: dict, is_for_coach: bool) -> bool:
+    audience = AUDIENCE_COACH if is_for_coach else AUDIENCE_CLIENT
+    # コーチ宛ての宛名は従来どおりメールアドレス
+    recipient_name = to_email if is_for_coach else context["client_name"]
+    subject, body = get_template(event, audience).render(recipient_name, context)
+    return email_dispatcher.enqueue(to_email, subject, body)
+
+
+def send_appointment_notifications(
+    event: str,
+    appointment,
+    client,
+    coaches: list,
+    old_appointment_date: Optional[datetime] = None,
+    meeting_url: Optional[str] = None,
+    reason: Optional[str] = None
+) -> int:
+    """
+    面談に関わる利用者と全コーチに通知メールを送信
+
+    件名・本文は宛先区分ごとに一度だけ描画し、宛名だけを差し替えてキューに追加する。
+
+    Args:
+        event: EVENT_APPROVED / EVENT_CANCELLED / EVENT_UPDATED
+        appointment: 面談
+        client: 利用者（Noneの場合は利用者宛てを送らない）
+        coaches: 担当コーチのリスト
+        old_appointment_date: 変更前の面談日時（EVENT_UPDATEDのみ）
+        meeting_url: オンライン面談URL（省略時は面談に設定されたURL）
+        reason: キャンセル理由・変更理由
+
+    Returns:
+        int: 送信キューに追加した件数
+    """
+    context = _build_context(
+        client_name=display_name(client) if client else "",
+        coach_names=[display_name(c) for c in coaches],
+        appointment_date=format_appointment_datetime(appointment.appointment_date),
+        old_appointment_date=format_appointment_datetime(old_appointment_date) if old_appointment_date else None,
+        meeting_url=meeting_url or appointment.mtg_url,
+        notes=None if event == EVENT_CANCELLED else appointment.notes,
+        reason_label="キャンセル理由" if event == EVENT_CANCELLED else "変更理由",
+        reason=reason,
+    )
+
+    queued = 0
+    if client and client.email:
+        subject, body = get_template(event, AUDIENCE_CLIENT).render(context["client_name"], context)
+        queued += email_dispatcher.enqueue(client.email, subject, body)
+
+    coach_emails = [c.email for c in coaches if c.email]
+    rendered = get_template(event, AUDIENCE_COACH).render_many(coach_emails, context)
+    for to_email, (subject, body) in zip(coach_emails, rendered):
+        queued += email_dispatcher.enqueue(to_email, subject, body)
+    return queued
 
 
 def send_appointment_approval_email(
@@ -28,72 +119,10 @@ def send_appointment_approval_email(
         notes: 備考
 
     Returns:
-        bool: 送信成功時True、失敗時False
+        bool: 送信キューへの追加に成功した場合True
     """
-    # 環境変数からSMTP設定を取得
-    smtp_host = os.getenv('SMTP_HOST', 'localhost')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER', '')
-    smtp_password = os.getenv('SMTP_PASSWORD', '')
-    from_email = os.getenv('FROM_EMAIL', 'noreply@example.com')
-
-    # メール本文を作成
-    subject = f"【面談承認】{appointment_date}の面談が承認されました"
-
-    body = f"""
-{client_name} 様
-
-いつもお世話になっております。
-
-{appointment_date}の面談リクエストが承認されました。
-
-■面談詳細
-担当コーチ: {coach_name}
-日時: {appointment_date}
-面談URL: {meeting_url}
-"""
-
-    if notes:
-        body += f"\n備考: {notes}\n"
-
-    body += """
-
-上記URLにアクセスして、面談にご参加ください。
-
-よろしくお願いいたします。
-
----
-medcareercoach
-"""
-
-    try:
-        # MIMEオブジェクトを作成
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        # 本文を追加
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-        # SMTPサーバーに接続してメール送信（本番環境のみ）
-        if smtp_host != 'localhost' and smtp_user and smtp_password:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_password)
-                server.send_message(msg)
-            print(f"メール送信成功: {to_email}")
-            return True
-        else:
-            # 開発環境では送信をスキップしてログ出力のみ
-            print(f"[開発環境] メール送信スキップ: {to_email}")
-            print(f"件名: {subject}")
-            print(f"本文:\n{body}")
-            return True
-
-    except Exception as e:
-        print(f"メール送信エラー: {e}")
-        return False
+    context = _build_context(client_name, [coach_name], appointment_date, meeting_url, notes=notes)
+    return _enqueue(EVENT_APPROVED, to_email, context, is_for_coach=False)
 
 
 def send_appointment_approval_email_multi(
@@ -118,91 +147,10 @@ def send_appointment_approval_email_multi(
         is_for_coach: コーチ宛てのメールかどうか
 
     Returns:
-        bool: 送信成功時True、失敗時False
+        bool: 送信キューへの追加に成功した場合True
     """
-    # 環境変数からSMTP設定を取得
-    smtp_host = os.getenv('SMTP_HOST', 'localhost')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER', '')
-    smtp_password = os.getenv('SMTP_PASSWORD', '')
-    from_email = os.getenv('FROM_EMAIL', 'noreply@example.com')
-
-    # メール本文を作成
-    coach_names_str = '、'.join(coach_names)
-
-    if is_for_coach:
-        # コーチ宛て
-        subject = f"【面談確定】{client_name}様の面談が確定しました"
-        body = f"""
-{to_email} 様
-
-いつもお世話になっております。
-
-{client_name}様の面談リクエストを承認しました。
-
-■面談詳細
-利用者: {client_name}
-担当コーチ: {coach_names_str}
-日時: {appointment_date}
-面談URL: {meeting_url}
-"""
-    else:
-        # 利用者宛て
-        subject = f"【面談承認】{appointment_date}の面談が承認されました"
-        body = f"""
-{client_name} 様
-
-いつもお世話になっております。
-
-{appointment_date}の面談リクエストが承認されました。
-
-■面談詳細
-担当コーチ: {coach_names_str}
-日時: {appointment_date}
-面談URL: {meeting_url}
-"""
-
-    if notes:
-        body += f"\n備考: {notes}\n"
-
-    body += """
-
-上記URLにアクセスして、面談にご参加ください。
-
-よろしくお願いいたします。
-
----
-medcareercoach
-"""
-
-    try:
-        # MIMEオブジェクトを作成
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        # 本文を追加
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-        # SMTPサーバーに接続してメール送信（本番環境のみ）
-        if smtp_host != 'localhost' and smtp_user and smtp_password:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_password)
-                server.send_message(msg)
-            print(f"メール送信成功: {to_email}")
-            return True
-        else:
-            # 開発環境では送信をスキップしてログ出力のみ
-            print(f"[開発環境] メール送信スキップ: {to_email}")
-            print(f"件名: {subject}")
-            print(f"本文:\n{body}")
-            return True
-
-    except Exception as e:
-        print(f"メール送信エラー: {e}")
-        return False
+    context = _build_context(client_name, coach_names, appointment_date, meeting_url, notes=notes)
+    return _enqueue(EVENT_APPROVED, to_email, context, is_for_coach)
 
 
 def send_appointment_cancellation_email(
@@ -225,89 +173,13 @@ def send_appointment_cancellation_email(
         is_for_coach: コーチ宛てのメールかどうか
 
     Returns:
-        bool: 送信成功時True、失敗時False
+        bool: 送信キューへの追加に成功した場合True
     """
-    # 環境変数からSMTP設定を取得
-    smtp_host = os.getenv('SMTP_HOST', 'localhost')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER', '')
-    smtp_password = os.getenv('SMTP_PASSWORD', '')
-    from_email = os.getenv('FROM_EMAIL', 'noreply@example.com')
-
-    # メール本文を作成
-    coach_names_str = '、'.join(coach_names)
-
-    if is_for_coach:
-        # コーチ宛て
-        subject = f"【面談キャンセル】{client_name}様の面談がキャンセルされました"
-        body = f"""
-{to_email} 様
-
-いつもお世話になっております。
-
-{client_name}様の面談がキャンセルされました。
-
-■キャンセルされた面談
-利用者: {client_name}
-担当コーチ: {coach_names_str}
-日時: {appointment_date}
-"""
-    else:
-        # 利用者宛て
-        subject = f"【面談キャンセル】{appointment_date}の面談がキャンセルされました"
-        body = f"""
-{client_name} 様
-
-いつもお世話になっております。
-
-{appointment_date}の面談がキャンセルされました。
-
-■キャンセルされた面談
-担当コーチ: {coach_names_str}
-日時: {appointment_date}
-"""
-
-    if cancellation_reason:
-        body += f"\nキャンセル理由: {cancellation_reason}\n"
-
-    body += """
-
-再度面談をご希望の際は、お手数ですが面談予約画面から新しい予約を作成してください。
-
-よろしくお願いいたします。
-
----
-medcareercoach
-"""
-
-    try:
-        # MIMEオブジェクトを作成
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        # 本文を追加
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-        # SMTPサーバーに接続してメール送信（本番環境のみ）
-        if smtp_host != 'localhost' and smtp_user and smtp_password:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_password)
-                server.send_message(msg)
-            print(f"キャンセルメール送信成功: {to_email}")
-            return True
-        else:
-            # 開発環境では送信をスキップしてログ出力のみ
-            print(f"[開発環境] キャンセルメール送信スキップ: {to_email}")
-            print(f"件名: {subject}")
-            print(f"本文:\n{body}")
-            return True
-
-    except Exception as e:
-        print(f"キャンセルメール送信エラー: {e}")
-        return False
+    context = _build_context(
+        client_name, coach_names, appointment_date,
+        reason_label="キャンセル理由", reason=cancellation_reason
+    )
+    return _enqueue(EVENT_CANCELLED, to_email, context, is_for_coach)
 
 
 def send_appointment_update_email(
@@ -336,98 +208,11 @@ def send_appointment_update_email(
         is_for_coach: コーチ宛てのメールかどうか
 
     Returns:
-        bool: 送信成功時True、失敗時False
+        bool: 送信キューへの追加に成功した場合True
     """
-    # 環境変数からSMTP設定を取得
-    smtp_host = os.getenv('SMTP_HOST', 'localhost')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER', '')
-    smtp_password = os.getenv('SMTP_PASSWORD', '')
-    from_email = os.getenv('FROM_EMAIL', 'noreply@example.com')
-
-    # メール本文を作成
-    coach_names_str = '、'.join(coach_names)
-
-    if is_for_coach:
-        # コーチ宛て
-        subject = f"【面談変更】{client_name}様の面談日時が変更されました"
-        body = f"""
-{to_email} 様
-
-いつもお世話になっております。
-
-{client_name}様の面談日時が変更されました。
-
-■変更前
-日時: {old_appointment_date}
-
-■変更後
-利用者: {client_name}
-担当コーチ: {coach_names_str}
-日時: {new_appointment_date}
-面談URL: {meeting_url}
-"""
-    else:
-        # 利用者宛て
-        subject = f"【面談変更】{old_appointment_date}の面談日時が変更されました"
-        body = f"""
-{client_name} 様
-
-いつもお世話になっております。
-
-{old_appointment_date}の面談日時が変更されました。
-
-■変更前
-日時: {old_appointment_date}
-
-■変更後
-担当コーチ: {coach_names_str}
-日時: {new_appointment_date}
-面談URL: {meeting_url}
-"""
-
-    if update_reason:
-        body += f"\n変更理由: {update_reason}\n"
-
-    if notes:
-        body += f"\n備考: {notes}\n"
-
-    body += """
-
-上記URLにアクセスして、面談にご参加ください。
-
-よろしくお願いいたします。
-
----
-medcareercoach
-"""
-
-    try:
-        # MIMEオブジェクトを作成
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        # 本文を追加
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-        # SMTPサーバーに接続してメール送信（本番環境のみ）
-        if smtp_host != 'localhost' and smtp_user and smtp_password:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_password)
-                server.send_message(msg)
-            print(f"変更メール送信成功: {to_email}")
-            return True
-        else:
-            # 開発環境では送信をスキップしてログ出力のみ
-            print(f"[開発環境] 変更メール送信スキップ: {to_email}")
-            print(f"件名: {subject}")
-            print(f"本文:\n{body}")
-            return True
-
-    except Exception as e:
-        print(f"変更メール送信エラー: {e}")
-        return False
-
+    context = _build_context(
+        client_name, coach_names, new_appointment_date, meeting_url,
+        old_appointment_date=old_appointment_date, notes=notes,
+        reason_label="変更理由", reason=update_reason
+    )
+    return _enqueue(EVENT_UPDATED, to_email, context, is_for_coach)
@@ -0,0 +1,335 @@
+"""
+メールのバックグラウンド送信キュー
+
+リクエスト処理中はキューに積むだけにし、ワーカースレッドが再利用するSMTP接続でまとめて送信する。
+一時的なエラーは待ち時間を倍増させながら再試行し、最終的に送れなかったメールはDBに記録する。
+"""
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional
+from app.config import settings
+
+DEFAULT_FROM_EMAIL = "noreply@example.com"
+
+
+class OutgoingEmail:
+    """送信待ちのメール"""
+
+    __slots__ = ("to_email", "subject", "body", "attempts", "last_error")
+
+    def __init__(self, to_email: str, subject: str, body: str):
+        self.to_email = to_email
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+
+    def to_mime(self, from_email: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = from_email
+        msg['To'] = self.to_email
+        msg['Subject'] = self.subject
+        msg.attach(MIMEText(self.body, 'plain', 'utf-8'))
+        return msg
+
+
+class SMTPTransport:
+    """
+    再利用するSMTPセッション
+
+    接続・STARTTLS・ログインは初回送信時のみ行い、以降の送信では同じ接続を使う。
+    """
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "",
+                 use_tls: bool = True, timeout: float = 30, from_email: str = DEFAULT_FROM_EMAIL):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.from_email = from_email
+        self._server: Optional[smtplib.SMTP] = None
+        self.connects = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+
+    def send(self, message: OutgoingEmail) -> None:
+        mime = message.to_mime(self.from_email)
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(mime)
+        except smtplib.SMTPServerDisconnected:
+            # アイドル中にサーバー側で切断された接続は、1度だけ張り直して送り直す
+            self.close()
+            self._server = self._connect()
+            self._server.send_message(mime)
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+class ConsoleTransport:
+    """開発環境用：送信せずにログ出力のみ行う"""
+
+    connected = False
+
+    def send(self, message: OutgoingEmail) -> None:
+        print(f"[開発環境] メール送信スキップ: {message.to_email}")
+        print(f"件名: {message.subject}")
+        print(f"本文:\n{message.body}")
+
+    def close(self) -> None:
+        pass
+
+
+def create_transport():
+    """設定に応じた送信方式を作成"""
+    backend = settings.EMAIL_BACKEND
+    if backend == "auto":
+        configured = settings.SMTP_HOST and settings.SMTP_HOST != 'localhost' \
+            and settings.SMTP_USER and settings.SMTP_PASSWORD
+        backend = "smtp" if configured else "console"
+    if backend == "console":
+        return ConsoleTransport()
+    return SMTPTransport(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT,
+        from_email=settings.SMTP_FROM or DEFAULT_FROM_EMAIL,
+    )
+
+
+def _is_permanent_error(error: Exception) -> bool:
+    """再試行しても成功しないエラー（宛先拒否や5xx応答）"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _persist_failure(message: OutgoingEmail) -> None:
+    """送信できなかったメールをDBに記録"""
+    from app.database import SessionLocal
+    from app.models.notification import EmailDeliveryFailure
+
+    db = SessionLocal()
+    try:
+        db.add(EmailDeliveryFailure(
+            to_email=message.to_email,
+            subject=message.subject,
+            body=message.body,
+            attempts=message.attempts,
+            last_error=message.last_error,
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"メール送信失敗の記録エラー: {e}")
+    finally:
+        db.close()
+
+
+class EmailDispatcher:
+    """
+    メール送信ワーカー
+
+    Args:
+        transport_factory: 送信方式を作成する関数（既定は設定に従う）
+        batch_size: 1回の送信処理でまとめて送る最大件数
+        max_attempts: 一時的なエラー時の最大試行回数
+        backoff_seconds: 初回再試行までの待ち時間（以降は倍増）
+        idle_timeout: SMTP接続をアイドル時に閉じるまでの秒数
+    """
+
+    def __init__(self, transport_factory=create_transport, batch_size: int = None,
+                 max_attempts: int = None, backoff_seconds: float = None, idle_timeout: float = None,
+                 on_failure=_persist_failure):
+        self.transport_factory = transport_factory
+        self.batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.EMAIL_MAX_ATTEMPTS
+        self.backoff_seconds = settings.EMAIL_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.idle_timeout = settings.EMAIL_SMTP_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.on_failure = on_failure
+
+        self._queue: "queue.Queue[Optional[OutgoingEmail]]" = queue.Queue()
+        self._retries: List[tuple] = []  # (再試行時刻, 連番, メール)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._thread: Optional[threading.Thread] = None
+        self._transport = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    # ---- 公開API ----
+
+    def start(self) -> None:
+        """ワーカースレッドを起動（起動済みなら何もしない）"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """キュー内のメールを送り切ってからワーカーを停止"""
+        thread = self._thread
+        if not thread:
+            return
+        self.flush(timeout)
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, to_email: str, subject: str, body: str) -> bool:
+        """メールを送信キューに追加（即座に返る）"""
+        if not to_email:
+            return False
+        self.start()
+        with self._lock:
+            self._pending += 1
+        self._queue.put(OutgoingEmail(to_email, subject, body))
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """キュー内（再試行待ちを含む）のメールがすべて処理されるまで待つ"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "pending": self._pending,
+                "retry_scheduled": len(self._retries),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "smtp_connects": getattr(self._transport, "connects", 0),
+            }
+
+    # ---- ワーカー ----
+
+    def _next_timeout(self) -> Optional[float]:
+        if self._retries:
+            return max(0.0, self._retries[0][0] - time.monotonic())
+        if self._transport is not None and self._transport.connected:
+            return self.idle_timeout
+        return None
+
+    def _collect_batch(self, first: OutgoingEmail) -> List[OutgoingEmail]:
+        batch = [first] if first else []
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now and len(batch) < self.batch_size:
+            batch.append(heapq.heappop(self._retries)[2])
+        while len(batch) < self.batch_size:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                self._queue.put(None)  # 停止要求はバッチ送信後に処理する
+                break
+            batch.append(message)
+        return batch
+
+    def _run(self) -> None:
+        self._transport = self.transport_factory()
+        try:
+            while True:
+                try:
+                    message = self._queue.get(timeout=self._next_timeout())
+                except queue.Empty:
+                    message = None
+                    if not self._retries:
+                        # 一定時間送信がなければ接続を閉じる
+                        self._transport.close()
+                        continue
+                else:
+                    if message is None:
+                        break
+                batch = self._collect_batch(message)
+                if batch:
+                    self._send_batch(batch)
+            # 停止時に再試行待ちのまま残ったメールは失敗として記録する
+            while self._retries:
+                self._fail(heapq.heappop(self._retries)[2])
+        finally:
+            self._transport.close()
+
+    def _send_batch(self, batch: List[OutgoingEmail]) -> None:
+        for message in batch:
+            message.attempts += 1
+            try:
+                self._transport.send(message)
+            except Exception as e:
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                    # 応答コードによる拒否以外は接続の状態が不明なため、次の送信で張り直す
+                    self._transport.close()
+                message.last_error = f"{type(e).__name__}: {e}"
+                if not _is_permanent_error(e) and message.attempts < self.max_attempts:
+                    delay = self.backoff_seconds * (2 ** (message.attempts - 1))
+                    with self._lock:
+                        self.retried += 1
+                    heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), message))
+                    continue
+                self._fail(message)
+            else:
+                self._done(failed=False)
+
+    def _fail(self, message: OutgoingEmail) -> None:
+        print(f"メール送信エラー: {message.to_email} ({message.last_error})")
+        self.on_failure(message)
+        self._done(failed=True)
+
+    def _done(self, failed: bool) -> None:
+        with self._idle:
+            if failed:
+                self.failed += 1
+            else:
+                self.sent += 1
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+
+
+email_dispatcher = EmailDispatcher()
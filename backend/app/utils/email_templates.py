@@ -0,0 +1,240 @@
+"""
+通知メールのテンプレート
+
+テンプレートはモジュール読み込み時（起動時）に一度だけ解析し、イベント種別と宛先区分（client / coach）で引く。
+同じ通知を複数の宛先に送る場合は件名・本文を一度だけ描画し、宛名だけを差し替える。
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+AUDIENCE_CLIENT = "client"
+AUDIENCE_COACH = "coach"
+
+EVENT_APPROVED = "appointment_approved"
+EVENT_CANCELLED = "appointment_cancelled"
+EVENT_UPDATED = "appointment_updated"
+
+UNSET_MEETING_URL = "未設定"
+
+# 面談日時を表示するタイムゾーン（DBにはUTCで保存している）
+DISPLAY_TIMEZONE = ZoneInfo("Asia/Tokyo")
+
+_formatter = Formatter()
+
+
+class CompiledTemplate:
+    """str.format 形式のテンプレートを解析済みの断片リストとして保持"""
+
+    __slots__ = ("source", "_parts", "fields")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in _formatter.parse(source):
+            if spec or conversion:
+                raise ValueError(f"Unsupported format spec in email template field: {field}")
+            self._parts.append((literal, field))
+        self.fields = frozenset(field for _, field in self._parts if field)
+
+    def render(self, context: Dict[str, str]) -> str:
+        return "".join(literal + (context[field] if field else "") for literal, field in self._parts)
+
+
+class EmailTemplate:
+    """件名・宛名・本文からなるメールテンプレート"""
+
+    def __init__(self, subject: str, greeting: str, body: str):
+        self.subject = CompiledTemplate(subject)
+        self.greeting = CompiledTemplate(greeting)
+        self.body = CompiledTemplate(body)
+
+    def render(self, recipient_name: str, context: Dict[str, str]) -> Tuple[str, str]:
+        """1通分の件名と本文"""
+        return self.render_many([recipient_name], context)[0]
+
+    def render_many(self, recipient_names: Iterable[str], context: Dict[str, str]) -> List[Tuple[str, str]]:
+        """複数宛先分の件名と本文（共通部分は一度だけ描画）"""
+        subject = self.subject.render(context)
+        body = self.body.render(context)
+        return [
+            (subject, self.greeting.render({**context, "recipient_name": name}) + body)
+            for name in recipient_names
+        ]
+
+
+_registry: Dict[Tuple[str, str], EmailTemplate] = {}
+
+
+def register_template(event: str, audience: str, subject: str, greeting: str, body: str) -> EmailTemplate:
+    """テンプレートを解析して登録"""
+    template = EmailTemplate(subject, greeting, body)
+    _registry[(event, audience)] = template
+    return template
+
+
+def get_template(event: str, audience: str) -> EmailTemplate:
+    try:
+        return _registry[(event, audience)]
+    except KeyError:
+        raise KeyError(f"Email template not registered: {event}/{audience}")
+
+
+# ---- 表示用の整形（同じ値が繰り返し渡されるためキャッシュする） ----
+
+@lru_cache(maxsize=1024)
+def format_appointment_datetime(value: datetime) -> str:
+    """面談日時の表示形式（日本時間。naiveな日時はUTCとみなす）"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(DISPLAY_TIMEZONE).strftime('%Y年%m月%d日 %H:%M')
+
+
+@lru_cache(maxsize=1024)
+def format_coach_names(names: Tuple[str, ...]) -> str:
+    """複数コーチ名の表示形式"""
+    return '、'.join(name or '' for name in names)
+
+
+def display_name(person) -> str:
+    """利用者・コーチの表示名（nameがなければ姓名）"""
+    if person.name:
+        return person.name
+    return f"{person.last_name or ''} {person.first_name or ''}".strip()
+
+
+def optional_line(label: str, value: Optional[str]) -> str:
+    """値がある場合のみ追加する行"""
+    return f"\n{label}: {value}\n" if value else ""
+
+
+# ---- テンプレート定義 ----
+
+_GREETING = """
+{recipient_name} 様
+"""
+
+_JOIN_FOOTER = """
+
+上記URLにアクセスして、面談にご参加ください。
+
+よろしくお願いいたします。
+
+---
+medcareercoach
+"""
+
+_REBOOK_FOOTER = """
+
+再度面談をご希望の際は、お手数ですが面談予約画面から新しい予約を作成してください。
+
+よろしくお願いいたします。
+
+---
+medcareercoach
+"""
+
+register_template(
+    EVENT_APPROVED, AUDIENCE_CLIENT,
+    subject="【面談承認】{appointment_date}の面談が承認されました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{appointment_date}の面談リクエストが承認されました。
+
+■面談詳細
+担当コーチ: {coach_names}
+日時: {appointment_date}
+面談URL: {meeting_url}
+{notes_section}""" + _JOIN_FOOTER,
+)
+
+register_template(
+    EVENT_APPROVED, AUDIENCE_COACH,
+    subject="【面談確定】{client_name}様の面談が確定しました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{client_name}様の面談リクエストを承認しました。
+
+■面談詳細
+利用者: {client_name}
+担当コーチ: {coach_names}
+日時: {appointment_date}
+面談URL: {meeting_url}
+{notes_section}""" + _JOIN_FOOTER,
+)
+
+register_template(
+    EVENT_CANCELLED, AUDIENCE_CLIENT,
+    subject="【面談キャンセル】{appointment_date}の面談がキャンセルされました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{appointment_date}の面談がキャンセルされました。
+
+■キャンセルされた面談
+担当コーチ: {coach_names}
+日時: {appointment_date}
+{reason_section}""" + _REBOOK_FOOTER,
+)
+
+register_template(
+    EVENT_CANCELLED, AUDIENCE_COACH,
+    subject="【面談キャンセル】{client_name}様の面談がキャンセルされました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{client_name}様の面談がキャンセルされました。
+
+■キャンセルされた面談
+利用者: {client_name}
+担当コーチ: {coach_names}
+日時: {appointment_date}
+{reason_section}""" + _REBOOK_FOOTER,
+)
+
+register_template(
+    EVENT_UPDATED, AUDIENCE_CLIENT,
+    subject="【面談変更】{old_appointment_date}の面談日時が変更されました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{old_appointment_date}の面談日時が変更されました。
+
+■変更前
+日時: {old_appointment_date}
+
+■変更後
+担当コーチ: {coach_names}
+日時: {appointment_date}
+面談URL: {meeting_url}
+{reason_section}{notes_section}""" + _JOIN_FOOTER,
+)
+
+register_template(
+    EVENT_UPDATED, AUDIENCE_COACH,
+    subject="【面談変更】{client_name}様の面談日時が変更されました",
+    greeting=_GREETING,
+    body="""
+いつもお世話になっております。
+
+{client_name}様の面談日時が変更されました。
+
+■変更前
+日時: {old_appointment_date}
+
+■変更後
+利用者: {client_name}
+担当コーチ: {coach_names}
+日時: {appointment_date}
+面談URL: {meeting_url}
+{reason_section}{notes_section}""" + _JOIN_FOOTER,
+)
@@ -0,0 +1,74 @@
+"""
+条件付きGET（ETag / If-None-Match）用ユーティリティ
+
+一覧の弱いETagを、一覧と同じ条件の1回の集計クエリ（件数・updated_at の最大値と合計、関連データの版）から作る。
+If-None-Match が一致する場合は一覧の取得・シリアライズを行わずに304を返す。
+
+updated_at の合計を含めるのは、開始の早いトランザクションが遅れてコミットした更新
+（最大値の変わらない更新）も検出するため。
+SQLiteでは updated_at が秒単位のため、同じ行の1秒以内の再更新は検出できない（弱いETagとして扱う）。
+"""
+import hashlib
+from typing import List, Optional
+from fastapi import Request, Response
+from sqlalchemy import extract, func, select
+from sqlalchemy.orm import Query
+from app.models.user import UserAuth
+
+ETAG_HEADER = "ETag"
+IF_NONE_MATCH_HEADER = "If-None-Match"
+
+# キャッシュした一覧は毎回ETagで再検証させる（利用者ごとに内容が異なるため共有キャッシュには保存させない）
+CACHE_CONTROL = "private, no-cache"
+
+
+def related_version(source, timestamp, *criteria) -> List:
+    """
+    一覧の行に含める関連データ（添削・コーチ情報等）の件数と updated_at の最大値のスカラーサブクエリ
+
+    一覧のクエリとは相関させないため、対象の絞り込みは criteria で指定する。
+    """
+    return [
+        select(aggregate).select_from(source).where(*criteria).correlate(None).scalar_subquery()
+        for aggregate in (func.count(), func.max(timestamp))
+    ]
+
+
+def collection_etag(request: Request, user: UserAuth, query: Query, timestamp, *related) -> str:
+    """
+    一覧の弱いETag（URL・クエリパラメータ・利用者・データの版から作成）
+
+    Args:
+        query: 一覧と同じ条件のクエリ（ページングの limit を付ける前のもの）
+        timestamp: 一覧の行の updated_at 列
+        related: related_version で作成した関連データの版
+    """
+    version = query.with_entities(
+        func.count(), func.max(timestamp), func.sum(extract("epoch", timestamp)), *related
+    ).order_by(None).one()
+    key = "|".join(map(str, (
+        request.url.path, sorted(request.query_params.multi_items()), user.user_id, *version
+    )))
+    return 'W/"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match は弱い比較（W/ の有無を区別しない）
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    ETag をレスポンスヘッダーに設定し、If-None-Match が一致する場合は304のレスポンスを返す
+
+    戻り値がNoneでなければ、呼び出し側はそれをそのまま返す。
+    """
+    headers = {ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL}
+    response.headers.update(headers)
+    if_none_match = request.headers.get(IF_NONE_MATCH_HEADER)
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return None
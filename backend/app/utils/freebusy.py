@@ -0,0 +1,150 @@
+"""
+空き時間（free/busy）の集計
+
+空き枠を連続した区間に結合し、面談で埋まっている時間を差し引いて、コーチごとの空き区間を求める。
+区間はすべて半開区間 [start, end) で、日時は scheduling.normalize でUTCのnaiveな日時に揃えて扱う。
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.appointment import Appointment, CoachAvailability, appointment_coaches
+from app.utils.availability import merge_ranges
+from app.utils.availability_rules import expand_virtual_slots
+from app.utils.scheduling import (
+    CANCELLED_STATUS,
+    DEFAULT_DURATION_MINUTES,
+    MAX_APPOINTMENT_DURATION,
+    normalize,
+    to_utc,
+)
+
+Range = Tuple[datetime, datetime]
+
+# 1リクエストで集計できる期間・コーチ数の上限
+MAX_WINDOW_DAYS = 62
+MAX_COACHES = 50
+
+
+def subtract_ranges(ranges: Sequence[Range], busy: Sequence[Range]) -> List[Range]:
+    """結合済みの区間から、埋まっている区間（結合済み）を差し引く"""
+    result: List[Range] = []
+    i = 0
+    for start, end in ranges:
+        # この区間より前に終わる埋まり区間を飛ばす（区間・埋まり区間ともに開始順のため戻る必要はない）
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        j = i
+        current = start
+        while j < len(busy) and busy[j][0] < end:
+            busy_start, busy_end = busy[j]
+            if busy_start > current:
+                result.append((current, busy_start))
+            current = max(current, busy_end)
+            j += 1
+        if current < end:
+            result.append((current, end))
+    return result
+
+
+def intersect_ranges(a: Sequence[Range], b: Sequence[Range]) -> List[Range]:
+    """2つの結合済み区間リストの共通部分"""
+    result: List[Range] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def clip_ranges(ranges: Sequence[Range], start: datetime, end: datetime) -> List[Range]:
+    """区間を [start, end) に切り詰める"""
+    return [(max(s, start), min(e, end)) for s, e in ranges if s < end and e > start]
+
+
+def align_up(value: datetime, origin: datetime, step: timedelta) -> datetime:
+    """originから step 刻みの格子で value 以降の最初の時刻"""
+    remainder = (value - origin) % step
+    return value if not remainder else value + (step - remainder)
+
+
+def to_bitmap(ranges: Sequence[Range], start: datetime, end: datetime, step: timedelta) -> str:
+    """
+    [start, end) を step 刻みに区切り、枠全体が空いていれば '1'、そうでなければ '0' とした文字列
+    """
+    count = int((end - start) / step)
+    bits = ['0'] * count
+    for range_start, range_end in ranges:
+        first = max(0, int((align_up(range_start, start, step) - start) / step))
+        last = min(count, int((range_end - start) / step))
+        for index in range(first, last):
+            bits[index] = '1'
+    return "".join(bits)
+
+
+def first_common_starts(ranges: Sequence[Range], origin: datetime, step: timedelta,
+                        duration: timedelta, limit: int) -> List[datetime]:
+    """共通の空き区間のうち、duration 分連続して空いている開始時刻を step 刻みで先頭から limit 件"""
+    starts: List[datetime] = []
+    for range_start, range_end in ranges:
+        current = align_up(range_start, origin, step)
+        while current + duration <= range_end:
+            starts.append(current)
+            if len(starts) >= limit:
+                return starts
+            current += step
+    return starts
+
+
+def load_free_ranges(db: Session, coach_ids: Sequence[UUID], start: datetime, end: datetime) -> Dict[UUID, List[Range]]:
+    """
+    コーチごとの空き区間（未予約の空き枠と繰り返しルールの枠を結合し、キャンセル以外の面談を差し引いたもの）
+
+    空き枠・ルール・面談ともに全コーチ分をまとめて取得する。
+    """
+    start, end = normalize(start), normalize(end)
+
+    slots: Dict[UUID, List[Range]] = defaultdict(list)
+    rows = db.query(
+        CoachAvailability.coach_id, CoachAvailability.available_start, CoachAvailability.available_end
+    ).filter(
+        CoachAvailability.coach_id.in_(coach_ids),
+        CoachAvailability.is_booked == False,
+        CoachAvailability.available_start < to_utc(end),
+        CoachAvailability.available_end > to_utc(start),
+    )
+    for coach_id, slot_start, slot_end in rows:
+        slots[coach_id].append((normalize(slot_start), normalize(slot_end)))
+    for rule, slot_start, slot_end in expand_virtual_slots(db, start, end, coach_ids, contained=False):
+        slots[rule.coach_id].append((slot_start, slot_end))
+
+    busy: Dict[UUID, List[Range]] = defaultdict(list)
+    appointments = db.query(
+        Appointment.coach_id, appointment_coaches.c.coach_id, Appointment.appointment_date, Appointment.duration_minutes
+    ).outerjoin(
+        appointment_coaches, appointment_coaches.c.appointment_id == Appointment.appointment_id
+    ).filter(
+        or_(Appointment.coach_id.in_(coach_ids), appointment_coaches.c.coach_id.in_(coach_ids)),
+        Appointment.status != CANCELLED_STATUS,
+        Appointment.appointment_date < to_utc(end),
+        Appointment.appointment_date > to_utc(start) - MAX_APPOINTMENT_DURATION,
+    )
+    for primary_coach_id, co_coach_id, appointment_date, duration in appointments:
+        appointment_start = normalize(appointment_date)
+        appointment_end = appointment_start + timedelta(minutes=duration or DEFAULT_DURATION_MINUTES)
+        for coach_id in {primary_coach_id, co_coach_id}:
+            if coach_id is not None:
+                busy[coach_id].append((appointment_start, appointment_end))
+
+    return {
+        coach_id: clip_ranges(subtract_ranges(merge_ranges(slots[coach_id]), merge_ranges(busy[coach_id])), start, end)
+        for coach_id in coach_ids
+    }
@@ -0,0 +1,136 @@
+"""
+区間木（AVL木を各ノードの最大終了時刻で拡張したもの）
+
+区間はすべて半開区間 [start, end) として扱う。
+重なりの有無の判定は O(log n)、重なる区間の列挙は O(log n + k)。
+"""
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "max_end", "height", "left", "right")
+
+    def __init__(self, start, end, value):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.max_end = end
+        self.height = 1
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+def _height(node: Optional[_Node]) -> int:
+    return node.height if node else 0
+
+
+def _update(node: _Node) -> None:
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    if node.left and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+
+
+def _rotate_right(node: _Node) -> _Node:
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node: _Node) -> _Node:
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rebalance(node: _Node) -> _Node:
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """
+    区間の重なり検索用の木
+
+    Args:
+        intervals: 初期値として登録する (start, end, value) の並び
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, Any]] = ()):
+        self._root: Optional[_Node] = None
+        self._size = 0
+        for start, end, value in intervals:
+            self.insert(start, end, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, start, end, value: Any = None) -> None:
+        """区間を追加"""
+        if not start < end:
+            raise ValueError("Interval end must be after start")
+        self._root = self._insert(self._root, _Node(start, end, value))
+        self._size += 1
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if (new.start, new.end) < (node.start, node.end):
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        return _rebalance(node)
+
+    def overlaps(self, start, end) -> bool:
+        """[start, end) と重なる区間があるか（O(log n)）"""
+        return self.find_any(start, end) is not None
+
+    def find_any(self, start, end) -> Optional[Tuple[Any, Any, Any]]:
+        """[start, end) と重なる区間を1つ返す（なければNone）"""
+        node = self._root
+        while node is not None:
+            if node.start < end and start < node.end:
+                return node.start, node.end, node.value
+            # 左部分木に start より後に終わる区間があれば、重なる区間があるとすれば左側にある
+            if node.left is not None and node.left.max_end > start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def find_all(self, start, end) -> List[Tuple[Any, Any, Any]]:
+        """[start, end) と重なる区間を開始順にすべて返す"""
+        found: List[Tuple[Any, Any, Any]] = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            # 部分木の最大終了時刻が start 以下なら重なる区間はない
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break  # 以降はすべて end 以降に始まる
+            if start < node.end:
+                found.append((node.start, node.end, node.value))
+            node = node.right
+        return found
@@ -0,0 +1,172 @@
+"""
+定期メンテナンス処理
+
+終了した未予約の空き枠・期限切れの繰り返しルールの削除と、過去の面談のアーカイブへの移動を行う。
+空き枠・面談の削除は差分同期（GET /api/sync）用に削除の記録を残し、保持期間を過ぎた記録を削除する。
+いずれも主キーを batch_size 件ずつ取得して処理し、バッチごとにコミットする（長時間のロックを避けるため）。
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, selectinload
+from app.models.appointment import (
+    Appointment,
+    AppointmentArchive,
+    CoachAvailability,
+    CoachAvailabilityRule,
+    appointment_coaches,
+)
+from app.models.sync import SyncTombstone
+from app.utils.sync import ENTITY_APPOINTMENTS, ENTITY_COACH_AVAILABILITY, record_tombstones
+
+
+@dataclass
+class MaintenanceReport:
+    """メンテナンスの処理件数"""
+    dry_run: bool = False
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, name: str, count: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + count
+
+
+def _run_batches(db: Session, fetch_ids: Callable[[], List], process: Callable[[List], None], dry_run: bool,
+                 count: Callable[[], int]) -> int:
+    """fetch_ids が空になるまで process を繰り返す（dry_run なら対象件数を数えるだけ）"""
+    if dry_run:
+        return count()
+    total = 0
+    while True:
+        ids = fetch_ids()
+        if not ids:
+            return total
+        process(ids)
+        db.commit()
+        total += len(ids)
+
+
+def purge_expired_slots(db: Session, before: datetime, batch_size: int, dry_run: bool = False, booked: bool = False) -> int:
+    """
+    before より前に終了した空き枠を削除
+
+    Args:
+        booked: Falseなら未予約の枠、Trueなら予約済みの枠（面談のアーカイブ後に削除）
+    """
+    condition = (CoachAvailability.is_booked == booked, CoachAvailability.available_end < before)
+
+    def process(ids: List) -> None:
+        record_tombstones(db.connection(), ENTITY_COACH_AVAILABILITY, [(i, None) for i in ids])
+        db.execute(delete(CoachAvailability).where(CoachAvailability.availability_id.in_(ids)))
+
+    return _run_batches(
+        db,
+        lambda: db.scalars(select(CoachAvailability.availability_id).where(*condition).limit(batch_size)).all(),
+        process,
+        dry_run,
+        lambda: db.query(CoachAvailability).filter(*condition).count(),
+    )
+
+
+def purge_expired_rules(db: Session, before: datetime, batch_size: int, dry_run: bool = False) -> int:
+    """適用終了日が before より前の繰り返し空き枠ルールを削除"""
+    condition = (CoachAvailabilityRule.valid_until.is_not(None), CoachAvailabilityRule.valid_until < before.date())
+    return _run_batches(
+        db,
+        lambda: db.scalars(select(CoachAvailabilityRule.rule_id).where(*condition).limit(batch_size)).all(),
+        lambda ids: db.execute(delete(CoachAvailabilityRule).where(CoachAvailabilityRule.rule_id.in_(ids))),
+        dry_run,
+        lambda: db.query(CoachAvailabilityRule).filter(*condition).count(),
+    )
+
+
+def _archive_batch(db: Session, ids: List) -> None:
+    appointments = db.query(Appointment).options(selectinload(Appointment.coaches)).filter(
+        Appointment.appointment_id.in_(ids)
+    ).all()
+    db.execute(insert(AppointmentArchive), [
+        {
+            "appointment_id": a.appointment_id,
+            "client_id": a.client_id,
+            "coach_id": a.coach_id,
+            "coach_ids": [str(c.coach_id) for c in a.coaches],
+            "appointment_date": a.appointment_date,
+            "duration_minutes": a.duration_minutes,
+            "appointment_type": a.appointment_type,
+            "status": a.status,
+            "mtg_url": a.mtg_url,
+            "notes": a.notes,
+            "created_at": a.created_at,
+            "updated_at": a.updated_at,
+        }
+        for a in appointments
+    ])
+    record_tombstones(db.connection(), ENTITY_APPOINTMENTS, [(a.appointment_id, a.client_id) for a in appointments])
+    # SQLiteでは外部キーのCASCADEが効かない場合があるため中間テーブルも明示的に削除
+    db.execute(delete(appointment_coaches).where(appointment_coaches.c.appointment_id.in_(ids)))
+    db.execute(delete(Appointment).where(Appointment.appointment_id.in_(ids)))
+    db.expunge_all()
+
+
+def archive_appointments(db: Session, before: datetime, batch_size: int, dry_run: bool = False) -> int:
+    """面談日時が before より前の面談を appointments_archive へ移動（移動と削除は同じトランザクション）"""
+    condition = (Appointment.appointment_date < before,)
+    return _run_batches(
+        db,
+        lambda: db.scalars(
+            select(Appointment.appointment_id).where(*condition).order_by(Appointment.appointment_date).limit(batch_size)
+        ).all(),
+        lambda ids: _archive_batch(db, ids),
+        dry_run,
+        lambda: db.query(Appointment).filter(*condition).count(),
+    )
+
+
+def purge_tombstones(db: Session, before: datetime, batch_size: int, dry_run: bool = False) -> int:
+    """before より前の差分同期用の削除の記録を削除"""
+    condition = (SyncTombstone.deleted_at < before,)
+    return _run_batches(
+        db,
+        lambda: db.scalars(select(SyncTombstone.tombstone_id).where(*condition).limit(batch_size)).all(),
+        lambda ids: db.execute(delete(SyncTombstone).where(SyncTombstone.tombstone_id.in_(ids))),
+        dry_run,
+        lambda: db.query(SyncTombstone).filter(*condition).count(),
+    )
+
+
+def run_maintenance(
+    db: Session,
+    slot_retention_days: int,
+    archive_days: int,
+    batch_size: int,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+    tombstone_retention_days: int = 30
+) -> MaintenanceReport:
+    """
+    メンテナンス処理をすべて実行
+
+    Args:
+        slot_retention_days: 終了から指定日数を過ぎた未予約の空き枠を削除
+        archive_days: 指定日数より前の面談をアーカイブへ移動（0以下なら移動しない）
+        batch_size: 1トランザクションで処理する最大行数
+        dry_run: Trueなら削除・移動せず対象件数のみ数える
+        tombstone_retention_days: 指定日数より前の差分同期用の削除の記録を削除
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    now = now or datetime.now(timezone.utc)
+    report = MaintenanceReport(dry_run=dry_run)
+
+    slot_cutoff = now - timedelta(days=slot_retention_days)
+    report.add("expired_slots_deleted", purge_expired_slots(db, slot_cutoff, batch_size, dry_run))
+    report.add("expired_rules_deleted", purge_expired_rules(db, slot_cutoff, batch_size, dry_run))
+
+    if archive_days > 0:
+        archive_cutoff = now - timedelta(days=archive_days)
+        report.add("appointments_archived", archive_appointments(db, archive_cutoff, batch_size, dry_run))
+        report.add("booked_slots_deleted", purge_expired_slots(db, archive_cutoff, batch_size, dry_run, booked=True))
+
+    tombstone_cutoff = now - timedelta(days=tombstone_retention_days)
+    report.add("tombstones_deleted", purge_tombstones(db, tombstone_cutoff, batch_size, dry_run))
+    return report
@@ -0,0 +1,78 @@
+"""
+キーセットページネーション用ユーティリティ
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional
+from uuid import UUID
+from fastapi import HTTPException, Response
+from sqlalchemy import String, literal
+from sqlalchemy.orm import Session
+
+# 次ページのカーソルを返すレスポンスヘッダー（レスポンス本文は従来どおり配列のまま）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+MAX_PAGE_SIZE = 200
+# limit を指定しない一覧の件数
+DEFAULT_PAGE_SIZE = 50
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """ソートキーの値をカーソル文字列に変換"""
+    payload = json.dumps([_to_json_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Optional[str]]:
+    """カーソル文字列をソートキーの値（文字列）のリストに戻す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def parse_cursor_value(value: Optional[str], parser) -> Any:
+    """カーソルの値を型変換（不正な値は400）"""
+    if value is None:
+        return None
+    try:
+        return parser(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def datetime_cursor_param(db: Session, value: Optional[datetime]):
+    """
+    カーソル比較用のdatetimeパラメータ
+
+    SQLiteでは server_default(CURRENT_TIMESTAMP) の値がマイクロ秒なしの文字列で格納されるため、
+    同じ形式の文字列として比較する（SQLAlchemyの既定ではマイクロ秒付きでバインドされ一致しない）。
+    """
+    if value is None or db.get_bind().dialect.name != "sqlite":
+        return value
+    fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+    return literal(value.strftime(fmt), String)
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """次ページが存在する場合にカーソルをヘッダーに設定"""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def escape_like(value: str) -> str:
+    """LIKE検索用に % と _ をエスケープ（ESCAPE '\\' と併用）"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
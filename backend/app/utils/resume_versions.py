@@ -0,0 +1,224 @@
+"""
+職務経歴書の版の差分保存
+
+利用者ごとの最新版（と KEYFRAME_INTERVAL ごとの版）だけ本文（content）を全文で保存し、
+それ以外の版は「1つ新しい版から自分を復元する差分」（content_delta）として保存する
+（差分の方が全文より大きくなる場合は全文のまま）。
+古い版は最新版（または途中の全文の版）から差分を順に当てて復元する。
+
+差分は行単位で、新しい版の行範囲の参照 [開始, 終了] と、追加する文字列を並べたJSON。
+
+版番号は利用者ごとのカウンター行（resume_version_counters）を1文で更新して採番する。
+カウンター行の行ロック（SQLiteではデータベースの書き込みロック）はコミットまで保持されるため、
+同じ利用者の版の追加・本文の変更・削除は順に実行され、差分の基準の版が入れ違うこともない。
+"""
+import difflib
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+from app.models.resume import Resume, ResumeVersionCounter
+
+# この版番号の倍数の版は全文で保存する（復元時に当てる差分の数の上限）
+KEYFRAME_INTERVAL = 10
+
+
+def _update_counter(db: Session, client_id: UUID, increment: int) -> int:
+    """
+    カウンター行を増やして（なければ既存の最大の版番号から作成して）値を返す
+
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING の1文で行うため、同時に実行しても同じ値は返らない。
+    """
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    current_max = select(func.coalesce(func.max(Resume.version_number), 0)).where(
+        Resume.client_id == client_id
+    ).scalar_subquery()
+    statement = insert(ResumeVersionCounter).values(client_id=client_id, last_version=current_max + increment)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ResumeVersionCounter.client_id],
+        set_={"last_version": ResumeVersionCounter.last_version + increment},
+    ).returning(ResumeVersionCounter.last_version)
+    return db.execute(statement).scalar_one()
+
+
+def allocate_version_number(db: Session, client_id: UUID) -> int:
+    """利用者の次の版番号を採番（トランザクションの終了まで同じ利用者の採番・変更を待たせる）"""
+    return _update_counter(db, client_id, 1)
+
+
+def lock_versions(db: Session, client_id: UUID) -> None:
+    """利用者の版の変更をトランザクションの終了まで排他する（版番号は進めない）"""
+    _update_counter(db, client_id, 0)
+
+
+def latest_version(db: Session, client_id: UUID) -> Optional[Resume]:
+    """利用者の最新版（ロックの取得後に、他のトランザクションの変更を反映して取得）"""
+    return db.query(Resume).populate_existing().filter(
+        Resume.client_id == client_id
+    ).order_by(Resume.version_number.desc()).first()
+
+
+def make_delta(base: str, target: str) -> str:
+    """base から target を復元する差分"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops: list = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            # 置換・挿入は target 側の文字列をそのまま持つ（削除は何も出力しない）
+            inserted = "".join(target_lines[j1:j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += inserted
+            else:
+                ops.append(inserted)
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """make_delta で作った差分を base に当てて復元"""
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        op if isinstance(op, str) else "".join(base_lines[op[0]:op[1]])
+        for op in json.loads(delta)
+    )
+
+
+def is_keyframe(version_number: int) -> bool:
+    return version_number % KEYFRAME_INTERVAL == 0
+
+
+def reconstruct_chain(rows: Sequence) -> Dict[UUID, Optional[str]]:
+    """
+    1人の利用者の版（版番号の降順）の本文をすべて復元
+
+    Args:
+        rows: resume_id, version_number, content, content_delta を持つ行（版番号の降順）
+    """
+    contents: Dict[UUID, Optional[str]] = {}
+    current: Optional[str] = None
+    for row in rows:
+        if row.content_delta is None:
+            current = row.content
+        elif current is None:
+            raise HTTPException(status_code=500, detail="Resume version history is inconsistent")
+        else:
+            current = apply_delta(current, row.content_delta)
+        contents[row.resume_id] = current
+    return contents
+
+
+def _load_chains(db: Session, client_ids: Iterable[UUID]) -> Dict[UUID, list]:
+    """利用者ごとの版（本文の復元に必要な列のみ、版番号の降順）を1回のクエリで取得"""
+    rows = db.query(
+        Resume.resume_id, Resume.client_id, Resume.version_number, Resume.content, Resume.content_delta
+    ).filter(Resume.client_id.in_(list(client_ids))).order_by(Resume.client_id, Resume.version_number.desc()).all()
+    chains: Dict[UUID, list] = defaultdict(list)
+    for row in rows:
+        chains[row.client_id].append(row)
+    return chains
+
+
+def resolve_contents(db: Session, resumes: Iterable[Resume]) -> None:
+    """差分で保存されている版の本文を復元してインスタンスに設定（変更扱いにはしない）"""
+    pending = [r for r in resumes if r.content_delta is not None]
+    if not pending:
+        return
+    chains = _load_chains(db, {r.client_id for r in pending})
+    contents: Dict[UUID, Optional[str]] = {}
+    for rows in chains.values():
+        contents.update(reconstruct_chain(rows))
+    for resume in pending:
+        set_committed_value(resume, "content", contents.get(resume.resume_id))
+        resume.full_content = contents.get(resume.resume_id)
+
+
+def _store(resume: Resume, content: Optional[str], newer_content: Optional[str]) -> None:
+    """1つ新しい版の本文 newer_content を基準に、版の本文を全文または差分で保存（差分の方が小さい場合のみ差分）"""
+    delta = None
+    if newer_content is not None and content is not None and not is_keyframe(resume.version_number):
+        delta = make_delta(newer_content, content)
+    if delta is None or len(delta) >= len(content):
+        resume.content = content
+        resume.content_delta = None
+        # 復元した本文は変更なしの値として設定しているため、同じ値でも必ず保存する
+        flag_modified(resume, "content")
+    else:
+        resume.content = None
+        resume.content_delta = delta
+    resume.full_content = content
+
+
+def _client_versions(db: Session, client_id: UUID) -> List[Resume]:
+    lock_versions(db, client_id)
+    versions = db.query(Resume).populate_existing().filter(
+        Resume.client_id == client_id
+    ).order_by(Resume.version_number.desc()).all()
+    resolve_contents(db, versions)
+    return versions
+
+
+def append_version(db: Session, previous: Optional[Resume], new_resume: Resume) -> None:
+    """
+    新しい最新版を追加する前に、それまでの最新版を差分での保存に切り替える
+
+    Args:
+        previous: それまでの最新版（なければNone）。allocate_version_number の後に取得すること
+        new_resume: 追加する版（本文は全文で保存される）
+    """
+    new_resume.content_delta = None
+    if previous is None or previous.content_delta is not None:
+        return
+    _store(previous, previous.content, new_resume.content)
+
+
+def set_content(db: Session, resume: Resume, content: Optional[str]) -> None:
+    """版の本文を変更（1つ古い版の差分も新しい本文を基準に作り直す）"""
+    versions = _client_versions(db, resume.client_id)
+    index = next(i for i, v in enumerate(versions) if v.resume_id == resume.resume_id)
+    newer = versions[index - 1] if index > 0 else None
+    older = versions[index + 1] if index + 1 < len(versions) else None
+
+    _store(resume, content, newer.content if newer else None)
+    if older is not None and older.content_delta is not None:
+        _store(older, older.content, content)
+
+
+def remove_version(db: Session, resume: Resume) -> None:
+    """版を削除する前に、1つ古い版の差分を1つ新しい版を基準に作り直す"""
+    versions = _client_versions(db, resume.client_id)
+    index = next(i for i, v in enumerate(versions) if v.resume_id == resume.resume_id)
+    newer = versions[index - 1] if index > 0 else None
+    older = versions[index + 1] if index + 1 < len(versions) else None
+    if older is not None:
+        _store(older, older.content, newer.content if newer else None)
+
+
+def compact_client(db: Session, client_id: UUID) -> int:
+    """利用者の版を最新版・区切りの版以外すべて差分での保存に変換し、変換した版数を返す"""
+    versions = _client_versions(db, client_id)
+    # 変換すると content はNULLになるため、先に全版の本文を取得しておく
+    contents = [resume.content for resume in versions]
+    converted = 0
+    for index, resume in enumerate(versions):
+        was_delta = resume.content_delta is not None
+        _store(resume, contents[index], contents[index - 1] if index > 0 else None)
+        converted += resume.content_delta is not None and not was_delta
+    return converted
+
+
+def unified_diff(old: Optional[str], new: Optional[str], old_label: str, new_label: str) -> str:
+    """2つの本文の unified diff"""
+    return "".join(difflib.unified_diff(
+        (old or "").splitlines(keepends=True),
+        (new or "").splitlines(keepends=True),
+        fromfile=old_label,
+        tofile=new_label,
+    ))
@@ -0,0 +1,167 @@
+"""
+空き枠・面談の重複検出
+
+PostgreSQLでは GiST の排他制約（migration_add_schedule_exclusion_constraints.sql）が最終的な保証となり、
+ここでの検出はエラーを分かりやすく返すための事前チェックを兼ねる。
+SQLiteには排他制約がないため、候補行をインデックス付きの範囲検索で取得し、区間木で重なりを判定する。
+
+SQLiteはオフセットを保存せず時刻だけを保存するため、日時は書き込み・検索条件とも to_utc でUTCに揃えて渡す。
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.appointment import Appointment, CoachAvailability, appointment_coaches
+from app.utils.interval_tree import IntervalTree
+
+CANCELLED_STATUS = 'キャンセル'
+DEFAULT_DURATION_MINUTES = 30
+
+# 面談の重複候補を開始日時で絞り込む際の最大面談時間
+MAX_APPOINTMENT_DURATION = timedelta(hours=24)
+
+# PostgreSQLの排他制約違反（exclusion_violation）
+EXCLUSION_VIOLATION = "23P01"
+
+Range = Tuple[datetime, datetime]
+
+
+def normalize(value: datetime) -> datetime:
+    """比較用にタイムゾーン付きの日時をUTCのnaiveな日時に揃える（SQLiteはタイムゾーンを保持しない）"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def to_utc(value: datetime) -> datetime:
+    """DBへの書き込み・検索条件用にUTCのタイムゾーン付き日時に揃える（naiveな日時はUTCとみなす）"""
+    return normalize(value).replace(tzinfo=timezone.utc)
+
+
+def appointment_range(appointment: Appointment) -> Range:
+    """面談の時間帯 [開始, 終了)"""
+    start = appointment.appointment_date
+    return start, start + timedelta(minutes=appointment.duration_minutes or DEFAULT_DURATION_MINUTES)
+
+
+def is_exclusion_violation(error: IntegrityError) -> bool:
+    """排他制約（時間帯の重複）違反かどうか"""
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
+
+
+def _format_range(start: datetime, end: datetime) -> str:
+    return f"{start:%Y-%m-%d %H:%M}-{end:%H:%M}"
+
+
+def availability_index(db: Session, coach_id: UUID, start: datetime, end: datetime) -> IntervalTree:
+    """コーチの [start, end) にかかる既存の空き枠の区間木"""
+    rows = db.query(
+        CoachAvailability.available_start, CoachAvailability.available_end, CoachAvailability.availability_id
+    ).filter(
+        CoachAvailability.coach_id == coach_id,
+        CoachAvailability.available_start < to_utc(end),
+        CoachAvailability.available_end > to_utc(start),
+    ).all()
+    return IntervalTree((normalize(s), normalize(e), availability_id) for s, e, availability_id in rows)
+
+
+def find_availability_conflicts(db: Session, coach_id: UUID, ranges: Sequence[Range]) -> List[Range]:
+    """
+    既存の空き枠と重なる枠を返す
+
+    対象期間の既存枠を1回の範囲検索で取得して区間木を作り、各枠を O(log n) で判定する。
+    """
+    if not ranges:
+        return []
+    index = availability_index(
+        db, coach_id, min(normalize(s) for s, _ in ranges), max(normalize(e) for _, e in ranges)
+    )
+    if not len(index):
+        return []
+    return [(s, e) for s, e in ranges if index.overlaps(normalize(s), normalize(e))]
+
+
+def raise_availability_conflict(conflicts: Sequence[Range]) -> None:
+    shown = ", ".join(_format_range(s, e) for s, e in conflicts[:5])
+    more = f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else ""
+    raise HTTPException(status_code=409, detail=f"Availability overlaps existing slots: {shown}{more}")
+
+
+def find_appointment_conflicts(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    coach_ids: Iterable[UUID] = (),
+    client_id: Optional[UUID] = None,
+    exclude_appointment_id: Optional[UUID] = None
+) -> List[Appointment]:
+    """同じコーチ（主担当・共同担当）または利用者の、キャンセルされていない面談で時間帯が重なるもの"""
+    coach_ids = list(coach_ids)
+    participants = []
+    if coach_ids:
+        participants.append(Appointment.coach_id.in_(coach_ids))
+        participants.append(Appointment.appointment_id.in_(
+            db.query(appointment_coaches.c.appointment_id).filter(appointment_coaches.c.coach_id.in_(coach_ids))
+        ))
+    if client_id:
+        participants.append(Appointment.client_id == client_id)
+    if not participants:
+        return []
+
+    query = db.query(Appointment).filter(
+        or_(*participants),
+        Appointment.status != CANCELLED_STATUS,
+        Appointment.appointment_date < to_utc(end),
+        Appointment.appointment_date > to_utc(start) - MAX_APPOINTMENT_DURATION,
+    )
+    if exclude_appointment_id:
+        query = query.filter(Appointment.appointment_id != exclude_appointment_id)
+
+    index = IntervalTree(
+        (normalize(s), normalize(e), appointment)
+        for appointment in query.all()
+        for s, e in [appointment_range(appointment)]
+    )
+    return [appointment for _, _, appointment in index.find_all(normalize(start), normalize(end))]
+
+
+def ensure_no_appointment_conflict(db: Session, start: datetime, end: datetime, coach_ids: Iterable[UUID],
+                                   client_id: Optional[UUID], exclude_appointment_id: Optional[UUID] = None) -> None:
+    """重なる面談があれば409"""
+    conflicts = find_appointment_conflicts(db, start, end, coach_ids, client_id, exclude_appointment_id)
+    if conflicts:
+        shown = ", ".join(_format_range(*appointment_range(a)) for a in conflicts[:5])
+        raise HTTPException(status_code=409, detail=f"Appointment overlaps existing appointments: {shown}")
+
+
+def set_slots_booked(db: Session, coach_ids: Iterable[UUID], start: datetime, end: datetime, booked: bool) -> int:
+    """コーチの [start, end) にかかる空き枠の予約状態を更新（同じトランザクション内で実行）"""
+    coach_ids = list(coach_ids)
+    if not coach_ids:
+        return 0
+    result = db.execute(
+        update(CoachAvailability)
+        .where(
+            CoachAvailability.coach_id.in_(coach_ids),
+            CoachAvailability.available_start < to_utc(end),
+            CoachAvailability.available_end > to_utc(start),
+            CoachAvailability.is_booked == (not booked),
+        )
+        .values(is_booked=booked)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def commit_schedule(db: Session, detail: str = "Schedule overlaps an existing entry") -> None:
+    """コミットし、排他制約違反（同時登録による重複）は409として返す"""
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_exclusion_violation(e):
+            raise HTTPException(status_code=409, detail=detail)
+        raise
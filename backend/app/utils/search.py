@@ -0,0 +1,295 @@
+"""
+顧客・応募・職務経歴書の横断検索
+
+日本語は形態素解析を使わず、正規化（NFKC・小文字化・カタカナをひらがなに統一）した文字列を
+2文字ずつのバイグラムに分割して索引する。英数字は単語単位で、検索時は前方一致とする。
+文書（search_documents）はセッションの flush 時に同じトランザクションで更新する。
+
+- PostgreSQL: tokens から生成した tsvector（GIN）と title_norm の pg_trgm（GIN）で検索・順位付け
+- SQLite: FTS5 の仮想テーブル search_fts（bm25で順位付け）。FTS5が使えない環境では LIKE で代替
+"""
+import re
+import unicodedata
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import bindparam, case, cast, column, delete, event, func, insert, literal_column, select, table, text
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.application import Application
+from app.models.resume import Resume
+from app.models.search import SearchDocument
+from app.models.user import Client
+from app.utils.pagination import escape_like
+from app.utils.resume_versions import resolve_contents
+
+ENTITY_CLIENT = "client"
+ENTITY_APPLICATION = "application"
+ENTITY_RESUME = "resume"
+ENTITY_TYPES = (ENTITY_CLIENT, ENTITY_APPLICATION, ENTITY_RESUME)
+
+# 抜粋の前後の文字数
+SNIPPET_CONTEXT = 40
+# タイトルに検索語を含む場合に加算するスコア
+TITLE_MATCH_BOOST = 1.0
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[^\W_a-z0-9]+")
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+
+_search_fts = table("search_fts", column("doc_id"), column("tokens"))
+
+# SQLiteでFTS5が使えるか（エンジンごとに初回に確認）
+_fts_available: Dict[int, bool] = {}
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """検索用の正規化（全角・半角の統一、小文字化、カタカナをひらがなに統一）"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).lower()
+    return "".join(chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in value)
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """正規化した文字列を英数字の単語と、それ以外の文字列のバイグラム（1文字のみの場合はその文字）に分割"""
+    tokens: List[str] = []
+    for run in _TOKEN_PATTERN.findall(normalize_text(value)):
+        if _ASCII_WORD.fullmatch(run) or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _is_prefix_token(token: str) -> bool:
+    # 英数字の単語と1文字だけの語は前方一致で検索する（入力途中の語・1文字の検索に対応）
+    return len(token) == 1 or bool(_ASCII_WORD.fullmatch(token))
+
+
+def _client_name(client: Client) -> str:
+    full_name = f"{client.last_name or ''} {client.first_name or ''}".strip()
+    return client.name or full_name or client.email
+
+
+def build_document(obj) -> Optional[dict]:
+    """モデルのインスタンスから検索文書（search_documents の1行分）を作成"""
+    if isinstance(obj, Client):
+        entity_type, entity_id, client_id = ENTITY_CLIENT, obj.client_id, obj.client_id
+        title = _client_name(obj)
+        body = " ".join(filter(None, [
+            obj.furigana, obj.last_name_kana, obj.first_name_kana, obj.email, obj.company_name, obj.occupation,
+        ]))
+    elif isinstance(obj, Application):
+        entity_type, entity_id, client_id = ENTITY_APPLICATION, obj.application_id, obj.client_id
+        title = obj.company_name
+        body = " ".join(filter(None, [obj.selection_stage, obj.notes]))
+    elif isinstance(obj, Resume):
+        entity_type, entity_id, client_id = ENTITY_RESUME, obj.resume_id, obj.client_id
+        title = f"職務経歴書 第{obj.version_number}版"
+        body = obj.content if obj.content is not None else obj.full_content
+        if body is None and obj.content_delta is not None:
+            # 差分で保存している版で本文を復元していない場合は既存の文書をそのまま使う
+            return None
+        body = body or ""
+    else:
+        return None
+    if entity_id is None or client_id is None:
+        return None
+    # 同じ語の重複は除く（索引の大きさを抑えるため、出現回数は順位に反映しない）
+    tokens = list(dict.fromkeys(tokenize(title) + tokenize(body)))
+    return {
+        "doc_id": uuid.uuid4(),
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "client_id": client_id,
+        "title": title or "",
+        "title_norm": normalize_text(title),
+        "body": body,
+        "tokens": " ".join(tokens),
+    }
+
+
+def _entity_key(obj) -> Optional[Tuple[str, UUID]]:
+    if isinstance(obj, Client):
+        return ENTITY_CLIENT, obj.client_id
+    if isinstance(obj, Application):
+        return ENTITY_APPLICATION, obj.application_id
+    if isinstance(obj, Resume):
+        return ENTITY_RESUME, obj.resume_id
+    return None
+
+
+def sqlite_fts_ready(connection: Connection) -> bool:
+    """SQLiteの場合、FTS5の仮想テーブルを（なければ）作成し、使えるかどうかを返す"""
+    if connection.dialect.name != "sqlite":
+        return False
+    key = id(connection.engine)
+    if key not in _fts_available:
+        try:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts "
+                "USING fts5(doc_id UNINDEXED, tokens, tokenize='unicode61 remove_diacritics 0')"
+            ))
+            _fts_available[key] = True
+        except OperationalError:
+            _fts_available[key] = False
+    return _fts_available[key]
+
+
+def write_documents(connection: Connection, documents: Sequence[dict], removed: Iterable[Tuple[str, UUID]] = ()) -> None:
+    """文書を置き換え（documents と removed の対象の既存文書を削除し、documents を1回のINSERTで登録）"""
+    ids_by_type: Dict[str, List[UUID]] = defaultdict(list)
+    for entity_type, entity_id in [*((d["entity_type"], d["entity_id"]) for d in documents), *removed]:
+        ids_by_type[entity_type].append(entity_id)
+    if not ids_by_type:
+        return
+
+    use_fts = sqlite_fts_ready(connection)
+    for entity_type, entity_ids in ids_by_type.items():
+        condition = (SearchDocument.entity_type == entity_type, SearchDocument.entity_id.in_(entity_ids))
+        if use_fts:
+            connection.execute(delete(_search_fts).where(
+                _search_fts.c.doc_id.in_(select(SearchDocument.doc_id).where(*condition))
+            ))
+        connection.execute(delete(SearchDocument).where(*condition))
+
+    if documents:
+        connection.execute(insert(SearchDocument), list(documents))
+        if use_fts:
+            connection.execute(insert(_search_fts), [
+                {"doc_id": d["doc_id"].hex, "tokens": d["tokens"]} for d in documents
+            ])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sync_search_documents(session, flush_context):
+    documents, removed = [], []
+    for obj in (*session.new, *session.dirty):
+        document = build_document(obj)
+        if document:
+            documents.append(document)
+    for obj in session.deleted:
+        key = _entity_key(obj)
+        if key:
+            removed.append(key)
+    if documents or removed:
+        write_documents(session.connection(), documents, removed)
+
+
+def rebuild_index(db: Session, batch_size: int = 500) -> Dict[str, int]:
+    """検索文書をすべて作り直す（既存データの取り込み・不整合の解消用）"""
+    connection = db.connection()
+    if sqlite_fts_ready(connection):
+        connection.execute(delete(_search_fts))
+    connection.execute(delete(SearchDocument))
+
+    counts = {}
+    for model, entity_type in ((Client, ENTITY_CLIENT), (Application, ENTITY_APPLICATION), (Resume, ENTITY_RESUME)):
+        count = 0
+        for objects in db.scalars(select(model).execution_options(yield_per=batch_size)).partitions():
+            if model is Resume:
+                resolve_contents(db, objects)
+            write_documents(connection, [d for d in map(build_document, objects) if d])
+            count += len(objects)
+        counts[entity_type] = count
+    db.commit()
+    return counts
+
+
+def _build_snippet(body: Optional[str], query: str, tokens: Sequence[str]) -> Optional[str]:
+    """本文中で検索語（なければ最初に見つかった語）の前後を切り出す"""
+    if not body:
+        return None
+    normalized = normalize_text(body)
+    position = -1
+    # 正規化で長さが変わる文字（半角カナ等）がなければ、正規化後の位置を元の文字列に使える
+    same_length = len(normalized) == len(body)
+    for needle in [normalize_text(query), *tokens]:
+        position = normalized.find(needle) if same_length else body.lower().find(needle)
+        if position >= 0:
+            break
+    if position < 0:
+        position = 0
+    start = max(0, position - SNIPPET_CONTEXT)
+    end = min(len(body), position + SNIPPET_CONTEXT * 2)
+    return ("…" if start > 0 else "") + body[start:end].replace("\n", " ") + ("…" if end < len(body) else "")
+
+
+def search_documents(
+    db: Session,
+    query: str,
+    entity_types: Sequence[str],
+    client_id: Optional[UUID],
+    limit: int,
+    offset: int = 0
+) -> Tuple[List[dict], bool]:
+    """
+    検索語のすべての語を含む文書を順位の高い順に返す
+
+    Args:
+        client_id: 指定した場合はその利用者の文書のみ（Noneなら全利用者）
+
+    Returns:
+        (結果のリスト, 続きがあるかどうか)
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return [], False
+    query_norm = normalize_text(query).strip()
+    connection = db.connection()
+    dialect = connection.dialect.name
+
+    title_boost = case(
+        (SearchDocument.title_norm.like("%" + escape_like(query_norm) + "%", escape="\\"), TITLE_MATCH_BOOST),
+        else_=0.0,
+    )
+    statement = select(SearchDocument, Client.name, Client.last_name, Client.first_name, Client.email).join(
+        Client, Client.client_id == SearchDocument.client_id
+    )
+
+    if dialect == "postgresql":
+        # tsquery の入力形式で語をそのまま渡す（パーサーを通さないため日本語のバイグラムもそのまま一致する）
+        tsquery = cast(bindparam("tsquery", " & ".join(
+            f"'{token}'" + (":*" if _is_prefix_token(token) else "") for token in tokens
+        )), TSQUERY)
+        tsv = literal_column("search_documents.tsv")
+        statement = statement.where(tsv.op("@@")(tsquery) | SearchDocument.title_norm.op("%")(query_norm))
+        score = func.ts_rank(tsv, tsquery) + func.similarity(SearchDocument.title_norm, query_norm) + title_boost
+    elif sqlite_fts_ready(connection):
+        match = " ".join(f'"{token}"' + ("*" if _is_prefix_token(token) else "") for token in tokens)
+        statement = statement.join(_search_fts, _search_fts.c.doc_id == SearchDocument.doc_id).where(
+            text("search_fts MATCH :match").bindparams(match=match)
+        )
+        # bm25 は小さいほど一致度が高い
+        score = -literal_column("bm25(search_fts)") + title_boost
+    else:
+        statement = statement.where(*(
+            SearchDocument.tokens.like("%" + escape_like(token) + "%", escape="\\") for token in tokens
+        ))
+        score = title_boost
+
+    statement = statement.add_columns(score.label("score"))
+    statement = statement.where(SearchDocument.entity_type.in_(entity_types))
+    if client_id is not None:
+        statement = statement.where(SearchDocument.client_id == client_id)
+    statement = statement.order_by(literal_column("score").desc(), SearchDocument.doc_id).limit(limit + 1).offset(offset)
+
+    rows = db.execute(statement).all()
+    has_more = len(rows) > limit
+    results = []
+    for document, name, last_name, first_name, email, score_value in rows[:limit]:
+        full_name = f"{last_name or ''} {first_name or ''}".strip()
+        results.append({
+            "entity_type": document.entity_type,
+            "entity_id": document.entity_id,
+            "client_id": document.client_id,
+            "client_name": name or full_name or email,
+            "title": document.title,
+            "snippet": _build_snippet(document.body, query, tokens),
+            "score": float(score_value or 0.0),
+        })
+    return results, has_more
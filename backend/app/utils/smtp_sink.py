@@ -0,0 +1,201 @@
+"""
+ローカル検証用の簡易SMTPサーバー（受信したメールをメモリに保持するだけで配送しない）
+
+使い方:
+    python -m app.utils.smtp_sink --port 1025
+
+    # .env
+    EMAIL_BACKEND=smtp
+    SMTP_HOST=localhost
+    SMTP_PORT=1025
+    SMTP_USE_TLS=False
+
+コードから使う場合:
+    with FakeSMTPServer() as sink:
+        ...  # sink.port に送信
+        sink.messages  # 受信したメール
+"""
+import argparse
+import email
+import email.header
+import socketserver
+import threading
+from email.message import Message
+from typing import List
+
+
+class ReceivedEmail:
+    """受信したメール"""
+
+    def __init__(self, mail_from: str, rcpt_to: List[str], data: bytes):
+        self.mail_from = mail_from
+        self.rcpt_to = rcpt_to
+        self.data = data
+
+    @property
+    def message(self) -> Message:
+        return email.message_from_bytes(self.data)
+
+    @property
+    def subject(self) -> str:
+        return str(email.header.make_header(email.header.decode_header(self.message['Subject'] or '')))
+
+    @property
+    def body(self) -> str:
+        for part in self.message.walk():
+            if part.get_content_type() == 'text/plain':
+                return part.get_payload(decode=True).decode(part.get_content_charset() or 'utf-8')
+        return ''
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """SMTPの最小限のコマンド（EHLO/AUTH/MAIL/RCPT/DATA/RSET/NOOP/QUIT）に応答"""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+    def handle(self) -> None:
+        sink: "FakeSMTPServer" = self.server.sink
+        with sink._lock:
+            sink.connections += 1
+        mail_from, rcpt_to = None, []
+        self._reply("220 fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self._reply("250-fake-smtp")
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 8BITMIME")
+            elif command == "HELO":
+                self._reply("250 fake-smtp")
+            elif command == "AUTH":
+                if argument.upper().startswith("LOGIN"):
+                    self._reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._reply("235 Authentication successful")
+            elif command == "MAIL":
+                mail_from, rcpt_to = argument.partition(":")[2].strip(), []
+                self._reply("250 OK")
+            elif command == "RCPT":
+                rcpt_to.append(argument.partition(":")[2].strip())
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                with sink._lock:
+                    if sink.fail_next > 0:
+                        sink.fail_next -= 1
+                        failed = True
+                    else:
+                        sink.messages.append(ReceivedEmail(mail_from, rcpt_to, data))
+                        failed = False
+                self._reply("451 Temporary failure" if failed else "250 OK")
+                mail_from, rcpt_to = None, []
+            elif command == "RSET":
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif command == "NOOP":
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif command == "STARTTLS":
+                self._reply("454 TLS not available")
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSMTPServer:
+    """
+    受信したメールを保持する簡易SMTPサーバー
+
+    Args:
+        host: 待ち受けアドレス
+        port: 待ち受けポート（0で空きポートを自動割り当て）
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = _ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self.messages: List[ReceivedEmail] = []
+        self.connections = 0
+        self.fail_next = 0  # 次のN件のDATAに一時エラー(451)を返す
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "FakeSMTPServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.messages.clear()
+            self.connections = 0
+            self.fail_next = 0
+
+    def __enter__(self) -> "FakeSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ローカル検証用SMTPサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    sink = FakeSMTPServer(args.host, args.port).start()
+    print(f"fake SMTP server listening on {sink.host}:{sink.port} (Ctrl+C で終了)")
+    seen = 0
+    try:
+        while True:
+            threading.Event().wait(1)
+            for received in sink.messages[seen:]:
+                print(f"--- {received.mail_from} -> {', '.join(received.rcpt_to)}")
+                print(f"件名: {received.subject}")
+                print(received.body)
+            seen = len(sink.messages)
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+NDJSONストリーミングレスポンス用ユーティリティ
+"""
+from typing import Iterator, Optional, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query
+from app.database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# サーバーサイドカーソルから一度に取得する行数
+STREAM_BATCH_SIZE = 500
+
+
+def _iter_ndjson(query: Query, schema: Type[BaseModel], limit: Optional[int]) -> Iterator[str]:
+    # リクエストのセッションはレスポンス送信前に閉じられるため、ストリーミング専用のセッションを使う
+    db = SessionLocal()
+    try:
+        stream_query = query.with_session(db).yield_per(STREAM_BATCH_SIZE)
+        if limit:
+            stream_query = stream_query.limit(limit)
+        for row in stream_query:
+            yield schema.model_validate(row).model_dump_json() + "\n"
+    finally:
+        db.close()
+
+
+def ndjson_response(query: Query, schema: Type[BaseModel], limit: Optional[int] = None) -> StreamingResponse:
+    """
+    クエリ結果を1行1JSONでストリーミング返却
+
+    yield_per によりサーバーサイドカーソルから少しずつ読み込み、結果全体をメモリに展開しない。
+    """
+    return StreamingResponse(_iter_ndjson(query, schema, limit), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,186 @@
+"""
+差分同期（GET /api/sync）
+
+顧客・応募・面談・職務経歴書・空き枠の、前回の同期以降に登録・更新された行と削除の記録（sync_tombstones）を返す。
+カーソルは対象ごとの (updated_at, 主キー) のキーセット位置で、最後のページでは
+「現在時刻 - SYNC_OVERLAP_SECONDS」を位置とする（コミットが遅れたトランザクションの変更を取りこぼさないよう、
+直近の変更は次回も再送する。クライアント側は主キーで上書きすれば重複は問題にならない）。
+削除の記録はセッションの flush 時（ORMでの削除）と、メンテナンスでの一括削除時に追加する。
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import and_, event, func, insert, or_, select, true
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+from app.database import SessionLocal
+from app.models.application import Application
+from app.models.appointment import Appointment, CoachAvailability, appointment_coaches
+from app.models.resume import Resume, ResumeReview
+from app.models.sync import SyncTombstone
+from app.models.user import Client, UserAuth
+from app.utils.pagination import datetime_cursor_param, decode_cursor, encode_cursor, parse_cursor_value
+from app.utils.scheduling import normalize
+
+ENTITY_CLIENTS = "clients"
+ENTITY_APPLICATIONS = "applications"
+ENTITY_APPOINTMENTS = "appointments"
+ENTITY_RESUMES = "resumes"
+ENTITY_COACH_AVAILABILITY = "coach_availability"
+DELETED = "deleted"
+
+Position = Tuple[Optional[datetime], Optional[Any]]
+
+
+@dataclass(frozen=True)
+class SyncSource:
+    """同期対象（取得クエリの組み立てとキーセットの列）"""
+    name: str
+    model: type
+    timestamp: Any
+    key: Any
+    key_parser: Callable[[str], Any]
+    options: tuple = ()
+
+
+SOURCES = (
+    SyncSource(ENTITY_CLIENTS, Client, Client.updated_at, Client.client_id, UUID),
+    SyncSource(ENTITY_APPLICATIONS, Application, Application.updated_at, Application.application_id, UUID,
+               (joinedload(Application.client),)),
+    SyncSource(ENTITY_APPOINTMENTS, Appointment, Appointment.updated_at, Appointment.appointment_id, UUID,
+               (joinedload(Appointment.client), selectinload(Appointment.coaches))),
+    SyncSource(ENTITY_RESUMES, Resume, Resume.updated_at, Resume.resume_id, UUID,
+               (selectinload(Resume.reviews).joinedload(ResumeReview.coach),)),
+    SyncSource(ENTITY_COACH_AVAILABILITY, CoachAvailability, CoachAvailability.updated_at,
+               CoachAvailability.availability_id, UUID, (joinedload(CoachAvailability.coach),)),
+    SyncSource(DELETED, SyncTombstone, SyncTombstone.deleted_at, SyncTombstone.tombstone_id, UUID),
+)
+
+
+def _tombstone_key(obj) -> Optional[Tuple[str, UUID, Optional[UUID]]]:
+    """削除の記録の (entity_type, entity_id, client_id)（同期対象でなければNone）"""
+    if isinstance(obj, Client):
+        return ENTITY_CLIENTS, obj.client_id, obj.client_id
+    if isinstance(obj, Application):
+        return ENTITY_APPLICATIONS, obj.application_id, obj.client_id
+    if isinstance(obj, Appointment):
+        return ENTITY_APPOINTMENTS, obj.appointment_id, obj.client_id
+    if isinstance(obj, Resume):
+        return ENTITY_RESUMES, obj.resume_id, obj.client_id
+    if isinstance(obj, CoachAvailability):
+        return ENTITY_COACH_AVAILABILITY, obj.availability_id, None
+    return None
+
+
+def record_tombstones(connection: Connection, entity_type: str, rows: Sequence[Tuple[UUID, Optional[UUID]]]) -> None:
+    """削除の記録を1回のINSERT（複数行）で追加（rows は (entity_id, client_id) のリスト）"""
+    if rows:
+        connection.execute(insert(SyncTombstone), [
+            {"entity_type": entity_type, "entity_id": entity_id, "client_id": client_id}
+            for entity_id, client_id in rows
+        ])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_deleted(session, flush_context):
+    grouped: Dict[str, List[Tuple[UUID, Optional[UUID]]]] = {}
+    for obj in session.deleted:
+        key = _tombstone_key(obj)
+        if key:
+            grouped.setdefault(key[0], []).append((key[1], key[2]))
+    for entity_type, rows in grouped.items():
+        record_tombstones(session.connection(), entity_type, rows)
+
+
+def encode_sync_cursor(positions: Dict[str, Position]) -> str:
+    values = []
+    for source in SOURCES:
+        values.extend(positions.get(source.name, (None, None)))
+    return encode_cursor(*values)
+
+
+def decode_sync_cursor(cursor: str) -> Dict[str, Position]:
+    values = decode_cursor(cursor, len(SOURCES) * 2)
+    positions = {}
+    for index, source in enumerate(SOURCES):
+        timestamp, key = values[index * 2], values[index * 2 + 1]
+        positions[source.name] = (
+            parse_cursor_value(timestamp, datetime.fromisoformat),
+            parse_cursor_value(key, source.key_parser),
+        )
+    return positions
+
+
+def _after(db: Session, source: SyncSource, position: Position):
+    """キーセット位置より後の行の条件（主キーのない位置はその時刻以降すべて）"""
+    timestamp, key = position
+    if timestamp is None:
+        return true()
+    param = datetime_cursor_param(db, timestamp)
+    if key is None:
+        return source.timestamp >= param
+    return or_(source.timestamp > param, and_(source.timestamp == param, source.key > key))
+
+
+def _scoped(query: Query, source: SyncSource, user: UserAuth) -> Query:
+    """利用者は自分のデータ（空き枠は全コーチ分）、コーチは担当の面談と全利用者のデータ"""
+    if user.user_type == "client":
+        client_id = user.client.client_id
+        if source.model is Client:
+            return query.filter(Client.client_id == client_id)
+        if source.model is SyncTombstone:
+            return query.filter(or_(SyncTombstone.client_id == client_id, SyncTombstone.client_id.is_(None)))
+        if source.model is CoachAvailability:
+            return query
+        return query.filter(source.model.client_id == client_id)
+    if user.user_type == "coach" and source.model is Appointment:
+        return query.join(appointment_coaches).filter(appointment_coaches.c.coach_id == user.coach.coach_id)
+    return query
+
+
+def sync_changes(
+    db: Session,
+    user: UserAuth,
+    positions: Optional[Dict[str, Position]],
+    limit: int,
+    overlap_seconds: int,
+    retention_days: int
+) -> Tuple[Dict[str, list], Dict[str, Position], bool, bool]:
+    """
+    カーソル位置より後の変更を対象ごとに最大 limit 件取得
+
+    Args:
+        positions: 前回のカーソル（Noneなら初回。全件を返し、削除の記録は返さない）
+
+    Returns:
+        (対象ごとの行, 次のカーソル位置, 続きがあるかどうか, 全件を取り直したかどうか)
+    """
+    now = db.scalar(select(func.now()))
+    horizon = now - timedelta(seconds=overlap_seconds)
+    reset = False
+    if positions is not None:
+        deleted_since = positions[DELETED][0]
+        # 削除の記録の保持期間より古いカーソルでは削除を取りこぼすため、全件を取り直す
+        if deleted_since is None or normalize(deleted_since) < normalize(now - timedelta(days=retention_days)):
+            positions, reset = None, True
+    if positions is None:
+        positions = {source.name: (None, None) for source in SOURCES}
+        positions[DELETED] = (horizon, None)
+
+    results, next_positions, has_more = {}, {}, False
+    for source in SOURCES:
+        position = positions[source.name]
+        query = _scoped(db.query(source.model), source, user).options(*source.options)
+        rows = query.filter(_after(db, source, position)).order_by(
+            source.timestamp.asc(), source.key.asc()
+        ).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_positions[source.name] = (getattr(last, source.timestamp.key), getattr(last, source.key.key))
+            has_more = True
+        else:
+            next_positions[source.name] = (horizon, None)
+        results[source.name] = rows
+    return results, next_positions, has_more, reset
@@ -0,0 +1,86 @@
+"""
+ログインスループット計測スクリプト
+
+起動中のAPIサーバーに対してログインを並列に送信し、同時に /health の応答時間を計測します。
+bcryptがイベントループをブロックしていれば、ログイン負荷中の /health が大きく遅延します。
+
+使い方:
+    uvicorn app.main:app --port 8000  # 別ターミナルで起動
+    python create_test_accounts.py    # coach@example.com / coach123 を作成
+    python benchmark_login.py --requests 200 --concurrency 20
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _request(url: str, body: dict = None) -> float:
+    """リクエストを送信し、応答時間（秒）を返す"""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(req) as res:
+        res.read()
+    return time.perf_counter() - started
+
+
+def _summary(label: str, samples: list) -> str:
+    if not samples:
+        return f"{label}: no samples"
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return (
+        f"{label}: n={len(ms)} p50={statistics.median(ms):.1f}ms "
+        f"p95={p95:.1f}ms max={ms[-1]:.1f}ms"
+    )
+
+
+def _probe_health(base_url: str, stop: threading.Event, samples: list, interval: float):
+    while not stop.is_set():
+        samples.append(_request(f"{base_url}/health"))
+        time.sleep(interval)
+
+
+def run_benchmark(base_url: str, email: str, password: str, total: int, concurrency: int):
+    """ログイン負荷をかけながら /health の応答時間を計測"""
+    # 負荷なしの基準値
+    idle_samples = [_request(f"{base_url}/health") for _ in range(20)]
+
+    stop = threading.Event()
+    health_samples: list = []
+    probe = threading.Thread(target=_probe_health, args=(base_url, stop, health_samples, 0.02))
+    probe.start()
+
+    login_body = {"email": email, "password": password}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        login_samples = list(pool.map(lambda _: _request(f"{base_url}/api/auth/login", login_body), range(total)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    probe.join()
+
+    print(f"logins: {total} in {elapsed:.2f}s ({total / elapsed:.1f} req/s, concurrency={concurrency})")
+    print(_summary("login latency", login_samples))
+    print(_summary("/health idle", idle_samples))
+    print(_summary("/health under login load", health_samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ログインスループットとイベントループ応答性の計測")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="coach@example.com")
+    parser.add_argument("--password", default="coach123")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    run_benchmark(args.base_url.rstrip("/"), args.email, args.password, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+一覧レスポンスのサイズ・CPU時間の計測スクリプト
+
+検証用のコーチ・利用者（自由記述の長い日本語テキスト付き）・職務経歴書・応募を作成し、
+大きな一覧のエンドポイントを、次の構成のアプリに対してプロセス内（ASGIを直接呼び出し）で計測します。
+
+    json         : 標準の JSONResponse・圧縮なし（変更前）
+    orjson       : ORJSONResponse・圧縮なし
+    orjson+gzip  : ORJSONResponse・gzip（COMPRESSION_GZIP_LEVEL）
+    orjson+br    : ORJSONResponse・brotli（COMPRESSION_BROTLI_QUALITY、brotli がインストールされている場合）
+
+CPU時間はプロセス全体（同期ハンドラーを実行するスレッドを含む）の process_time で、DBの読み込みも含みます。
+DATABASE_URL のDBに対して実行し、終了後に検証用のデータを削除します（既存のデータも一覧に含まれます）。
+
+使い方:
+    python benchmark_responses.py                      # 利用者200人、各20リクエスト
+    python benchmark_responses.py --clients 500 --requests 50
+"""
+import argparse
+import time
+import uuid
+from datetime import date, timedelta
+import anyio
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import delete, insert
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.api import applications, clients, resumes
+from app.models.application import Application
+from app.models.resume import Resume
+from app.models.user import Client, Coach, UserAuth
+from app.utils.auth import create_access_token
+from app.utils.compression import ENCODING_BROTLI, ENCODING_GZIP, CompressionMiddleware, brotli_available
+
+ENDPOINTS = (
+    "/api/clients",
+    "/api/resumes/coach/pending",
+    "/api/applications",
+)
+
+WILL_CAN_MUST = (
+    "【Will】急性期病院での経験を活かし、在宅医療の分野で患者様とご家族に寄り添う看護を実践したい。\n"
+    "【Can】救急外来でのトリアージ、夜勤リーダー、新人教育プログラムの立案と運用。\n"
+    "【Must】日勤中心の勤務形態、年収500万円以上、通勤時間1時間以内。\n"
+)
+STRENGTHS = "着想・学習欲・責任感・共感性・調和性。新しい手順を覚えるのが早く、チームの意見をまとめる役割を任されることが多い。\n"
+RESUME_LINE = "{0}. 急性期病棟（循環器内科・40床）にて看護業務、リーダー業務、新人教育を担当。業務改善委員として記録様式の見直しを主導。\n"
+NOTES = "一次面接で看護部長と面談。夜勤体制（2交代）と教育体制、院内保育所の空き状況について確認。次回は施設見学の予定。"
+
+
+def build_app(response_class, encoding=None) -> FastAPI:
+    """計測対象のルーターだけを登録したアプリ（main.py と同じルーターを使う）"""
+    app = FastAPI(default_response_class=response_class)
+    for module in (clients, resumes, applications):
+        app.include_router(module.router)
+    if encoding:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            use_brotli=encoding == ENCODING_BROTLI,
+        )
+    return app
+
+
+def seed(db, count: int) -> dict:
+    """検証用のデータを一括INSERTで作成（検索文書等の更新処理は通さない）"""
+    run = uuid.uuid4().hex[:8]
+    coach_user_id, coach_id = uuid.uuid4(), uuid.uuid4()
+    users, client_rows, resume_rows, application_rows = [], [], [], []
+    users.append({
+        "user_id": coach_user_id, "email": f"bench-coach-{run}@example.com", "password_hash": "x",
+        "user_type": "coach", "role": "coach",
+    })
+    for i in range(count):
+        user_id, client_id = uuid.uuid4(), uuid.uuid4()
+        email = f"bench-{run}-{i}@example.com"
+        users.append({"user_id": user_id, "email": email, "password_hash": "x", "user_type": "client", "role": "client"})
+        client_rows.append({
+            "client_id": client_id, "user_id": user_id, "email": email,
+            "name": f"看護 花子{i}", "last_name": "看護", "first_name": f"花子{i}",
+            "furigana": f"カンゴ ハナコ{i}", "company_name": "総合病院", "occupation": "看護師",
+            "registration_date": date.today(), "contract_end_date": date.today() + timedelta(days=90),
+            "will_can_must": WILL_CAN_MUST * 3, "strengths_finder": STRENGTHS * 2, "desired_income": 5000000,
+        })
+        resume_rows.append({
+            "client_id": client_id, "version_number": 1,
+            "content": "".join(RESUME_LINE.format(n) for n in range(1, 21)), "status": "submitted",
+        })
+        for n in range(3):
+            application_rows.append({
+                "client_id": client_id, "company_name": f"医療法人 さくら会 第{n + 1}病院",
+                "application_date": date.today(), "next_interview_date": date.today() + timedelta(days=n + i % 7),
+                "selection_stage": "一次面接", "status": "active", "notes": NOTES,
+            })
+
+    db.execute(insert(UserAuth), users)
+    db.execute(insert(Coach), [{
+        "coach_id": coach_id, "user_id": coach_user_id, "name": "計測 コーチ", "email": users[0]["email"],
+    }])
+    db.execute(insert(Client), client_rows)
+    db.execute(insert(Resume), resume_rows)
+    db.execute(insert(Application), application_rows)
+    db.commit()
+    return {"user_ids": [u["user_id"] for u in users], "client_ids": [c["client_id"] for c in client_rows],
+            "coach_id": coach_id, "coach_user_id": coach_user_id}
+
+
+def cleanup(db, seeded: dict) -> None:
+    db.rollback()
+    client_ids = seeded["client_ids"]
+    db.execute(delete(Application).where(Application.client_id.in_(client_ids)))
+    db.execute(delete(Resume).where(Resume.client_id.in_(client_ids)))
+    db.execute(delete(Client).where(Client.client_id.in_(client_ids)))
+    db.execute(delete(Coach).where(Coach.coach_id == seeded["coach_id"]))
+    db.execute(delete(UserAuth).where(UserAuth.user_id.in_(seeded["user_ids"])))
+    db.commit()
+
+
+async def _get(app: FastAPI, path: str, headers: dict) -> bytes:
+    """ASGIアプリを直接呼び出し、送信された本文（圧縮後）を返す"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    status, chunks = None, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"GET {path} returned {status}")
+    return b"".join(chunks)
+
+
+async def measure(app: FastAPI, path: str, headers: dict, requests: int) -> tuple:
+    """(本文のバイト数, 1リクエストあたりのCPU時間(ms), 1リクエストあたりの経過時間(ms))"""
+    for _ in range(3):
+        body = await _get(app, path, headers)
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        body = await _get(app, path, headers)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return len(body), cpu * 1000 / requests, wall * 1000 / requests
+
+
+async def run_benchmark(token: str, requests: int) -> None:
+    configs = [
+        ("json", JSONResponse, None),
+        ("orjson", ORJSONResponse, None),
+        ("orjson+gzip", ORJSONResponse, ENCODING_GZIP),
+    ]
+    if brotli_available():
+        configs.append(("orjson+br", ORJSONResponse, ENCODING_BROTLI))
+    else:
+        print("brotli がインストールされていないため orjson+br は計測しません")
+
+    print(f"Database: {engine.dialect.name}、各{requests}リクエスト")
+    print(f"{'endpoint':<28} {'config':<12} {'bytes/req':>10} {'CPU ms/req':>11} {'wall ms/req':>12}  vs json")
+    for path in ENDPOINTS:
+        baseline = None
+        for label, response_class, encoding in configs:
+            headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": encoding or "identity"}
+            size, cpu, wall = await measure(build_app(response_class, encoding), path, headers, requests)
+            baseline = baseline or (size, cpu)
+            print(f"{path:<28} {label:<12} {size:>10,} {cpu:>11.2f} {wall:>12.2f}  "
+                  f"bytes {size / baseline[0]:.0%} / CPU {cpu / baseline[1]:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一覧レスポンスのサイズ・CPU時間の計測（JSON生成・圧縮の比較）")
+    parser.add_argument("--clients", type=int, default=200, help="作成する検証用の利用者数")
+    parser.add_argument("--requests", type=int, default=20, help="構成・エンドポイントごとのリクエスト数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    seeded = seed(db, args.clients)
+    try:
+        token = create_access_token({"sub": str(seeded["coach_user_id"])})
+        anyio.run(run_benchmark, token, args.requests)
+    finally:
+        # 検証用のデータは残さない
+        cleanup(db, seeded)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+クエリ実行計画の確認スクリプト
+
+ルーターと同じ形のクエリを EXPLAIN し、想定したインデックスを使っていることを確認します。
+検証用のデータを1つのトランザクション内で投入して統計情報を更新し、確認後にロールバックするため、
+既存のデータは変更されません。PostgreSQL（EXPLAIN）とSQLite（EXPLAIN QUERY PLAN）に対応しています。
+
+使い方:
+    python check_query_plans.py               # DATABASE_URL のDBで確認
+    python check_query_plans.py --scale 5     # 投入件数を5倍にして確認
+    python check_query_plans.py --verbose     # 実行計画をすべて表示
+
+いずれかのクエリが想定したインデックスを使っていない場合は終了コード1を返します。
+"""
+import argparse
+import json
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Sequence, Tuple
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session, joinedload
+from app.database import SessionLocal, engine
+from app.models.application import Application, ApplicationChange, ApplicationHistory
+from app.models.appointment import Appointment, CoachAvailability, appointment_coaches
+from app.models.resume import Resume
+from app.models.user import Client, Coach, UserAuth
+
+BASE_TIME = datetime(2030, 1, 7, tzinfo=timezone.utc)
+STATUSES = ['選考中', '内定', '不採用', '辞退']
+
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_PG_INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def seed(db: Session, scale: int) -> dict:
+    """検証用のデータを投入し、クエリに使うIDを返す"""
+    coach_count, client_count = 20 * scale, 200 * scale
+    users, coaches, clients = [], [], []
+    for i in range(coach_count + client_count):
+        is_coach = i < coach_count
+        user_id = uuid.uuid4()
+        users.append({
+            "user_id": user_id, "email": f"plan-check-{user_id}@example.com", "password_hash": "x",
+            "user_type": "coach" if is_coach else "client", "role": "coach" if is_coach else "client",
+            "status": "active",
+        })
+        target = coaches if is_coach else clients
+        target.append({
+            ("coach_id" if is_coach else "client_id"): uuid.uuid4(), "user_id": user_id,
+            "name": f"plan-check-{i}", "email": f"plan-check-{user_id}@example.com",
+        })
+    db.execute(insert(UserAuth), users)
+    db.execute(insert(Coach), coaches)
+    db.execute(insert(Client), clients)
+    coach_ids = [c["coach_id"] for c in coaches]
+    client_ids = [c["client_id"] for c in clients]
+
+    # 空き枠: コーチごとに過去（予約済みが大半）と今後の30分枠
+    slots = []
+    for n, coach_id in enumerate(coach_ids):
+        for k in range(200):
+            start = BASE_TIME + timedelta(days=k // 8 - 15, minutes=30 * (k % 8) + 60 * (n % 4))
+            slots.append({
+                "coach_id": coach_id, "available_start": start, "available_end": start + timedelta(minutes=30),
+                "is_booked": k < 120 or k % 3 == 0,
+            })
+    db.execute(insert(CoachAvailability), slots)
+
+    resumes, applications, history, appointments, links = [], [], [], [], []
+    for n, client_id in enumerate(client_ids):
+        for version in range(1, 6):
+            resumes.append({"client_id": client_id, "version_number": version, "status": "draft"})
+        for k in range(10):
+            application_id = uuid.uuid4()
+            applications.append({
+                "application_id": application_id, "client_id": client_id, "company_name": f"company-{n}-{k}",
+                "status": STATUSES[(n + k) % len(STATUSES)],
+                "next_interview_date": None if k % 4 == 0 else BASE_TIME.date() + timedelta(days=(n + k) % 90),
+            })
+            for h in range(5):
+                history.append({
+                    "application_id": application_id, "changed_date": BASE_TIME - timedelta(days=h),
+                    "changed_field": "status", "old_value": "a", "new_value": "b",
+                })
+        for k in range(5):
+            appointment_id = uuid.uuid4()
+            coach_id = coach_ids[(n + k) % len(coach_ids)]
+            appointments.append({
+                "appointment_id": appointment_id, "client_id": client_id, "coach_id": coach_id,
+                "appointment_date": BASE_TIME + timedelta(days=k * 7, hours=n % 8), "status": "予約済",
+            })
+            links.append({"appointment_id": appointment_id, "coach_id": coach_id})
+    db.execute(insert(Resume), resumes)
+    db.execute(insert(Application), applications)
+    db.execute(insert(ApplicationHistory), history)
+    db.execute(insert(ApplicationChange), [
+        {
+            "application_id": a["application_id"], "client_id": a["client_id"], "operation": "update",
+            "changes": {"status": ["選考中", a["status"]]},
+        }
+        for a in applications
+    ])
+    db.execute(insert(Appointment), appointments)
+    db.execute(appointment_coaches.insert(), links)
+    db.flush()
+
+    db.execute(text("ANALYZE"))
+    return {
+        "coach_id": coach_ids[0],
+        "client_id": client_ids[0],
+        "application_id": applications[0]["application_id"],
+    }
+
+
+def build_checks(db: Session, ids: dict) -> List[Tuple[str, Callable[[], object], Sequence[str]]]:
+    """(名前, クエリを実行する関数, 想定するインデックス名の接頭辞) のリスト"""
+    start, end = BASE_TIME, BASE_TIME + timedelta(days=7)
+    week_start = BASE_TIME.date()
+    return [
+        (
+            "GET /api/appointments/coach-availability",
+            lambda: db.query(CoachAvailability).options(joinedload(CoachAvailability.coach)).filter(
+                CoachAvailability.available_start >= start,
+                CoachAvailability.available_end <= end,
+                CoachAvailability.is_booked == False,
+            ).order_by(CoachAvailability.available_start.asc()).all(),
+            ("idx_coach_availability_open_start", "idx_coach_availability_open_coach_start"),
+        ),
+        (
+            "GET /api/appointments/coach-availability/{coach_id}",
+            lambda: db.query(CoachAvailability).options(joinedload(CoachAvailability.coach)).filter(
+                CoachAvailability.coach_id == ids["coach_id"],
+                CoachAvailability.available_start >= start,
+                CoachAvailability.available_end <= end,
+                CoachAvailability.is_booked == False,
+            ).order_by(CoachAvailability.available_start.asc()).all(),
+            ("idx_coach_availability_open_coach_start",),
+        ),
+        (
+            "空き枠の重複検出（scheduling.availability_index）",
+            lambda: db.query(CoachAvailability.available_start, CoachAvailability.available_end).filter(
+                CoachAvailability.coach_id == ids["coach_id"],
+                CoachAvailability.available_start < end,
+                CoachAvailability.available_end > start,
+            ).all(),
+            ("idx_coach_availability_coach_start_end",),
+        ),
+        (
+            "GET /api/resumes/client/{client_id}",
+            lambda: db.query(Resume).filter(
+                Resume.client_id == ids["client_id"]
+            ).order_by(Resume.version_number.desc()).all(),
+            # 一意制約のインデックス（SQLiteでは自動生成名）
+            ("uq_client_version", "sqlite_autoindex_resumes"),
+        ),
+        (
+            "GET /api/applications/history/{application_id}",
+            lambda: db.query(ApplicationHistory).filter(
+                ApplicationHistory.application_id == ids["application_id"]
+            ).order_by(ApplicationHistory.changed_date.desc()).all(),
+            ("idx_application_history_application_changed",),
+        ),
+        (
+            "GET /api/applications/changes（利用者）",
+            lambda: db.query(ApplicationChange).filter(
+                ApplicationChange.seq > 0, ApplicationChange.client_id == ids["client_id"]
+            ).order_by(ApplicationChange.seq.asc()).limit(101).all(),
+            ("idx_application_changes_client_seq",),
+        ),
+        (
+            "GET /api/applications?status=",
+            lambda: db.query(Application).filter(Application.status == STATUSES[1]).order_by(
+                Application.next_interview_date.asc().nulls_last(), Application.application_id.asc()
+            ).limit(51).all(),
+            ("idx_applications_status_next_interview_date_id",),
+        ),
+        (
+            "GET /api/appointments（コーチ）",
+            lambda: db.query(Appointment).join(appointment_coaches).filter(
+                appointment_coaches.c.coach_id == ids["coach_id"]
+            ).order_by(Appointment.appointment_date.asc()).all(),
+            ("idx_appointment_coaches_coach_id",),
+        ),
+        (
+            "GET /api/appointments（利用者）",
+            lambda: db.query(Appointment).filter(
+                Appointment.client_id == ids["client_id"]
+            ).order_by(Appointment.appointment_date.asc()).all(),
+            ("idx_appointments_client_date",),
+        ),
+        (
+            "GET /api/dashboard/coach（今週の面接数）",
+            lambda: db.query(Application.application_id).filter(
+                Application.next_interview_date >= week_start,
+                Application.next_interview_date <= week_start + timedelta(days=6),
+            ).count(),
+            ("idx_applications_next_interview_date_id", "idx_applications_status_next_interview_date_id"),
+        ),
+    ]
+
+
+def explain(db: Session, run: Callable[[], object]) -> Tuple[List[str], str]:
+    """run が発行したSELECTの実行計画を取得し、(使用したインデックス名, 実行計画の文字列) を返す"""
+    is_postgres = engine.dialect.name == "postgresql"
+    plans: List[str] = []
+    indexes: List[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return
+        if is_postgres:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            stack = [plan[0]["Plan"]]
+            while stack:
+                node = stack.pop()
+                if node.get("Node Type") in _PG_INDEX_NODES:
+                    indexes.append(node["Index Name"])
+                stack.extend(node.get("Plans", []))
+            plans.append(json.dumps(plan, ensure_ascii=False, indent=1))
+        else:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            details = [row[3] for row in cursor.fetchall()]
+            for detail in details:
+                indexes.extend(_SQLITE_INDEX.findall(detail))
+            plans.append("\n".join(details))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    return indexes, "\n".join(plans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="主要クエリがインデックスを使うことをEXPLAINで確認")
+    parser.add_argument("--scale", type=int, default=1, help="投入するデータ量の倍率")
+    parser.add_argument("--verbose", action="store_true", help="実行計画を表示")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        ids = seed(db, max(1, args.scale))
+        print(f"Database: {engine.dialect.name}")
+        for name, run, expected in build_checks(db, ids):
+            indexes, plan = explain(db, run)
+            passed = any(index.startswith(prefix) for index in indexes for prefix in expected)
+            failures += not passed
+            print(f"[{'OK' if passed else 'NG'}] {name}: {', '.join(indexes) or 'インデックス未使用'}")
+            if args.verbose or not passed:
+                print("    " + plan.replace("\n", "\n    "))
+    finally:
+        # 検証用のデータは残さない
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"\n{failures}件のクエリが想定したインデックスを使っていません", file=sys.stderr)
+        sys.exit(1)
+    print("\nすべてのクエリが想定したインデックスを使っています")
+
+
+if __name__ == "__main__":
+    main()
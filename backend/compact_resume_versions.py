@@ -0,0 +1,59 @@
+"""
+職務経歴書の版の差分変換スクリプト
+
+全文で保存されている過去の版を、1つ新しい版からの差分（content_delta）に変換します。
+差分保存の導入時（migration_add_resume_content_delta.sql の適用後）に一度実行します。
+最新版と、版番号が区切り（10の倍数）の版は全文のまま残します。利用者ごとにコミットします。
+
+使い方:
+    python compact_resume_versions.py
+    python compact_resume_versions.py --dry-run   # 変換せず、保存サイズの変化のみ表示
+"""
+import argparse
+import sys
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models.resume import Resume
+from app.utils.resume_versions import compact_client
+
+
+def stored_size(db) -> int:
+    """本文と差分の合計文字数"""
+    return db.query(
+        func.coalesce(func.sum(func.length(func.coalesce(Resume.content, "")) + func.length(func.coalesce(Resume.content_delta, ""))), 0)
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="職務経歴書の過去の版を差分での保存に変換")
+    parser.add_argument("--dry-run", action="store_true", help="変換せず結果のみ表示")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    converted = 0
+    try:
+        before = stored_size(db)
+        client_ids = [row[0] for row in db.query(Resume.client_id).group_by(Resume.client_id).having(func.count() > 1)]
+        for client_id in client_ids:
+            converted += compact_client(db, client_id)
+            if args.dry_run:
+                db.flush()
+            else:
+                db.commit()
+        after = stored_size(db)
+        if args.dry_run:
+            db.rollback()
+    except Exception as e:
+        db.rollback()
+        print(f"エラーが発生しました: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(f"{prefix}対象の利用者: {len(client_ids)}人、差分に変換した版: {converted}件")
+    print(f"{prefix}保存サイズ: {before:,}文字 → {after:,}文字")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+検索文書の再作成スクリプト
+
+顧客・応募・職務経歴書から search_documents（SQLiteでは search_fts も）を作り直します。
+検索機能の導入時（migration_add_search_documents.sql の適用後）や、一括更新で文書がずれた場合に実行します。
+
+使い方:
+    python rebuild_search_index.py
+    python rebuild_search_index.py --batch-size 1000
+"""
+import argparse
+import sys
+import time
+from app.database import SessionLocal
+from app.utils.search import rebuild_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="検索文書の再作成")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        counts = rebuild_index(db, batch_size=args.batch_size)
+    except Exception as e:
+        db.rollback()
+        print(f"エラーが発生しました: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for entity_type, count in counts.items():
+        print(f"  {entity_type}: {count}件")
+    print(f"検索文書を再作成しました（{time.perf_counter() - started:.2f}秒）")
+
+
+if __name__ == "__main__":
+    main()
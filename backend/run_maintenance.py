@@ -0,0 +1,66 @@
+"""
+定期メンテナンススクリプト
+
+終了した未予約の空き枠・適用期間の過ぎた繰り返しルールを削除し、過去の面談を appointments_archive へ移動します。
+保持期間（SYNC_TOMBSTONE_RETENTION_DAYS）を過ぎた差分同期用の削除の記録も削除します。
+処理はバッチごとにコミットするため、稼働中のサーバーと並行して実行できます。
+
+使い方:
+    python run_maintenance.py              # .env の設定値で実行
+    python run_maintenance.py --dry-run    # 対象件数のみ表示
+    python run_maintenance.py --slot-retention-days 7 --archive-days 180 --batch-size 500
+
+cron の例（毎日3時に実行）:
+    0 3 * * * cd /path/to/backend && python run_maintenance.py >> maintenance.log 2>&1
+"""
+import argparse
+import sys
+import time
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.maintenance import run_maintenance
+
+LABELS = {
+    "expired_slots_deleted": "終了した未予約の空き枠（削除）",
+    "expired_rules_deleted": "適用期間の過ぎた繰り返しルール（削除）",
+    "appointments_archived": "過去の面談（アーカイブへ移動）",
+    "booked_slots_deleted": "アーカイブ済み面談の予約済み枠（削除）",
+    "tombstones_deleted": "保持期間を過ぎた差分同期用の削除の記録（削除）",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="空き枠の削除と過去の面談のアーカイブ")
+    parser.add_argument("--slot-retention-days", type=int, default=settings.SLOT_RETENTION_DAYS)
+    parser.add_argument("--archive-days", type=int, default=settings.APPOINTMENT_ARCHIVE_DAYS,
+                        help="指定日数より前の面談をアーカイブ（0で無効）")
+    parser.add_argument("--batch-size", type=int, default=settings.MAINTENANCE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="削除・移動せず対象件数のみ表示")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        report = run_maintenance(
+            db,
+            slot_retention_days=args.slot_retention_days,
+            archive_days=args.archive_days,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            tombstone_retention_days=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"エラーが発生しました: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print("メンテナンス結果" + ("（dry-run: 変更なし）" if report.dry_run else ""))
+    for name, count in report.counts.items():
+        print(f"  {LABELS.get(name, name)}: {count}件")
+    print(f"  所要時間: {time.perf_counter() - started:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
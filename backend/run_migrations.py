@@ -26,6 +26,18 @@ def main():
             "../database/migrations/migration_update_name_phone_fields.sql",
             "../database/migrations/migration_remove_coach_id_from_clients.sql",
             "../database/migrations/migration_add_super_admin_role.sql",
+            "../database/migrations/migration_add_client_list_indexes.sql",
+            "../database/migrations/migration_add_application_keyset_index.sql",
+            "../database/migrations/migration_add_email_delivery_failures.sql",
+            "../database/migrations/migration_add_schedule_exclusion_constraints.sql",
+            "../database/migrations/migration_add_availability_rules.sql",
+            "../database/migrations/migration_add_appointment_archive.sql",
+            "../database/migrations/migration_add_composite_indexes.sql",
+            "../database/migrations/migration_add_search_documents.sql",
+            "../database/migrations/migration_add_resume_content_delta.sql",
+            "../database/migrations/migration_add_resume_version_counters.sql",
+            "../database/migrations/migration_add_application_changes.sql",
+            "../database/migrations/migration_add_sync.sql",
         ]
 
         # 各マイグレーションファイルを実行
@@ -0,0 +1,141 @@
+"""
+職務経歴書の版番号の同時採番の負荷確認スクリプト
+
+検証用の利用者を作成し、複数のスレッドから同時に職務経歴書の版を追加して、
+版番号が重複・欠番なく採番され、差分で保存した全版の本文が復元できることを確認します。
+DATABASE_URL のDB（SQLite・PostgreSQL）に対して実行し、終了後に検証用のデータを削除します。
+
+使い方:
+    python stress_resume_versions.py                          # 8スレッド × 25件
+    python stress_resume_versions.py --threads 16 --creates 50
+    python stress_resume_versions.py --naive                  # 従来の max + 1 の採番（重複の発生を確認）
+
+重複・欠番・復元の不一致があった場合は終了コード1を返します。
+"""
+import argparse
+import sys
+import threading
+import time
+import uuid
+from sqlalchemy import delete, func, select
+from app.database import SessionLocal, engine
+from app.models.resume import Resume, ResumeVersionCounter
+from app.models.user import Client, UserAuth
+from app.utils.resume_versions import allocate_version_number, append_version, latest_version, resolve_contents
+from app.utils.search import ENTITY_CLIENT, ENTITY_RESUME, write_documents
+
+BASE_LINES = [f"{i}. 急性期病棟での看護業務・リーダー業務・新人教育を担当\n" for i in range(1, 41)]
+
+
+def build_content(worker: int, index: int) -> str:
+    lines = list(BASE_LINES)
+    lines[(worker * 7 + index) % len(lines)] = f"スレッド{worker}の{index}件目で追記した行\n"
+    return "".join(lines)
+
+
+def create_version(client_id: uuid.UUID, content: str, naive: bool) -> int:
+    """1件の版を1トランザクションで追加し、版番号を返す"""
+    db = SessionLocal()
+    try:
+        if naive:
+            last_resume = db.query(Resume).filter(
+                Resume.client_id == client_id
+            ).order_by(Resume.version_number.desc()).first()
+            version_number = 1 if not last_resume else last_resume.version_number + 1
+        else:
+            version_number = allocate_version_number(db, client_id)
+            last_resume = latest_version(db, client_id)
+        resume = Resume(client_id=client_id, version_number=version_number, content=content)
+        if not naive:
+            append_version(db, last_resume, resume)
+        db.add(resume)
+        db.commit()
+        return version_number
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="職務経歴書の版番号の同時採番を確認")
+    parser.add_argument("--threads", type=int, default=8, help="同時に作成するスレッド数")
+    parser.add_argument("--creates", type=int, default=25, help="スレッドごとの作成件数")
+    parser.add_argument("--naive", action="store_true", help="従来の max + 1 で採番")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user_id, client_id = uuid.uuid4(), uuid.uuid4()
+    email = f"stress-resume-{user_id}@example.com"
+    db.add(UserAuth(user_id=user_id, email=email, password_hash="x", user_type="client", role="client"))
+    db.add(Client(client_id=client_id, user_id=user_id, name="stress-resume", email=email))
+    db.commit()
+
+    created, errors = {}, []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(number: int):
+        barrier.wait()
+        for index in range(args.creates):
+            content = build_content(number, index)
+            try:
+                version_number = create_version(client_id, content, args.naive)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {str(e).splitlines()[0]}")
+                continue
+            with lock:
+                if version_number in created:
+                    errors.append(f"version {version_number} allocated twice")
+                created[version_number] = content
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    failures = list(errors)
+    try:
+        expected = args.threads * args.creates
+        stored = db.query(Resume).filter(Resume.client_id == client_id).all()
+        numbers = sorted(r.version_number for r in stored)
+        if numbers != list(range(1, expected + 1)):
+            failures.append(f"versions are not 1..{expected} (stored {len(numbers)}, max {numbers[-1] if numbers else 0})")
+        resolve_contents(db, stored)
+        mismatched = [r.version_number for r in stored if r.content != created.get(r.version_number)]
+        if mismatched:
+            failures.append(f"content mismatch in {len(mismatched)} versions (e.g. v{mismatched[0]})")
+        deltas = sum(1 for r in stored if r.content_delta is not None)
+        print(f"Database: {engine.dialect.name}（{'max + 1' if args.naive else 'カウンター'}による採番）")
+        print(f"  {args.threads}スレッド × {args.creates}件: {len(created)}件作成、{elapsed:.2f}秒"
+              f"（{len(created) / elapsed if elapsed else 0:.1f}件/秒）、差分で保存: {deltas}件")
+    finally:
+        # 検証用のデータは残さない（SQLiteでは外部キーのCASCADEが効かない場合があるため明示的に削除）
+        db.rollback()
+        resume_ids = db.scalars(select(Resume.resume_id).where(Resume.client_id == client_id)).all()
+        write_documents(db.connection(), [], [(ENTITY_RESUME, r) for r in resume_ids] + [(ENTITY_CLIENT, client_id)])
+        db.execute(delete(Resume).where(Resume.client_id == client_id))
+        db.execute(delete(ResumeVersionCounter).where(ResumeVersionCounter.client_id == client_id))
+        db.execute(delete(Client).where(Client.client_id == client_id))
+        db.execute(delete(UserAuth).where(UserAuth.user_id == user_id))
+        db.commit()
+        remaining = db.scalar(select(func.count()).select_from(Resume).where(Resume.client_id == client_id))
+        db.close()
+        if remaining:
+            print(f"検証用の職務経歴書が{remaining}件残っています", file=sys.stderr)
+
+    if failures:
+        for failure in failures[:10]:
+            print(f"  NG: {failure}", file=sys.stderr)
+        print(f"{len(failures)}件の問題が見つかりました", file=sys.stderr)
+        sys.exit(1)
+    print("版番号は重複・欠番なく採番され、全版の本文を復元できました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+-- ======================================================
+-- 応募の変更ログ（1回の変更ごとに1行、変更項目をJSONで記録）
+-- ======================================================
+
+-- 追記のみ。seq はコミット順の連番（記録時に pg_advisory_xact_lock で直列化）
+-- 応募の削除後も記録を残すため外部キーは持たない
+CREATE TABLE IF NOT EXISTS application_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    application_id UUID NOT NULL,
+    client_id UUID NOT NULL,
+    operation VARCHAR(10) NOT NULL,                   -- 'create' / 'update' / 'delete'
+    changes JSONB NOT NULL,                           -- {"項目名": [変更前, 変更後]}
+    changed_by UUID,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 利用者ごと・応募ごとの差分取得用
+CREATE INDEX IF NOT EXISTS idx_application_changes_client_seq ON application_changes(client_id, seq);
+CREATE INDEX IF NOT EXISTS idx_application_changes_application_seq ON application_changes(application_id, seq);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '応募の変更ログの作成完了（既存の application_history は引き続き履歴APIで参照されます）';
+END $$;
@@ -0,0 +1,13 @@
+-- ======================================================
+-- 応募一覧のキーセットページネーション用インデックス
+-- ======================================================
+
+-- ORDER BY next_interview_date ASC NULLS LAST, application_id ASC をインデックス順で走査
+CREATE INDEX IF NOT EXISTS idx_applications_next_interview_date_id
+    ON applications(next_interview_date, application_id);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '応募一覧用インデックスの作成完了';
+END $$;
@@ -0,0 +1,46 @@
+-- ======================================================
+-- 過去の面談のアーカイブテーブル
+-- ======================================================
+
+-- run_maintenance.py が appointments から古い面談を移動する
+-- 面談日時の年ごとにパーティション分割し、範囲外の日時は既定のパーティションに入る
+CREATE TABLE IF NOT EXISTS appointments_archive (
+    appointment_id UUID NOT NULL,
+    client_id UUID NOT NULL,
+    coach_id UUID NOT NULL,
+    coach_ids JSONB,                                  -- 全担当コーチ
+    appointment_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    duration_minutes INTEGER,
+    appointment_type VARCHAR(20),
+    status VARCHAR(20) NOT NULL,
+    mtg_url TEXT,
+    notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (appointment_id, appointment_date)
+) PARTITION BY RANGE (appointment_date);
+
+DO $$
+DECLARE
+    y INTEGER;
+BEGIN
+    FOR y IN 2020..2035 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS appointments_archive_%s PARTITION OF appointments_archive
+             FOR VALUES FROM (%L) TO (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS appointments_archive_default PARTITION OF appointments_archive DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_appointments_archive_client_id ON appointments_archive(client_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_archive_appointment_date ON appointments_archive(appointment_date);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '面談アーカイブテーブルの作成完了';
+END $$;
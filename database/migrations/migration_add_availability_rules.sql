@@ -0,0 +1,26 @@
+-- ======================================================
+-- 毎週の繰り返し空き枠ルール
+-- ======================================================
+
+-- 読み取り時に期間分だけ展開し、予約された枠のみ coach_availability に登録する
+CREATE TABLE IF NOT EXISTS coach_availability_rules (
+    rule_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    coach_id UUID NOT NULL REFERENCES coaches(coach_id) ON DELETE CASCADE,
+    weekdays JSONB NOT NULL,                          -- 0=月曜 〜 6=日曜
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    timezone VARCHAR(50) NOT NULL DEFAULT 'Asia/Tokyo',
+    valid_from DATE NOT NULL,
+    valid_until DATE,                                 -- NULL = 無期限
+    excluded_dates JSONB,                             -- 適用しない日付のリスト
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_coach_availability_rules_coach_id ON coach_availability_rules(coach_id);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '繰り返し空き枠ルールテーブルの作成完了';
+END $$;
@@ -0,0 +1,26 @@
+-- ======================================================
+-- 顧客一覧のページネーション・絞り込み・前方一致検索用インデックス
+-- ======================================================
+
+-- 1. キーセットページネーション（created_at, client_id の順で走査）
+CREATE INDEX IF NOT EXISTS idx_clients_created_at_client_id ON clients(created_at, client_id);
+
+-- 2. 契約終了日での絞り込み
+CREATE INDEX IF NOT EXISTS ix_clients_contract_end_date ON clients(contract_end_date);
+
+-- 3. 氏名・フリガナの前方一致検索（LIKE 'xxx%' はtext_pattern_opsでインデックスを利用可能）
+CREATE INDEX IF NOT EXISTS idx_clients_name_prefix ON clients(name text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_last_name_prefix ON clients(last_name text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_first_name_prefix ON clients(first_name text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_furigana_prefix ON clients(furigana text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_last_name_kana_prefix ON clients(last_name_kana text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_first_name_kana_prefix ON clients(first_name_kana text_pattern_ops);
+
+-- 4. メールアドレスの前方一致検索（大文字小文字を区別しない）
+CREATE INDEX IF NOT EXISTS idx_clients_email_lower_prefix ON clients(lower(email) text_pattern_ops);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '顧客一覧用インデックスの作成完了';
+END $$;
@@ -0,0 +1,48 @@
+-- ======================================================
+-- 実際のクエリ形状に合わせた複合・部分インデックス
+-- ======================================================
+-- 確認: python check_query_plans.py（各クエリがインデックスを使うことをEXPLAINで確認）
+
+-- 1. 未予約の空き枠一覧（is_booked = false, available_start の範囲・順序）
+--    予約済みの行を含まないため、予約が増えてもインデックスが大きくならない
+CREATE INDEX IF NOT EXISTS idx_coach_availability_open_start
+    ON coach_availability(available_start) WHERE is_booked = false;
+CREATE INDEX IF NOT EXISTS idx_coach_availability_open_coach_start
+    ON coach_availability(coach_id, available_start) WHERE is_booked = false;
+
+-- 2. 空き枠の重複検出・予約状態の更新（coach_id = ? AND available_start < ? AND available_end > ?）
+CREATE INDEX IF NOT EXISTS idx_coach_availability_coach_start_end
+    ON coach_availability(coach_id, available_start, available_end);
+
+-- 3. 応募の変更履歴（application_id = ? ORDER BY changed_date DESC）
+CREATE INDEX IF NOT EXISTS idx_application_history_application_changed
+    ON application_history(application_id, changed_date DESC);
+
+-- 4. ステータスで絞り込んだ応募一覧（status = ? ORDER BY next_interview_date NULLS LAST, application_id）
+CREATE INDEX IF NOT EXISTS idx_applications_status_next_interview_date_id
+    ON applications(status, next_interview_date, application_id);
+
+-- 5. コーチ担当の面談（appointment_coaches.coach_id = ?）
+--    主キー (appointment_id, coach_id) は coach_id からの検索に使えない
+CREATE INDEX IF NOT EXISTS idx_appointment_coaches_coach_id
+    ON appointment_coaches(coach_id, appointment_id);
+
+-- 6. 利用者の面談一覧（client_id = ? ORDER BY appointment_date）
+CREATE INDEX IF NOT EXISTS idx_appointments_client_date
+    ON appointments(client_id, appointment_date);
+
+-- 職務経歴書の版一覧（client_id = ? ORDER BY version_number DESC）は
+-- 一意制約 uq_client_version (client_id, version_number) の逆順走査で足りるため追加しない
+
+-- 統計情報を更新して新しいインデックスを計画に反映
+ANALYZE coach_availability;
+ANALYZE application_history;
+ANALYZE applications;
+ANALYZE appointment_coaches;
+ANALYZE appointments;
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '複合・部分インデックスの作成完了';
+END $$;
@@ -0,0 +1,23 @@
+-- ======================================================
+-- メール送信失敗の記録テーブル
+-- ======================================================
+
+-- バックグラウンド送信で再試行しても送れなかったメールを保存
+CREATE TABLE IF NOT EXISTS email_delivery_failures (
+    failure_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    to_email VARCHAR(255) NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_delivery_failures_to_email ON email_delivery_failures(to_email);
+CREATE INDEX IF NOT EXISTS idx_email_delivery_failures_created_at ON email_delivery_failures(created_at);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE 'メール送信失敗テーブルの作成完了';
+END $$;
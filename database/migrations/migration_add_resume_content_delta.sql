@@ -0,0 +1,12 @@
+-- ======================================================
+-- 職務経歴書の版の差分保存
+-- ======================================================
+
+-- 1つ新しい版から本文を復元する差分（全文で保存している版ではNULL、差分で保存している版は content がNULL）
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS content_delta TEXT;
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '職務経歴書の差分保存の列を追加しました（既存の版は compact_resume_versions.py で差分に変換してください）';
+END $$;
@@ -0,0 +1,20 @@
+-- ======================================================
+-- 職務経歴書の版番号の採番用カウンター
+-- ======================================================
+
+-- 利用者ごとに最後に採番した版番号（INSERT ... ON CONFLICT DO UPDATE ... RETURNING で採番）
+CREATE TABLE IF NOT EXISTS resume_version_counters (
+    client_id UUID PRIMARY KEY REFERENCES clients(client_id) ON DELETE CASCADE,
+    last_version INTEGER NOT NULL DEFAULT 0
+);
+
+-- 既存の職務経歴書の最大の版番号から作成（行がない利用者は初回の採番時に作成される）
+INSERT INTO resume_version_counters (client_id, last_version)
+SELECT client_id, MAX(version_number) FROM resumes GROUP BY client_id
+ON CONFLICT (client_id) DO NOTHING;
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '職務経歴書の版番号カウンターの作成完了';
+END $$;
@@ -0,0 +1,85 @@
+-- ======================================================
+-- 空き枠・面談の時間帯重複を防ぐ排他制約（GiST）
+-- ======================================================
+
+-- uuid の等価比較を GiST インデックスで扱うための拡張
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- 面談の時間帯 [開始, 開始 + 面談時間)
+-- 分単位の加算はタイムゾーン設定に依存しないため IMMUTABLE として定義する
+CREATE OR REPLACE FUNCTION appointment_period(start_at TIMESTAMPTZ, minutes INTEGER)
+RETURNS TSTZRANGE AS $$
+    SELECT tstzrange(start_at, start_at + make_interval(mins => COALESCE(minutes, 30)), '[)')
+$$ LANGUAGE sql IMMUTABLE;
+
+DO $$
+BEGIN
+    -- 1. 同じコーチの空き枠の重複を禁止
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'coach_availability_no_overlap') THEN
+        RAISE NOTICE 'coach_availability_no_overlap は作成済み';
+    ELSIF EXISTS (
+        SELECT 1 FROM (
+            SELECT available_start,
+                   MAX(available_end) OVER (
+                       PARTITION BY coach_id ORDER BY available_start, availability_id
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ) AS previous_end
+            FROM coach_availability
+        ) slots
+        WHERE previous_end > available_start
+    ) THEN
+        RAISE WARNING '重複する空き枠が存在するため coach_availability_no_overlap を作成しませんでした。重複を解消してから再実行してください';
+    ELSE
+        ALTER TABLE coach_availability
+            ADD CONSTRAINT coach_availability_no_overlap
+            EXCLUDE USING gist (coach_id WITH =, tstzrange(available_start, available_end, '[)') WITH &&);
+    END IF;
+
+    -- 2. キャンセル以外の面談について、同じ主担当コーチ・同じ利用者の重複を禁止
+    --    （共同担当コーチ appointment_coaches の重複はアプリケーション側で検出）
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'appointments_coach_no_overlap') THEN
+        RAISE NOTICE 'appointments_coach_no_overlap は作成済み';
+    ELSIF EXISTS (
+        SELECT 1 FROM (
+            SELECT appointment_date,
+                   MAX(appointment_date + make_interval(mins => COALESCE(duration_minutes, 30))) OVER (
+                       PARTITION BY coach_id ORDER BY appointment_date, appointment_id
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ) AS previous_end
+            FROM appointments
+            WHERE status <> 'キャンセル'
+        ) a
+        WHERE previous_end > appointment_date
+    ) THEN
+        RAISE WARNING '重複する面談が存在するため appointments_coach_no_overlap を作成しませんでした';
+    ELSE
+        ALTER TABLE appointments
+            ADD CONSTRAINT appointments_coach_no_overlap
+            EXCLUDE USING gist (coach_id WITH =, appointment_period(appointment_date, duration_minutes) WITH &&)
+            WHERE (status <> 'キャンセル');
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'appointments_client_no_overlap') THEN
+        RAISE NOTICE 'appointments_client_no_overlap は作成済み';
+    ELSIF EXISTS (
+        SELECT 1 FROM (
+            SELECT appointment_date,
+                   MAX(appointment_date + make_interval(mins => COALESCE(duration_minutes, 30))) OVER (
+                       PARTITION BY client_id ORDER BY appointment_date, appointment_id
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ) AS previous_end
+            FROM appointments
+            WHERE status <> 'キャンセル'
+        ) a
+        WHERE previous_end > appointment_date
+    ) THEN
+        RAISE WARNING '重複する面談が存在するため appointments_client_no_overlap を作成しませんでした';
+    ELSE
+        ALTER TABLE appointments
+            ADD CONSTRAINT appointments_client_no_overlap
+            EXCLUDE USING gist (client_id WITH =, appointment_period(appointment_date, duration_minutes) WITH &&)
+            WHERE (status <> 'キャンセル');
+    END IF;
+
+    RAISE NOTICE '空き枠・面談の排他制約の作成完了';
+END $$;
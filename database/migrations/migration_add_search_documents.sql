@@ -0,0 +1,33 @@
+-- ======================================================
+-- 顧客・応募・職務経歴書の横断検索
+-- ======================================================
+
+-- 類似度検索（氏名・企業名の表記揺れ）用
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 検索文書（アプリケーションが保存時に更新。既存データは rebuild_search_index.py で取り込む）
+-- tokens は正規化した本文のバイグラム（英数字は単語）を空白で区切った文字列
+CREATE TABLE IF NOT EXISTS search_documents (
+    doc_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    entity_type VARCHAR(20) NOT NULL,                 -- 'client' / 'application' / 'resume'
+    entity_id UUID NOT NULL,
+    client_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    body TEXT,
+    tokens TEXT NOT NULL,
+    -- パーサーを通さずに語をそのまま語彙素にする（日本語のバイグラムがロケールに依存せず索引される）
+    tsv TSVECTOR GENERATED ALWAYS AS (array_to_tsvector(string_to_array(tokens, ' '))) STORED,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_search_documents_entity UNIQUE (entity_type, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_documents_tsv ON search_documents USING GIN (tsv);
+CREATE INDEX IF NOT EXISTS idx_search_documents_title_trgm ON search_documents USING GIN (title_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_search_documents_client_id ON search_documents(client_id);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '検索文書テーブルの作成完了（既存データは rebuild_search_index.py で取り込んでください）';
+END $$;
@@ -0,0 +1,31 @@
+-- ======================================================
+-- 差分同期（GET /api/sync）
+-- ======================================================
+
+-- 空き枠の更新日時（予約状態の変更を差分同期で返すため）
+ALTER TABLE coach_availability ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- 差分同期（updated_at, 主キーのキーセット）用
+CREATE INDEX IF NOT EXISTS idx_clients_updated_at_client_id ON clients(updated_at, client_id);
+CREATE INDEX IF NOT EXISTS idx_applications_updated_at_id ON applications(updated_at, application_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_updated_at_id ON appointments(updated_at, appointment_id);
+CREATE INDEX IF NOT EXISTS idx_resumes_updated_at_id ON resumes(updated_at, resume_id);
+CREATE INDEX IF NOT EXISTS idx_coach_availability_updated_at_id ON coach_availability(updated_at, availability_id);
+
+-- 削除の記録（SYNC_TOMBSTONE_RETENTION_DAYS を過ぎた記録は run_maintenance.py で削除）
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    tombstone_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    entity_type VARCHAR(30) NOT NULL,                 -- 'clients' / 'applications' / 'appointments' / 'resumes' / 'coach_availability'
+    entity_id UUID NOT NULL,
+    client_id UUID,                                   -- 利用者に属するデータの場合のみ
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at_id ON sync_tombstones(deleted_at, tombstone_id);
+CREATE INDEX IF NOT EXISTS ix_sync_tombstones_client_id ON sync_tombstones(client_id);
+
+-- 完了メッセージ
+DO $$
+BEGIN
+    RAISE NOTICE '差分同期用の列・インデックス・削除の記録テーブルの作成完了';
+END $$;